@@ -0,0 +1,100 @@
+import random
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+import tiktoken
+
+pytest.importorskip("pytest_benchmark")
+from pytest_benchmark.utils import parse_compare_fail
+
+BASELINES_DIR = Path(__file__).resolve().parent / "baselines"
+DEFAULT_COMPARE_FAIL = "mean:20%"
+
+_SPEAKERS = ("Interviewer", "Alex Smith", "Priya Patel")
+_WORDS = ("customer", "onboarding", "pricing", "dashboard", "export", "team", "report", "workflow", "integration",
+          "support", "really", "think", "because", "actually", "data", "slow", "easy", "manager", "quarter", "we",
+          "the", "a", "it", "was", "and", "to", "of", "that", "is", "our", "they", "when", "with", "for")
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    # Baselines live in the repo; --benchmark-compare fails on regressions beyond DEFAULT_COMPARE_FAIL
+    if config.getoption("benchmark_storage", None) == "file://./.benchmarks":
+        config.option.benchmark_storage = f"file://{BASELINES_DIR}"
+    if config.getoption("benchmark_compare", None) and not config.getoption("benchmark_compare_fail", None):
+        config.option.benchmark_compare_fail = [parse_compare_fail(DEFAULT_COMPARE_FAIL)]
+
+
+def synthetic_transcript(size: int, seed: int = 0) -> str:
+    """A Teams-style transcript of roughly size characters, reproducible for a seed."""
+    rng = random.Random(seed)
+    lines, length, second = [], 0, 0
+    while length < size:
+        if rng.random() < 0.2:
+            line = f"{second // 3600:02d}:{second // 60 % 60:02d}:{second % 60:02d}"
+        else:
+            speaker = rng.choice(_SPEAKERS)
+            line = f"{speaker}: " + " ".join(rng.choice(_WORDS) for _ in range(rng.randint(4, 40))) + "."
+        second += rng.randint(2, 30)
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines)[:size]
+
+
+@pytest.fixture(scope="session")
+def make_transcript():
+    return synthetic_transcript
+
+
+def benchmark_encoding() -> tiktoken.Encoding:
+    """
+    A fixed byte-level BPE encoding with merges for the synthetic vocabulary.
+
+    Like cl100k on English it yields about one token per word, but it is built
+    locally: benchmarks run offline, and every baseline measures the same tokens.
+    """
+    ranks = {bytes([i]): i for i in range(256)}
+    words = set(_WORDS) | {word for speaker in _SPEAKERS for word in speaker.split()}
+    for word in sorted(words):
+        for token in (word, " " + word):
+            data = token.encode("utf-8")
+            for end in range(2, len(data) + 1):
+                ranks.setdefault(data[:end], len(ranks))
+    return tiktoken.Encoding(name="benchmark_bpe", pat_str=r"""'s|\s*[\r\n]+| ?\w+|\s+(?!\S)|\s+|[^\s\w]+""",
+                             mergeable_ranks=ranks, special_tokens={})
+
+
+@pytest.fixture(scope="session")
+def encoding():
+    """The benchmark encoding, used by count_tokens and token indexes for the whole session."""
+    from processing import token_index
+    from utils import file_utils
+    encoding = benchmark_encoding()
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(file_utils, "get_encoding", lambda name="cl100k_base": encoding)
+        patch.setattr(token_index, "get_encoding", file_utils.get_encoding)
+        yield encoding
+
+
+def _response(content: str):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason="stop")],
+                           usage=SimpleNamespace(completion_tokens=len(content) // 4))
+
+
+class InstantClient:
+    """OpenAI client stand-in that answers immediately: a fixed report, and VALID for every validation."""
+
+    REPORT = "# Interview Analysis\n\n## Key Findings\n\n> \"The export is slow.\" — Alex Smith\n\n" + "Finding. " * 200
+
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, messages, timeout=None, **kwargs):
+        validating = messages[0]["content"].startswith("You are a meticulous analyst validating")
+        return _response("VALID" if validating else self.REPORT)
+
+
+@pytest.fixture
+def instant_client():
+    return InstantClient()
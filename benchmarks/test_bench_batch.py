@@ -0,0 +1,26 @@
+"""End-to-end batch throughput with an LLM client that answers instantly."""
+from processing import batch_processing
+from processing.transcript_processing import PROMPT_FILES
+
+TRANSCRIPTS = 100
+
+
+def test_process_all_transcripts(benchmark, make_transcript, encoding, instant_client, tmp_path, monkeypatch):
+    transcripts_dir = tmp_path / "transcripts"
+    transcripts_dir.mkdir()
+    for i in range(TRANSCRIPTS):
+        (transcripts_dir / f"bench_{i:03d}.txt").write_text(make_transcript(5_000 + 200 * i, seed=i), encoding="utf-8")
+    reports_dir = tmp_path / "reports"
+    reports_dir.mkdir()
+    # Pandoc is an external process; its cost is not part of the pipeline being measured
+    monkeypatch.setattr(batch_processing, "convert_markdown_to_docx", lambda *args, **kwargs: None)
+    benchmark.group = "batch"
+    try:
+        benchmark.pedantic(batch_processing.process_all_transcripts, args=(instant_client, "## Key Findings\n", reports_dir),
+                           kwargs={"input_dir": str(transcripts_dir)}, rounds=3, iterations=1)
+    finally:
+        # process_transcript also writes the rendered prompts to the project's reports/ folder
+        project_reports = batch_processing.Path(batch_processing.__file__).resolve().parent.parent / "reports"
+        for prompt_file in project_reports.glob("bench_*_prompt*.txt"):
+            prompt_file.unlink()
+    assert len(list(reports_dir.glob("*_analysis.md"))) == TRANSCRIPTS
@@ -0,0 +1,64 @@
+"""CPU-side hot paths that run once per transcript or per prompt."""
+import pytest
+
+from processing.token_index import TokenIndexCache
+from processing.transcript_chunking import split_transcript
+from processing.transcript_processing import load_prompt_templates, save_actual_prompt_file
+from utils.file_utils import count_tokens
+
+SIZES = {"10KB": 10_000, "100KB": 100_000, "1MB": 1_000_000, "5MB": 5_000_000}
+
+
+@pytest.mark.parametrize("size", list(SIZES), ids=list(SIZES))
+def test_count_tokens(benchmark, make_transcript, encoding, size):
+    text = make_transcript(SIZES[size])
+    benchmark.group = "count_tokens"
+    assert benchmark(count_tokens, text) > 0
+
+
+@pytest.mark.parametrize("size", ["100KB", "1MB"])
+def test_split_transcript(benchmark, make_transcript, encoding, size):
+    text = make_transcript(SIZES[size])
+    benchmark.group = "chunking"
+    chunks = benchmark(split_transcript, text, 4000)
+    assert len(chunks) > 1
+
+
+@pytest.mark.parametrize("size", ["10KB", "100KB", "1MB"])
+def test_render_prompts(benchmark, make_transcript, size):
+    # The initial, validation and revision prompts process_transcript renders per pass
+    prompts = load_prompt_templates()
+    transcript = make_transcript(SIZES[size])
+    template = "## Key Findings\n## Pain Points\n## Recommendations\n" * 20
+    report = "# Analysis\n" + "Finding. " * 2000
+    benchmark.group = "prompt rendering"
+
+    def render():
+        return (prompts["initial"].format(transcript=transcript, template=template),
+                prompts["validation"].format(transcript=transcript, report=report),
+                prompts["revision"].format(transcript=transcript, template=template, prev_report=report, issues="Missing quotes."))
+
+    assert all(benchmark(render))
+
+
+@pytest.mark.parametrize("size", ["10KB", "1MB"])
+def test_save_actual_prompt(benchmark, make_transcript, tmp_path, size):
+    prompt = make_transcript(SIZES[size])
+    benchmark.group = "save_actual_prompt"
+    path = benchmark(save_actual_prompt_file, tmp_path, "bench", prompt, "validation", 1)
+    assert path.stat().st_size >= len(prompt)
+
+
+@pytest.mark.parametrize("size", ["1MB", "5MB"])
+def test_token_index_lookup(benchmark, make_transcript, encoding, tmp_path, size):
+    # Count and chunk a transcript whose token index is already on disk (a later run over unchanged files)
+    text = make_transcript(SIZES[size])
+    TokenIndexCache(tmp_path, encoding).get(text)
+    benchmark.group = "token index"
+
+    def lookup():
+        index = TokenIndexCache(tmp_path, encoding).get(text)
+        return index.count, index.chunk_boundaries(text, 80000)
+
+    count, boundaries = benchmark(lookup)
+    assert boundaries[-1] == len(text)
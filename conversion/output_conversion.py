@@ -2,8 +2,9 @@ import logging
 from pathlib import Path
 import subprocess
 
+from utils.settings import Settings
 
-def convert_markdown_to_docx(md_file: Path, docx_file: Path) -> None:
+def convert_markdown_to_docx(md_file: Path, docx_file: Path, settings: Settings = None) -> None:
     """
     Convert a Markdown file to a Word document using Pandoc.
 
@@ -13,7 +14,11 @@ def convert_markdown_to_docx(md_file: Path, docx_file: Path) -> None:
     Args:
         md_file (Path): Path to the Markdown file.
         docx_file (Path): Path to the output Word document.
+        settings (Settings): If 'docx' is not among its output formats, nothing is converted (no Pandoc process).
     """
+    if settings is not None and not settings.docx:
+        logging.debug("Word export disabled by processing.output_format; skipped %s", docx_file)
+        return
     cmd = [
         "pandoc",
         str(md_file),
@@ -23,10 +28,10 @@ def convert_markdown_to_docx(md_file: Path, docx_file: Path) -> None:
     ]
     try:
         subprocess.run(cmd, check=True)
-        logging.info(f"Word document saved to {docx_file}")
+        logging.info("Word document saved to %s", docx_file)
     except subprocess.CalledProcessError as e:
-        logging.error(f"Error converting to Word document: {str(e)}")
+        logging.error("Error converting to Word document: %s", e)
     except Exception as e:
-        logging.error(f"Unexpected error during conversion: {str(e)}")
+        logging.error("Unexpected error during conversion: %s", e)
 
 # Ensure this file is in the 'conversion' folder for proper imports.
@@ -0,0 +1,244 @@
+"""Structured (JSON) extraction of analysis reports and columnar corpus export"""
+import json
+import logging
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+SCHEMA_VERSION = 1
+EXPORT_DIR = "corpus"
+EXPORT_FORMATS = ("parquet", "csv")
+TABLES = ("quotes", "ratings", "recommendations", "stage_findings", "participants")
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_BOLD_HEADING = re.compile(r"^\*\*([^*]+?)\*\*\s*$")
+_BULLET = re.compile(r"^(\s*)[-*+]\s+(.*)$")
+_QUOTE = re.compile(r"^\s*(?:[-*+]\s+)?>\s*(?:\*\*(?P<speaker>[^*]+?)\s*:?\s*\*\*\s*:?\s*)?[\"“](?P<text>.+?)[\"”]")
+_REFERENCE = re.compile(r"\*?\*?Transcript Reference:?\*?\*?:?\s*(.*)", re.IGNORECASE)
+_SCORE = re.compile(r"(\d+(?:\.\d+)?)\s*(?:/|out of)\s*(\d+(?:\.\d+)?)", re.IGNORECASE)
+_STAGE = re.compile(r"^\d+\.\s*(.*)$")
+_DETAIL = re.compile(r"^(Date & Time|Interviewer|Participant)[^:]*:\s*(.*)$", re.IGNORECASE)
+_SKIPPED_BULLETS = ("section completeness self-check", "transcript reference")
+
+
+def _clean(text: str) -> str:
+    """Strip Markdown emphasis and surrounding whitespace."""
+    return re.sub(r"\*\*|__", "", text).strip()
+
+
+def _split_sections(markdown: str) -> List[Dict[str, Any]]:
+    """Split a report into sections at Markdown headings and bold-only heading lines."""
+    sections = [{"title": "", "level": 0, "parent": "", "lines": []}]
+    parents: Dict[int, str] = {}
+    for line in markdown.splitlines():
+        heading = _HEADING.match(line)
+        if heading:
+            level, title = len(heading.group(1)), _clean(heading.group(2))
+        else:
+            bold = _BOLD_HEADING.match(line)
+            if not bold or bold.group(1).strip().upper().startswith(("DO NOT", "IMPORTANT")):
+                sections[-1]["lines"].append(line)
+                continue
+            level, title = 2, _clean(bold.group(1))
+        parents = {lvl: name for lvl, name in parents.items() if lvl < level}
+        parent = parents[max(parents)] if parents else ""
+        parents[level] = title
+        sections.append({"title": title, "level": level, "parent": parent, "lines": []})
+    return sections
+
+
+def _bullets(lines: List[str]) -> List[str]:
+    """Top-level bullet texts, excluding quotes, transcript references and self-checks."""
+    items = []
+    for line in lines:
+        match = _BULLET.match(line)
+        if not match or match.group(1) or _QUOTE.match(line):
+            continue
+        text = _clean(match.group(2))
+        if text and not text.lower().startswith(_SKIPPED_BULLETS):
+            items.append(text)
+    return items
+
+
+def _paragraphs(lines: List[str]) -> List[str]:
+    """Plain prose lines (not bullets, quotes, rules or tables)."""
+    return [_clean(line) for line in lines
+            if line.strip() and not _BULLET.match(line) and not line.lstrip().startswith((">", "|", "---"))]
+
+
+def extract_report(markdown: str, transcript: str = "") -> Dict[str, Any]:
+    """
+    Parse an analysis report written from AnalysisTemplate.txt into a JSON-ready document.
+
+    The parser is deterministic and tolerant: sections it cannot find are left empty
+    rather than raising, so reports from customized templates still yield quotes and
+    section text.
+
+    Args:
+        markdown (str): The report content.
+        transcript (str): The transcript name (file stem) the report belongs to.
+    Returns:
+        Dict[str, Any]: Title, participants, quotes, ratings, recommendations, per-MCEM-stage findings and raw sections.
+    """
+    sections = _split_sections(markdown)
+    document: Dict[str, Any] = {
+        "schema_version": SCHEMA_VERSION,
+        "transcript": transcript,
+        "title": next((s["title"] for s in sections if s["level"] == 1), ""),
+        "interview_details": {},
+        "participants": [],
+        "quotes": [],
+        "ratings": [],
+        "recommendations": [],
+        "stages": [],
+        "sections": {},
+    }
+    speakers = []
+    for section in sections:
+        title, lines = section["title"], section["lines"]
+        lowered = title.lower()
+        if title:
+            document["sections"][title] = "\n".join(lines).strip()
+        section_quotes = []
+        for index, line in enumerate(lines):
+            quote = _QUOTE.match(line)
+            if not quote:
+                continue
+            context = ""
+            for following in lines[index + 1:index + 4]:
+                reference = _REFERENCE.search(following)
+                if reference:
+                    context = _clean(reference.group(1))
+                    break
+                if _QUOTE.match(following):
+                    break
+            speaker = _clean(quote.group("speaker") or "")
+            section_quotes.append({"section": title, "speaker": speaker, "text": quote.group("text").strip(), "context": context})
+            if speaker and speaker not in speakers:
+                speakers.append(speaker)
+        document["quotes"].extend(section_quotes)
+        if lowered.startswith("interview details"):
+            for item in _bullets(lines):
+                detail = _DETAIL.match(item)
+                if detail and detail.group(2):
+                    key = detail.group(1).lower().replace(" & ", "_and_").replace(" ", "_")
+                    document["interview_details"][key] = detail.group(2).strip()
+                    if key in ("interviewer", "participant"):
+                        document["participants"].append({"role": key, "description": detail.group(2).strip()})
+        elif "ratings" in lowered:
+            for line in lines:
+                bullet = _BULLET.match(line)
+                if not bullet or bullet.group(1):
+                    continue
+                text = _clean(bullet.group(2))
+                score = _SCORE.search(text)
+                if not score:
+                    continue
+                label = _clean(text.split(":", 1)[0]) if ":" in text[:score.start()] else ""
+                document["ratings"].append({"label": label, "score": float(score.group(1)), "scale": float(score.group(2)),
+                                            "text": text})
+        elif "recommendations" in lowered:
+            source = "customer" if "customer" in lowered else "analyst"
+            items = [q["text"] for q in section_quotes] + _bullets(lines)
+            document["recommendations"].extend({"source": source, "text": item} for item in items)
+        elif "mcem" in section["parent"].lower():
+            stage = _STAGE.match(title)
+            document["stages"].append({
+                "stage": stage.group(1) if stage else title,
+                "findings": _paragraphs(lines) + _bullets(lines),
+                "quotes": [q["text"] for q in section_quotes],
+            })
+    known = {p["description"].split("(")[0].split(",")[0].strip().lower() for p in document["participants"]}
+    document["participants"].extend({"role": "speaker", "description": s} for s in speakers if s.lower() not in known)
+    return document
+
+
+def save_report_json(md_file: Path) -> Optional[Path]:
+    """
+    Write <stem>.json next to a Markdown report.
+
+    Returns:
+        Optional[Path]: The JSON file, or None if the report could not be read.
+    """
+    md_file = Path(md_file)
+    try:
+        markdown = md_file.read_text(encoding="utf-8")
+    except OSError as e:
+        logging.error("Could not read report '%s' for JSON extraction: %s", md_file, e)
+        return None
+    transcript = md_file.stem[:-len("_analysis")] if md_file.stem.endswith("_analysis") else md_file.stem
+    json_file = md_file.with_suffix(".json")
+    json_file.write_text(json.dumps(extract_report(markdown, transcript), indent=2, ensure_ascii=False), encoding="utf-8")
+    logging.info("Structured report saved: %s", json_file)
+    return json_file
+
+
+def load_report_documents(reports_dir: Path) -> List[Dict[str, Any]]:
+    """
+    Structured documents for every report in reports_dir, sorted by name.
+
+    Reports without a current <stem>_analysis.json (e.g. written by an older version)
+    are parsed from their Markdown.
+    """
+    documents = []
+    for md_file in sorted(Path(reports_dir).glob("*_analysis.md")):
+        json_file = md_file.with_suffix(".json")
+        if json_file.exists() and json_file.stat().st_mtime_ns >= md_file.stat().st_mtime_ns:
+            documents.append(json.loads(json_file.read_text(encoding="utf-8")))
+        else:
+            documents.append(extract_report(md_file.read_text(encoding="utf-8"), md_file.stem[:-len("_analysis")]))
+    return documents
+
+
+def build_tables(documents: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Flatten structured documents into one row list per table, each row keyed by transcript."""
+    tables: Dict[str, List[Dict[str, Any]]] = {name: [] for name in TABLES}
+    for document in documents:
+        transcript = document.get("transcript", "")
+        for name in ("quotes", "ratings", "recommendations", "participants"):
+            tables[name].extend({"transcript": transcript, **row} for row in document.get(name, []))
+        for stage in document.get("stages", []):
+            tables["stage_findings"].extend({"transcript": transcript, "stage": stage["stage"], "finding": finding}
+                                            for finding in stage.get("findings", []))
+    return tables
+
+
+def export_corpus(reports_dir: Path, fmt: str = "parquet", output_dir: Optional[Path] = None) -> Dict[str, Path]:
+    """
+    Export every structured report in reports_dir to one columnar table per entity.
+
+    Tables are rebuilt from the per-report JSON files on each export, which takes
+    seconds even for large corpora and keeps re-processed transcripts from appearing
+    twice. Parquet needs pyarrow or fastparquet; without either, CSV is written instead.
+
+    Args:
+        reports_dir (Path): Directory containing <stem>_analysis.md/.json reports.
+        fmt (str): 'parquet' or 'csv'.
+        output_dir (Path): Where to write the tables (default: reports_dir/corpus).
+    Returns:
+        Dict[str, Path]: The written file per table name.
+    """
+    import pandas as pd
+
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format '{fmt}'; expected one of {', '.join(EXPORT_FORMATS)}.")
+    output_dir = Path(output_dir) if output_dir else Path(reports_dir) / EXPORT_DIR
+    output_dir.mkdir(parents=True, exist_ok=True)
+    documents = load_report_documents(reports_dir)
+    written = {}
+    for name, rows in build_tables(documents).items():
+        frame = pd.DataFrame(rows)
+        if fmt == "parquet":
+            try:
+                path = output_dir / f"{name}.parquet"
+                frame.to_parquet(path, index=False)
+                written[name] = path
+                continue
+            except ImportError:
+                logging.warning("No Parquet engine installed (pyarrow or fastparquet); exporting CSV instead.")
+                fmt = "csv"
+        path = output_dir / f"{name}.csv"
+        frame.to_csv(path, index=False)
+        written[name] = path
+    logging.info("Exported %d report(s) to %s tables in '%s'.", len(documents), fmt, output_dir)
+    return written
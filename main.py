@@ -32,10 +32,20 @@ import sys
 from pathlib import Path
 import logging
 
-from processing.batch_processing import process_all_transcripts
+from processing.batch_processing import process_all_transcripts, process_single_transcript
+from processing.transcript_processing import load_prompt_templates
+from service.job_api import JobManager, serve, DEFAULT_HOST, DEFAULT_PORT, DEFAULT_QUEUE_SIZE, DEFAULT_RETENTION_SECONDS, DEFAULT_WORKERS
+from processing.watch_mode import TranscriptWatcher, DEFAULT_POLL_INTERVAL, DEFAULT_DEBOUNCE_SECONDS
+from processing.token_budget import TokenBudget, BUDGET_HISTORY_FILE
+from processing.token_index import set_cache_dir, TOKEN_INDEX_DIR
+from conversion.structured_export import export_corpus, EXPORT_FORMATS
+from processing.search_index import SearchIndex, SEARCH_INDEX_FILE, DEFAULT_LIMIT, KINDS
+from processing.corpus_summary import build_corpus_summary
+from processing.work_distribution import JobQueue, JOB_QUEUE_FILE, DEFAULT_LEASE_SECONDS, default_worker_id, parse_shard
 from utils.config_utils import load_config
+from utils.settings import Settings
 from utils.env_utils import check_env_vars, check_pandoc_installed, setup_logging
-from utils.file_utils import ensure_reports_dir, get_client, load_analysis_template
+from utils.file_utils import discover_transcripts, ensure_reports_dir, get_client, load_analysis_template
 
 
 __version__ = "1.1.3"  # Version string for the application
@@ -67,13 +77,57 @@ def main():
     )
     parser.add_argument('--input', '-i', default=None, help='Input folder containing transcript .txt files (default: transcripts/)')
     parser.add_argument('--output', '-o', default=None, help='Output folder for reports (default: reports/)')
-    parser.add_argument('--template', '-t', default=None, help='Template file to use for analysis (default: from config or AnalysisTemplate.txt)')
+    parser.add_argument('--template', '-t', default=None, nargs='+', metavar='TEMPLATE',
+                        help=('Template file(s) to use for analysis (default: from config or AnalysisTemplate.txt). '
+                              'With several templates every transcript is analyzed with each of them concurrently and '
+                              'outputs are named <transcript>_<template>_analysis.*'))
     parser.add_argument('--log-level', default='STANDARD', choices=['STANDARD', 'DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
                         help=(
                             "Set the logging level. 'STANDARD' (default) shows process steps and transcript names; "
                             "'DEBUG'/'INFO' show more detail; 'ERROR' only shows errors."
                         ))
+    parser.add_argument('--shard', default=None, metavar='i/N',
+                        help="Only process this worker's deterministic share of the transcripts, e.g. '0/4' (0-based index)")
+    parser.add_argument('--queue', action='store_true',
+                        help='Claim transcripts from a lease-based job queue in the output folder, shared by all workers')
+    parser.add_argument('--worker-id', default=None, help='Worker name in the job queue (default: hostname-pid)')
+    parser.add_argument('--lease-seconds', type=int, default=DEFAULT_LEASE_SECONDS,
+                        help=f'Job queue lease duration; leases are renewed while a transcript is processed (default: {DEFAULT_LEASE_SECONDS})')
+    parser.add_argument('--concurrency', type=int, default=None,
+                        help='Number of transcripts processed at once (default: processing.max_concurrency in config, or 1)')
+    parser.add_argument('--priorities', default=None,
+                        help='YAML file mapping filename patterns to priorities, e.g. "*urgent*: 10" (higher runs first)')
+    parser.add_argument('--summary-only', action='store_true',
+                        help='Only (re)build the corpus summary from the reports already in the output folder')
+    parser.add_argument('--export', default=None, choices=EXPORT_FORMATS,
+                        help='Export the structured reports to columnar tables in <output>/corpus (default: processing.export_format in config)')
+    parser.add_argument('--search', default=None, metavar='QUERY',
+                        help='Search transcripts, reports and quotes in the full-text index and exit (FTS5 syntax, e.g. \'"deal registry" AND pricing\')')
+    parser.add_argument('--search-limit', type=int, default=DEFAULT_LIMIT, help=f'Maximum number of --search results (default: {DEFAULT_LIMIT})')
+    parser.add_argument('--search-kind', default=None, choices=KINDS, help='Only return --search results of this kind')
+    parser.add_argument('--watch', action='store_true',
+                        help='Stay running and process new or modified transcripts as they appear in the input folder')
+    parser.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL,
+                        help=f'Seconds between input folder scans in --watch mode (default: {DEFAULT_POLL_INTERVAL})')
+    parser.add_argument('--debounce', type=float, default=DEFAULT_DEBOUNCE_SECONDS,
+                        help=f'Seconds a file must stay unchanged before it is processed in --watch mode (default: {DEFAULT_DEBOUNCE_SECONDS})')
+    parser.add_argument('--serve', action='store_true',
+                        help='Run a local HTTP job API that accepts transcripts and serves the generated reports')
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f'Interface for --serve (default: {DEFAULT_HOST})')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port for --serve (default: {DEFAULT_PORT})')
+    parser.add_argument('--service-workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'Jobs processed concurrently by --serve (default: {DEFAULT_WORKERS})')
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE,
+                        help=f'Jobs that may wait in --serve before new submissions get HTTP 429 (default: {DEFAULT_QUEUE_SIZE})')
+    parser.add_argument('--job-retention', type=float, default=DEFAULT_RETENTION_SECONDS / 3600,
+                        help=f'Hours a finished --serve job and its files are kept (default: {DEFAULT_RETENTION_SECONDS / 3600:g})')
     args = parser.parse_args()
+    shard = None
+    if args.shard:
+        try:
+            shard = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
 
     # Set up STANDARD log level if selected
     STANDARD_LEVEL = 25
@@ -84,29 +138,114 @@ def main():
                 self._log(STANDARD_LEVEL, message, args, **kws)
         logging.Logger.standard = standard
 
-    setup_logging(level=args.log_level)  # Configure logging to stdout with user-selected level
-    logger = logging.getLogger()
     load_dotenv()  # Load .env first so env vars are available for config expansion
     config = load_config()  # Load YAML config with env var expansion
+    try:
+        # Resolved once from config, environment and CLI, then passed down the pipeline
+        settings = Settings.from_sources(config, args)
+    except ValueError as e:
+        setup_logging(level=args.log_level)
+        logging.error("Invalid settings: %s", e)
+        sys.exit(1)
+    setup_logging(level=args.log_level, log_file=settings.log_file)  # Queued logging to stdout (and optionally a JSON-lines file)
+    logger = logging.getLogger()
+    if args.search:
+        # Searching needs no Azure OpenAI access; the index is brought up to date first
+        output_dir = Path(settings.output_dir)
+        index = SearchIndex(output_dir / SEARCH_INDEX_FILE)
+        index.update(discover_transcripts(settings.input_dir, settings.recursive), output_dir)
+        hits = index.search(args.search, limit=args.search_limit, kind=args.search_kind)
+        if not hits:
+            print("No matches.")
+        for rank, hit in enumerate(hits, 1):
+            label = f" [{hit.label}]" if hit.label else ""
+            print(f"{rank}. {hit.source} ({hit.kind}){label}\n   {hit.snippet}")
+        return
     check_env_vars([
         "AZURE_OPENAI_API_KEY",
         "AZURE_OPENAI_API_VERSION",
         "AZURE_OPENAI_ENDPOINT",
         "AZURE_OPENAI_DEPLOYMENT"
     ])  # Ensure all required Azure OpenAI env vars are set
-    check_pandoc_installed()  # Ensure Pandoc is available for docx conversion
+    if settings.docx:
+        check_pandoc_installed()  # Ensure Pandoc is available for docx conversion
     client = get_client()  # Create Azure OpenAI client
 
     # Determine input/output/template from CLI or config
-    input_dir = args.input or config.get('processing', {}).get('input_dir', 'transcripts')
-    output_dir = args.output or config.get('processing', {}).get('output_dir', 'reports')
-    template_path = args.template or config.get('processing', {}).get('template_path', 'AnalysisTemplate.txt')
+    input_dir = settings.input_dir
+    output_dir = settings.output_dir
+    template_path = settings.template_path
 
     reports_dir = ensure_reports_dir(Path(output_dir))
     template = load_analysis_template(template_path)  # Load analysis template
+    templates = None
+    if len(settings.template_paths) > 1:
+        # Outputs are qualified with the template file name, so names must be unique
+        templates = {}
+        for path in settings.template_paths:
+            name = Path(path).stem
+            if name in templates:
+                logging.error("Template file name '%s' is given more than once; templates need distinct names.", name)
+                sys.exit(1)
+            templates[name] = template if path == template_path else load_analysis_template(path)
+    # Completion budget learns output sizes per template across runs
+    budget = TokenBudget.from_config(settings.config, history_path=Path(reports_dir) / BUDGET_HISTORY_FILE)
+    compaction = settings.compaction
+    if settings.token_index:
+        # Token counts and chunk boundaries of unchanged transcripts are reused across runs
+        set_cache_dir(Path(reports_dir) / TOKEN_INDEX_DIR)
+
+    if args.watch:
+        # Client, template, prompts and budget stay warm for every transcript
+        prompts = load_prompt_templates()
+
+        def handle(transcript_file):
+            process_single_transcript(client, template, reports_dir, transcript_file, template_path, budget, prompts=prompts,
+                                      compaction=compaction, settings=settings)
+            budget.save()
+
+        TranscriptWatcher(Path(input_dir), handle, poll_interval=args.poll_interval,
+                          debounce_seconds=args.debounce, reports_dir=Path(reports_dir)).run()
+        return
+
+    if args.serve:
+        # Every *Template*.txt next to the default template can be requested by name
+        templates = {Path(template_path).stem: template}
+        for path in sorted(Path(template_path).resolve().parent.glob("*Template*.txt")):
+            templates.setdefault(path.stem, load_analysis_template(str(path)))
+        prompts = load_prompt_templates()
+
+        def run_job(transcript_file, template_name):
+            ok = process_single_transcript(client, templates[template_name], transcript_file.parent, transcript_file,
+                                           template_name, budget, prompts=prompts, compaction=compaction, settings=settings)
+            budget.save()
+            return ok
+
+        manager = JobManager(run_job, Path(reports_dir) / "jobs", templates, Path(template_path).stem,
+                             queue_size=args.queue_size, workers=args.service_workers,
+                             retention_seconds=args.job_retention * 3600)
+        serve(manager, args.host, args.port)
+        return
+
+    job_queue = JobQueue(Path(reports_dir) / JOB_QUEUE_FILE, lease_seconds=args.lease_seconds) if args.queue else None
+    max_concurrency = settings.max_concurrency
+    search_index = None
+    if settings.search_index:
+        search_index = SearchIndex(Path(reports_dir) / SEARCH_INDEX_FILE)
 
-    # Process all transcripts in the input directory using the batch processor
-    process_all_transcripts(client, template, reports_dir, input_dir=input_dir, template_path=template_path)
+    if not args.summary_only:
+        # Process all transcripts in the input directory using the batch processor
+        process_all_transcripts(client, template, reports_dir, input_dir=input_dir, template_path=template_path, budget=budget,
+                                shard=shard, job_queue=job_queue, worker_id=args.worker_id or default_worker_id(),
+                                search_index=search_index, templates=templates, settings=settings)
+    if args.summary_only or (settings.summary_report and shard is None and job_queue is None):
+        # Sharded/queued workers only see part of the batch; build the summary once afterwards with --summary-only
+        build_corpus_summary(client, reports_dir, budget=budget, fan_in=settings.summary_fan_in, max_concurrency=max_concurrency,
+                             export_docx=settings.docx, deployment=settings.deployment,
+                             template_name=Path(template_path).stem if len(settings.template_paths) > 1 else None)
+        budget.save()
+    if settings.export_format:
+        export_corpus(Path(reports_dir), settings.export_format)
 
     logging.info("Step 3: LLM Self-Check & Validation - AI self-validation complete for all transcripts")
     logging.info("Step 4: Human Review & Approval - Please review the generated reports in '%s' for accuracy, context, and completeness before sharing.", output_dir)
@@ -1,9 +1,27 @@
+import itertools
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
 from conversion.output_conversion import convert_markdown_to_docx
-from processing.transcript_processing import process_transcript
-from utils.env_utils import show_progress_bar, STANDARD_LEVEL
+from conversion.structured_export import save_report_json
+from processing.transcript_processing import load_prompt_templates, load_transcript, process_transcript
+from processing.transcript_chunking import analyze_chunk, consolidate_results
+from processing.scheduler import WorkUnit, load_throughput, plan_batch, plan_windows, predict_makespan, save_throughput
+from processing.token_budget import TokenBudget
+from processing.transcript_compaction import CompactionOptions
+from processing.search_index import SearchIndex
+from processing.deduplication import find_duplicate_clusters, share_outputs, write_deduplication_report
+from processing.work_distribution import JobQueue, default_worker_id, select_shard
+from utils.env_utils import log_user_error, show_progress_bar, STANDARD_LEVEL
+from utils.file_utils import discover_transcripts, duplicate_names
+from utils.log_context import log_context
+from utils.progress_dashboard import ProgressDashboard
+from utils.run_summary import RunSummary, peak_rss_mb
+from utils.settings import Settings
 
 # Define STANDARD log level between INFO (20) and WARNING (30)
 if not hasattr(logging, 'STANDARD'):
@@ -14,7 +32,385 @@ if not hasattr(logging, 'STANDARD'):
     logging.Logger.standard = standard
 
 
-def process_all_transcripts(client, template: str, reports_dir: Path, input_dir: str = "./transcripts", template_path: str = None) -> None:
+def report_stem(transcript_file: Path, template_name: str = None) -> str:
+    """Filename prefix of a transcript's outputs; qualified with the template name when several templates are used."""
+    return f"{transcript_file.stem}_{template_name}" if template_name else transcript_file.stem
+
+
+def process_single_transcript(client, template: str, reports_dir: Path, transcript_file: Path, template_path: str = None, budget: TokenBudget = None,
+                              prompts: Dict[str, str] = None, compaction: CompactionOptions = None, summary: RunSummary = None,
+                              template_name: str = None, transcript_text: str = None, settings: Settings = None) -> bool:
+    """
+    Process one transcript file and save its Markdown, Word and validation outputs.
+
+    Args:
+        client: The Azure OpenAI client.
+        template (str): The analysis template content.
+        reports_dir (Path): The directory to save output reports.
+        transcript_file (Path): The transcript to analyze.
+        template_path (str): The path to the template file being used (for display in progress bar).
+        budget (TokenBudget): Shared completion-token budget.
+        prompts (Dict[str, str]): Preloaded prompt templates; read from prompts/ if not given.
+        compaction (CompactionOptions): Transcript compaction to apply before any LLM call.
+        summary (RunSummary): Collects run metrics.
+        template_name (str): If given, outputs are named <stem>_<template_name>_analysis.* (see report_stem).
+        transcript_text (str): Transcript already loaded and compacted by the caller.
+        settings (Settings): Runtime settings (validation policy, deployment, output formats).
+    Returns:
+        bool: True if a report was generated, False otherwise.
+    """
+    logger = logging.getLogger()
+    is_standard = logger.getEffectiveLevel() == STANDARD_LEVEL
+    template_display = template_path if template_path else (template[:40] + '...')
+    if is_standard:
+        show_progress_bar(0, transcript_name=transcript_file.name, extra=f"Template: {template_display}")
+        show_progress_bar(1, transcript_name=transcript_file.name)
+    else:
+        logger.standard("==============================")
+        logger.standard("Processing transcript: %s", transcript_file.name)
+        logger.standard("Step 0: Preparing Analysis - File: '%s', Template: '%s'", transcript_file.name, template_display)
+        logger.standard("Step 1: Transcript Collection - Loaded '%s'", transcript_file.name)
+    stem = report_stem(transcript_file, template_name)
+    # Delete old report files for this transcript
+    for ext in ["_analysis.md", "_analysis.docx", "_analysis.json", "_llm_validation.md"]:
+        old_report = reports_dir / f"{stem}{ext}"
+        if old_report.exists():
+            old_report.unlink()
+    # Step 1: Transcript Collection
+    md_output_file = reports_dir / f"{stem}_analysis.md"
+    docx_output_file = reports_dir / f"{stem}_analysis.docx"
+    # Step 2: Automated LLM Analysis
+    if is_standard:
+        show_progress_bar(2, transcript_name=transcript_file.name)
+    else:
+        logger.standard("Step 2: Automated LLM Analysis - Generating draft report...")
+    # Save LLM validation/feedback if available
+    feedback_file = reports_dir / f"{stem}_llm_validation.md"
+    report, _ = process_transcript(transcript_file, template, client, feedback_file, budget=budget, prompts=prompts,
+                                   compaction=compaction, summary=summary, transcript_text=transcript_text,
+                                   output_stem=stem if template_name else None, settings=settings)
+    if not report:
+        logging.error("Failed to generate report for '%s'.", transcript_file.name)
+        return False
+    md_output_file.write_text(report, encoding="utf-8")
+    logging.info("Draft report saved: %s", md_output_file)
+    # Step 4: Human Review & Approval
+    if is_standard:
+        show_progress_bar(4, transcript_name=transcript_file.name)
+    else:
+        logger.standard("Step 4: Human Review & Approval - Please review the generated reports in '%s' for accuracy, context, and completeness before sharing.", reports_dir)
+    # Step 5: Finalized, Shareable Report - Exporting to Word format...
+    if is_standard:
+        show_progress_bar(5, transcript_name=transcript_file.name + "\n")
+    else:
+        logger.standard("Step 5: Finalized, Shareable Report - Exporting to Word format...")
+    if settings is None or settings.docx:
+        convert_markdown_to_docx(md_output_file, docx_output_file, settings)
+        logging.info("Word report saved: %s", docx_output_file)
+    save_report_json(md_output_file)
+    return True
+
+
+class _TemplateLatency:
+    """Per-template wall time and report counts of a multi-template run."""
+
+    def __init__(self):
+        self._runs: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float, ok: bool = None) -> None:
+        """Add time spent on a template; ok is None for a chunk that did not finish its transcript."""
+        with self._lock:
+            runs = self._runs.setdefault(name, [0.0, 0, 0])
+            runs[0] += seconds
+            if ok is not None:
+                runs[1 if ok else 2] += 1
+
+    def report(self, summary: RunSummary, templates: Dict[str, str], budget: TokenBudget = None) -> None:
+        """Record latency and token usage per template in the run summary."""
+        for name, template in templates.items():
+            with self._lock:
+                seconds, done, failed = self._runs.get(name, [0.0, 0, 0])
+            line = f"{done} report(s), {failed} failed, {seconds / max(done + failed, 1):.1f}s per transcript"
+            if budget is not None:
+                usage = budget.usage(template)
+                line += (f", {usage['calls']} LLM calls, {usage['prompt_tokens']:,} prompt + "
+                         f"{usage['completion_tokens']:,} completion tokens")
+            summary.set(f"Template '{name}'", line)
+
+
+def _process_with_templates(client, templates: Dict[str, str], reports_dir: Path, transcript_file: Path, budget: TokenBudget,
+                            prompts: Dict[str, str], compaction: CompactionOptions, summary: RunSummary,
+                            latency: _TemplateLatency, settings: Settings = None) -> bool:
+    """
+    Analyze one transcript with every template concurrently.
+
+    The transcript is read and compacted once, and every template's prompts reuse
+    that text (and its cached token index).
+    """
+    text = load_transcript(transcript_file, compaction, summary)
+
+    def analyze(name: str) -> bool:
+        start = time.monotonic()
+        ok = False
+        with log_context(transcript=transcript_file.name, template=name):
+            try:
+                ok = process_single_transcript(client, templates[name], reports_dir, transcript_file, name, budget, prompts,
+                                               compaction, summary, template_name=name, transcript_text=text, settings=settings)
+            except SystemExit:
+                logging.error("Processing '%s' with template '%s' aborted.", transcript_file.name, name)
+            finally:
+                latency.record(name, time.monotonic() - start, ok)
+        return ok
+
+    with ThreadPoolExecutor(max_workers=len(templates), thread_name_prefix="template") as executor:
+        return all(list(executor.map(analyze, templates)))
+
+
+def _output_stems(transcript_file: Path, templates: Dict[str, str] = None) -> List[str]:
+    return [report_stem(transcript_file, name) for name in templates] if templates else [transcript_file.stem]
+
+
+class _ChunkedTranscript:
+    """Collects chunk analyses of a decomposed transcript (per template) until the last one arrives."""
+
+    def __init__(self, count: int, template_names: Iterable[str] = (None,)):
+        self.results: Dict[str, List[str]] = {name: [None] * count for name in template_names}
+        self.remaining = {name: count for name in self.results}
+        self.finished_by: Dict[str, int] = {}
+        self.written: Dict[str, bool] = {}
+        self.units_remaining = count
+        self.last_index = None
+        self.lock = threading.Lock()
+        self._text: Optional[str] = None
+        self._readers = 0
+
+    def chunk_text(self, unit: WorkUnit, load: Callable[[], str]) -> str:
+        """
+        Text of one chunk. The transcript is loaded when a chunk needs it and dropped as soon
+        as no concurrent chunk is cutting its part, so idle chunked transcripts hold no text.
+        """
+        with self.lock:
+            if self._text is None:
+                self._text = load()
+            self._readers += 1
+            text = self._text
+        try:
+            return unit.chunk_of(text)
+        finally:
+            with self.lock:
+                self._readers -= 1
+                if not self._readers:
+                    self._text = None
+
+    def add(self, index: int, result: str, template_name: str = None) -> bool:
+        """Store a chunk result; returns True for the template's last chunk."""
+        with self.lock:
+            self.results[template_name][index - 1] = result
+            self.remaining[template_name] -= 1
+            if self.remaining[template_name] == 0:
+                self.finished_by[template_name] = index
+            return self.remaining[template_name] == 0
+
+    def report_written(self, template_name: str, ok: bool) -> None:
+        """Record whether the template's consolidated report was saved."""
+        with self.lock:
+            self.written[template_name] = ok
+
+    @property
+    def succeeded(self) -> bool:
+        """Whether a consolidated report was saved for every template."""
+        with self.lock:
+            return all(self.written.get(name) for name in self.results)
+
+    def unit_done(self, index: int) -> None:
+        """Mark a chunk as analyzed with every template."""
+        with self.lock:
+            self.units_remaining -= 1
+            if self.units_remaining == 0:
+                self.last_index = index
+
+
+def _process_chunk(client, template: str, reports_dir: Path, unit: WorkUnit, chunked: _ChunkedTranscript, budget: TokenBudget,
+                   dashboard: ProgressDashboard = None, template_name: str = None, settings: Settings = None,
+                   chunk_text: str = None) -> bool:
+    """Analyze one chunk (chunk_text, cut from the transcript by the caller); the last chunk to finish consolidates and saves the report."""
+    name = unit.transcript_file.name
+    logging.info("Processing chunk %d of %d for '%s'", unit.chunk_index, unit.chunk_count, name)
+    try:
+        result = analyze_chunk(client, template, chunk_text, unit.chunk_index, unit.chunk_count, budget, settings.deployment)
+    except Exception as e:
+        logging.error("Error processing chunk %d of '%s': %s", unit.chunk_index, name, e)
+        result = None
+    if not chunked.add(unit.chunk_index, result, template_name):
+        return result is not None
+    chunked.report_written(template_name, False)
+    results = [r for r in chunked.results[template_name] if r is not None]
+    if not results:
+        logging.error("Failed to generate report for '%s'.", name)
+        return False
+    if dashboard is not None:
+        dashboard.update(_unit_label(unit), "Consolidating chunks")
+    report = consolidate_results(client, template, results, budget, settings.deployment) if len(results) > 1 else results[0]
+    stem = report_stem(unit.transcript_file, template_name)
+    md_output_file = reports_dir / f"{stem}_analysis.md"
+    md_output_file.write_text(report, encoding="utf-8")
+    logging.info("Chunked report saved: %s", md_output_file)
+    convert_markdown_to_docx(md_output_file, reports_dir / f"{stem}_analysis.docx", settings)
+    save_report_json(md_output_file)
+    chunked.report_written(template_name, True)
+    return True
+
+
+def _process_chunk_with_templates(client, templates: Dict[str, str], reports_dir: Path, unit: WorkUnit, chunked: _ChunkedTranscript,
+                                  budget: TokenBudget, dashboard: ProgressDashboard, latency: _TemplateLatency,
+                                  settings: Settings = None, chunk_text: str = None) -> bool:
+    """Analyze one chunk with every template concurrently."""
+
+    def analyze(name: str) -> bool:
+        start = time.monotonic()
+        with log_context(transcript=unit.transcript_file.name, template=name):
+            ok = _process_chunk(client, templates[name], reports_dir, unit, chunked, budget, dashboard, template_name=name,
+                                settings=settings, chunk_text=chunk_text)
+        finished = chunked.finished_by.get(name) == unit.chunk_index
+        latency.record(name, time.monotonic() - start, ok if finished else None)
+        return ok
+
+    with ThreadPoolExecutor(max_workers=len(templates), thread_name_prefix="template") as executor:
+        return all(list(executor.map(analyze, templates)))
+
+
+def _unit_label(unit: WorkUnit) -> str:
+    name = unit.transcript_file.name
+    return f"{name} [chunk {unit.chunk_index}/{unit.chunk_count}]" if unit.is_chunk else name
+
+
+def _run_schedule(client, template: str, reports_dir: Path, units: Iterable[WorkUnit], template_path: str, budget: TokenBudget,
+                  prompts: Dict[str, str], max_concurrency: int, summary: RunSummary, compaction: CompactionOptions = None,
+                  search_index: SearchIndex = None, templates: Dict[str, str] = None, latency: _TemplateLatency = None,
+                  settings: Settings = None, window: int = None) -> None:
+    """
+    Run planned work units on a thread pool in plan order, showing batch progress,
+    and record predicted vs actual makespan.
+
+    The prediction is made before any unit starts, from a fully planned batch and the
+    throughput (worker seconds per token) saved by the previous batch in reports_dir;
+    this batch's throughput is saved for the next one.
+
+    Units are pulled from the plan only as in-flight slots free up (at most window,
+    default twice the concurrency), so a lazily planned batch is never read ahead, and
+    finished units leave nothing behind but their counts.
+    With several templates, each unit is analyzed with all of them concurrently.
+    """
+    chunked = {}
+    # Transcripts processed and failed; a chunked transcript counts once, when its last chunk is done,
+    # as processed only if its consolidated report was saved
+    outcomes = [0, 0]
+    errors = []
+    chunk_budget = budget or TokenBudget()
+    busy_seconds = [0.0]
+    busy_lock = threading.Lock()
+    in_flight = threading.BoundedSemaphore(max(window or 2 * max_concurrency, max_concurrency))
+
+    dashboard = ProgressDashboard(total=0)
+
+    def run(unit: WorkUnit) -> bool:
+        # Pool threads do not inherit the log context, so each unit sets its own
+        try:
+            with log_context(transcript=unit.transcript_file.name):
+                return run_unit(unit)
+        finally:
+            in_flight.release()
+
+    def run_unit(unit: WorkUnit) -> bool:
+        start = time.monotonic()
+        label = _unit_label(unit)
+        dashboard.begin(label, "Analyzing chunk" if unit.is_chunk else "Starting")
+        ok = False
+        try:
+            if unit.is_chunk:
+                chunk_text = chunked[unit.transcript_file].chunk_text(unit, lambda: load_transcript(unit.transcript_file, compaction))
+            if unit.is_chunk and templates:
+                ok = _process_chunk_with_templates(client, templates, reports_dir, unit, chunked[unit.transcript_file], chunk_budget,
+                                                   dashboard, latency, settings, chunk_text)
+            elif unit.is_chunk:
+                ok = _process_chunk(client, template, reports_dir, unit, chunked[unit.transcript_file], chunk_budget, dashboard,
+                                    settings=settings, chunk_text=chunk_text)
+            elif templates:
+                ok = _process_with_templates(client, templates, reports_dir, unit.transcript_file, budget, prompts, compaction,
+                                             summary, latency, settings)
+            else:
+                ok = process_single_transcript(client, template, reports_dir, unit.transcript_file, template_path, budget, prompts,
+                                               compaction, summary, settings=settings)
+            if ok and search_index is not None:
+                search_index.index_outputs(unit.transcript_file, reports_dir, _output_stems(unit.transcript_file, templates))
+            return ok
+        except SystemExit:
+            # User-facing errors for one transcript must not take down the other workers
+            logging.error("Processing '%s' aborted.", unit.transcript_file.name)
+            return False
+        finally:
+            with busy_lock:
+                busy_seconds[0] += time.monotonic() - start
+            if unit.is_chunk:
+                chunked[unit.transcript_file].unit_done(unit.chunk_index)
+            finished = not unit.is_chunk or chunked[unit.transcript_file].last_index == unit.chunk_index
+            if unit.is_chunk and finished:
+                # Every template's last chunk has consolidated (or failed) by now
+                ok = chunked[unit.transcript_file].succeeded
+            dashboard.end(label, unit.tokens, ok if finished else None)
+            with busy_lock:
+                if unit.is_chunk and finished:
+                    del chunked[unit.transcript_file]
+                if finished:
+                    outcomes[0 if ok else 1] += 1
+
+    def register(unit: WorkUnit) -> None:
+        if not unit.is_chunk:
+            dashboard.extend(1, unit.tokens)
+            return
+        dashboard.extend(0, unit.tokens)
+        if unit.transcript_file in chunked:
+            return
+        dashboard.extend(1)
+        chunked[unit.transcript_file] = _ChunkedTranscript(unit.chunk_count, list(templates) if templates else (None,))
+        for stem in _output_stems(unit.transcript_file, templates):
+            for ext in ["_analysis.md", "_analysis.docx", "_analysis.json", "_llm_validation.md"]:
+                old_report = reports_dir / f"{stem}{ext}"
+                if old_report.exists():
+                    old_report.unlink()
+
+    def collect(future) -> None:
+        if future.exception() is not None:
+            errors.append(future.exception())
+
+    seconds_per_token = load_throughput(reports_dir)
+    if seconds_per_token is not None and isinstance(units, list):
+        # A windowed plan is not known up front, so it gets no prediction
+        summary.set("Predicted makespan (s)", predict_makespan([unit.tokens for unit in units], max_concurrency) * seconds_per_token)
+    total_tokens = 0
+    start = time.monotonic()
+    with dashboard, ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="transcript") as executor:
+        for unit in units:
+            in_flight.acquire()
+            register(unit)
+            total_tokens += unit.tokens
+            executor.submit(run, unit).add_done_callback(collect)
+    if errors:
+        raise errors[0]
+    actual = time.monotonic() - start
+    summary.set("Workers", max_concurrency)
+    summary.add("Transcripts processed", outcomes[0])
+    summary.add("Transcripts failed", outcomes[1])
+    summary.set("Actual makespan (s)", actual)
+    if total_tokens and busy_seconds[0]:
+        save_throughput(reports_dir, busy_seconds[0] / total_tokens)
+
+
+def process_all_transcripts(client, template: str, reports_dir: Path, input_dir: str = "./transcripts", template_path: str = None, budget: TokenBudget = None,
+                            shard: Tuple[int, int] = None, job_queue: JobQueue = None, worker_id: str = None,
+                            summary: RunSummary = None, search_index: SearchIndex = None,
+                            templates: Dict[str, str] = None, settings: Settings = None) -> None:
     """
     Process all transcript files in the specified transcripts directory.
 
@@ -22,64 +418,140 @@ def process_all_transcripts(client, template: str, reports_dir: Path, input_dir:
     transcript using the provided Azure OpenAI client and template, and saves the analysis
     in both Markdown and Word document formats in the reports directory.
 
+    Transcripts are token-counted up front and started longest first (within any filename
+    priorities) on up to settings.max_concurrency threads; transcripts above settings.chunk_size
+    tokens are split so their chunk calls interleave with smaller transcripts.
+
+    Several workers can share one input/output directory: with a shard, each worker only
+    takes its own deterministic subset of files; with a job queue, workers claim files
+    dynamically under expiring leases until nothing is left.
+
+    With settings.deduplication, near-duplicate transcripts (e.g. the same meeting exported twice)
+    are detected across the whole input directory before any LLM call; only one
+    representative per cluster is analyzed and its reports are copied to the others.
+
+    With several templates, every transcript is analyzed with all of them concurrently;
+    loading, compaction and token counting are shared, outputs are named
+    <stem>_<template>_analysis.*, and latency and token usage are reported per template.
+
+    Planned work holds no transcript text: each transcript is read when its work starts,
+    and at most a window of units is in flight. With settings.ingestion_window, files are
+    also discovered lazily (optionally recursively) and planned one window at a time
+    instead of listing and ordering the whole directory up front; deduplication, shards
+    and the job queue still need the full listing. Peak RSS is reported in the run summary.
+
     Args:
         client: The Azure OpenAI client.
         template (str): The analysis template content.
         reports_dir (Path): The directory to save output reports.
         input_dir (str): The directory containing input transcript files.
         template_path (str): The path to the template file being used (for display in progress bar).
+        budget (TokenBudget): Shared completion-token budget; learned output sizes are saved after the batch.
+        shard (Tuple[int, int]): Optional (index, count) selecting this worker's subset of files.
+        job_queue (JobQueue): Optional shared lease-based queue to claim files from.
+        worker_id (str): Identifier of this worker in the job queue.
+        summary (RunSummary): Collects run metrics; logged at the end of the batch.
+        search_index (SearchIndex): Optional full-text index, updated as each report is written.
+        templates (Dict[str, str]): Optional template name -> content to analyze every transcript with,
+            instead of the single template.
+        settings (Settings): Runtime settings: concurrency, priorities, chunk size, compaction, deduplication,
+            ingestion, validation policy, deployment and output formats. The defaults (and the
+            environment) are used if not given.
     """
-    from time import sleep
-    transcript_files = list(Path(input_dir).glob("*.txt"))
-    if not transcript_files:
+    if settings is None:
+        settings = Settings.from_sources(None)
+    max_concurrency = settings.max_concurrency
+    compaction = settings.compaction
+    deduplication = settings.deduplication
+    recursive = settings.recursive
+    window = settings.ingestion_window
+    lazy = window is not None and deduplication is None and shard is None and job_queue is None
+    if recursive:
+        # Outputs and queue jobs are named after the file, so a name may only occur once in the tree
+        clashes = duplicate_names(input_dir, recursive)
+        if clashes:
+            listed = "; ".join(", ".join(str(path) for path in paths) for paths in list(clashes.values())[:5])
+            log_user_error(f"{len(clashes)} transcript file name(s) occur in several subdirectories of '{input_dir}' "
+                           f"and would overwrite each other's reports: {listed}. Rename them before processing.")
+    discovered = discover_transcripts(input_dir, recursive)
+    first = next(discovered, None)
+    if first is None:
         logging.warning("No .txt transcript files found in '%s'.", input_dir)
         return
-    for transcript_file in transcript_files:
-        logger = logging.getLogger()
-        is_standard = logger.getEffectiveLevel() == STANDARD_LEVEL
-        template_display = template_path if template_path else (template[:40] + '...')
-        if is_standard:
-            show_progress_bar(0, transcript_name=transcript_file.name, extra=f"Template: {template_display}")
-            show_progress_bar(1, transcript_name=transcript_file.name)
-        else:
-            logger.standard("==============================")
-            logger.standard("Processing transcript: %s", transcript_file.name)
-            logger.standard("Step 0: Preparing Analysis - File: '%s', Template: '%s'", transcript_file.name, template_display)
-            logger.standard("Step 1: Transcript Collection - Loaded '%s'", transcript_file.name)
-        # Delete old report files for this transcript
-        for ext in ["_analysis.md", "_analysis.docx", "_llm_validation.md"]:
-            old_report = reports_dir / f"{transcript_file.stem}{ext}"
-            if old_report.exists():
-                old_report.unlink()
-        # Step 1: Transcript Collection
-        md_output_file = reports_dir / f"{transcript_file.stem}_analysis.md"
-        docx_output_file = reports_dir / f"{transcript_file.stem}_analysis.docx"
-        # Step 2: Automated LLM Analysis
-        if is_standard:
-            show_progress_bar(2, transcript_name=transcript_file.name)
-        else:
-            logger.standard("Step 2: Automated LLM Analysis - Generating draft report...")
-        # Save LLM validation/feedback if available
-        feedback_file = reports_dir / f"{transcript_file.stem}_llm_validation.md"
-        report, _ = process_transcript(transcript_file, template, client, feedback_file)
-        if report:
-            md_output_file.write_text(report, encoding="utf-8")
-            logging.info("Draft report saved: %s", md_output_file)
-            # Step 4: Human Review & Approval
-            if is_standard:
-                show_progress_bar(4, transcript_name=transcript_file.name)
-            else:
-                logger.standard("Step 4: Human Review & Approval - Please review the generated reports in '%s' for accuracy, context, and completeness before sharing.", reports_dir)
-            # Step 5: Finalized, Shareable Report - Exporting to Word format...
-            if is_standard:
-                show_progress_bar(5, transcript_name=transcript_file.name + "\n")
-            else:
-                logger.standard("Step 5: Finalized, Shareable Report - Exporting to Word format...")
-            convert_markdown_to_docx(md_output_file, docx_output_file)
-            logging.info("Word report saved: %s", docx_output_file)
-        else:
-            logging.error("Failed to generate report for '%s'.", transcript_file.name)
-    if is_standard:
+    discovered = itertools.chain([first], discovered)
+    transcript_files = discovered if lazy else list(discovered)
+    all_files = transcript_files
+    prompts = load_prompt_templates()  # Read once for the whole batch
+    if summary is None:
+        summary = RunSummary()
+    latency = _TemplateLatency() if templates else None
+    clusters = []
+    if deduplication is not None:
+        # Clustered over the whole directory so every shard/queue worker agrees on the representatives
+        clusters = find_duplicate_clusters(transcript_files, deduplication.threshold)
+        duplicates = {path for cluster in clusters for path, _ in cluster.duplicates}
+        transcript_files = [f for f in transcript_files if f not in duplicates]
+        write_deduplication_report(clusters, reports_dir, deduplication.threshold)
+        summary.set("Near-duplicate transcripts skipped", len(duplicates))
+        if duplicates:
+            logging.info("Skipping %d near-duplicate transcript(s) in %d cluster(s).", len(duplicates), len(clusters))
+    if shard is not None:
+        transcript_files = select_shard(transcript_files, *shard)
+        logging.info("Shard %d/%d: %d transcript(s) assigned to this worker.", shard[0], shard[1], len(transcript_files))
+    if job_queue is not None:
+        worker_id = worker_id or default_worker_id()
+        job_queue.enqueue(transcript_files)
+        files_by_name = {f.name: f for f in transcript_files}
+        while True:
+            name = job_queue.claim(worker_id)
+            if name is None:
+                break
+            if name not in files_by_name:
+                # Queued by another worker but no longer on disk
+                job_queue.release(name, worker_id, failed=True)
+                continue
+            with job_queue.lease(name, worker_id), log_context(transcript=name):
+                try:
+                    if templates:
+                        ok = _process_with_templates(client, templates, reports_dir, files_by_name[name], budget, prompts, compaction,
+                                                     summary, latency, settings)
+                    else:
+                        ok = process_single_transcript(client, template, reports_dir, files_by_name[name], template_path, budget,
+                                                       prompts, compaction, summary, settings=settings)
+                except SystemExit:
+                    # A user-facing error fails this job; other workers claiming it would only hit it again
+                    logging.error("Processing '%s' aborted.", name)
+                    job_queue.release(name, worker_id, failed=True)
+                    continue
+                if not ok:
+                    # Failures are usually transient API errors; the job is retried until max_attempts
+                    job_queue.release(name, worker_id)
+                elif search_index is not None:
+                    search_index.index_outputs(files_by_name[name], reports_dir, _output_stems(files_by_name[name], templates))
+        logging.info("Job queue status: %s", job_queue.counts())
+    else:
+        plan = {"priorities": dict(settings.priorities), "chunk_tokens": settings.chunk_size, "compaction": compaction}
+        units = plan_windows(transcript_files, window, **plan) if lazy else plan_batch(transcript_files, **plan)
+        _run_schedule(client, template, reports_dir, units, template_path, budget, prompts, max_concurrency, summary, compaction,
+                      search_index, templates, latency, settings, window)
+    processed = set(transcript_files)
+    for cluster in clusters:
+        if cluster.representative in processed:
+            share_outputs(cluster, reports_dir, deduplication.link, list(templates) if templates else None)
+    if search_index is not None:
+        # Picks up copied duplicate reports and drops files that no longer exist
+        search_index.update(discover_transcripts(input_dir, recursive) if lazy else all_files, reports_dir)
+    if latency is not None:
+        latency.report(summary, templates, budget)
+    if budget is not None:
+        budget.save()
+        budget.policy.report(summary)
+    peak_rss = peak_rss_mb()
+    if peak_rss is not None:
+        summary.set("Peak RSS (MB)", peak_rss)
+    summary.log()
+    logger = logging.getLogger()
+    if logger.getEffectiveLevel() == STANDARD_LEVEL:
         show_progress_bar(5, extra="All transcripts processed. Review reports for human approval and sharing.\n")
         logging.info("All transcripts processed. Review reports for human approval and sharing.\n")
     else:
@@ -0,0 +1,172 @@
+"""Local scoring of initial report candidates: quote coverage, template sections and tables"""
+import re
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+CANDIDATE_MODES = ("parallel", "n")
+DEFAULT_CANDIDATE_TEMPERATURE = 0.7
+MIN_QUOTE_CHARS = 12
+MAX_HEADING_WORDS = 8
+
+# Weights of the combined score (each component is in [0, 1])
+WEIGHTS = {"sections": 0.4, "quote_coverage": 0.3, "quote_accuracy": 0.2, "tables": 0.1}
+
+_QUOTE = re.compile(rf"[\"“]([^\"“”\n]{{{MIN_QUOTE_CHARS},}}?)[\"”]")
+_HEADING = re.compile(r"^\s*(?:#{1,6}\s+(.+?)\s*#*|\*\*([^*]+?)\*\*:?)\s*$", re.MULTILINE)
+_PLACEHOLDER = re.compile(r"\[[^\]]*\]|\([^)]*\)")
+_TABLE_SEPARATOR = re.compile(r"^\s*\|?\s*:?-{3,}:?\s*(?:\|\s*:?-{3,}:?\s*)+\|?\s*$", re.MULTILINE)
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def _words(text: str) -> str:
+    """Lower-case words separated by single spaces (punctuation and markdown dropped)."""
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+
+@dataclass(frozen=True)
+class CandidateOptions:
+    """
+    Initial report candidates generated before validation.
+
+    count: Candidates per report; 1 generates a single report as before.
+    mode: 'parallel' sends count concurrent requests; 'n' sends one request with n=count
+        (one prompt billed, for deployments that support n).
+    temperature: Sampling temperature of candidate requests, so candidates differ.
+    """
+    count: int = 1
+    mode: str = "parallel"
+    temperature: float = DEFAULT_CANDIDATE_TEMPERATURE
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "CandidateOptions":
+        """
+        Build options from the 'processing.candidates' section of config.yaml.
+
+        Raises:
+            ValueError: If count is below 1 or mode is unknown.
+        """
+        section = ((config or {}).get("processing", {}) or {}).get("candidates") or {}
+        count = int(section.get("count", 1))
+        mode = str(section.get("mode", "parallel"))
+        if count < 1:
+            raise ValueError("processing.candidates.count must be at least 1.")
+        if mode not in CANDIDATE_MODES:
+            raise ValueError(f"processing.candidates.mode must be one of {list(CANDIDATE_MODES)}.")
+        return cls(count=count, mode=mode, temperature=float(section.get("temperature", DEFAULT_CANDIDATE_TEMPERATURE)))
+
+
+def template_sections(template: str) -> List[str]:
+    """
+    Section names of an analysis template: markdown headings and bold-only lines.
+
+    Placeholders ("[Participant Name]") are dropped; comment-style lines (sentences,
+    "Last updated: ...") are not sections.
+    """
+    sections = []
+    for match in _HEADING.finditer(template):
+        heading = (match.group(1) or match.group(2)).strip()
+        if heading.endswith((".", ":")) or ": " in heading or not heading[:1].isalnum():
+            continue
+        words = _words(_PLACEHOLDER.sub(" ", heading))
+        if words and len(words.split()) <= MAX_HEADING_WORDS and words not in sections:
+            sections.append(words)
+    return sections
+
+
+class TranscriptQuotes:
+    """Verbatim-quote lookup in one transcript (built once, shared by all candidates)."""
+
+    def __init__(self, transcript: str):
+        lines = [_words(line) for line in transcript.splitlines()]
+        self.lines = [line for line in lines if line]
+        self._starts = []
+        position = 1
+        for line in self.lines:
+            self._starts.append(position)
+            position += len(line) + 1
+        # Padded so that quotes only match whole words
+        self.text = " " + " ".join(self.lines) + " "
+
+    def line_of(self, quote: str) -> Optional[int]:
+        """Transcript line where a quote starts, or None if it is not in the transcript."""
+        words = _words(quote)
+        position = self.text.find(f" {words} ") if words else -1
+        return bisect_right(self._starts, position + 1) - 1 if position >= 0 else None
+
+
+@dataclass(frozen=True)
+class CandidateScore:
+    """
+    How well a candidate report covers the transcript and template.
+
+    quote_coverage: Share of transcript lines (speaker turns) quoted verbatim.
+    quote_accuracy: Share of the report's quotes found verbatim in the transcript (1.0 without quotes).
+    sections: Share of template sections present in the report.
+    tables: 1.0 if the report has a markdown table or the template has none.
+    """
+    quote_coverage: float
+    quote_accuracy: float
+    sections: float
+    tables: float
+    quotes: int = 0
+
+    @property
+    def total(self) -> float:
+        return sum(weight * getattr(self, name) for name, weight in WEIGHTS.items())
+
+
+def score_candidate(report: str, quotes: TranscriptQuotes, sections: List[str], template_has_tables: bool) -> CandidateScore:
+    """
+    Score one candidate report.
+
+    Args:
+        report (str): The candidate report.
+        quotes (TranscriptQuotes): The transcript being analyzed.
+        sections (List[str]): Template sections (see template_sections).
+        template_has_tables (bool): Whether the template asks for tables.
+    Returns:
+        CandidateScore: The component scores.
+    """
+    report_quotes = _QUOTE.findall(report)
+    found = [line for line in map(quotes.line_of, report_quotes) if line is not None]
+    quoted_lines = set(found)
+    verified = len(found)
+    report_words = _words(report)
+    present = sum(1 for section in sections if section in report_words)
+    return CandidateScore(
+        quote_coverage=len(quoted_lines) / len(quotes.lines) if quotes.lines else 0.0,
+        quote_accuracy=verified / len(report_quotes) if report_quotes else 1.0,
+        sections=present / len(sections) if sections else 1.0,
+        tables=1.0 if _TABLE_SEPARATOR.search(report) or not template_has_tables else 0.0,
+        quotes=len(report_quotes),
+    )
+
+
+def rank_candidates(candidates: List[str], transcript: str, template: str) -> Tuple[int, List[CandidateScore]]:
+    """
+    Score candidates against the transcript and template.
+
+    Returns:
+        Tuple[int, List[CandidateScore]]: Index of the best candidate (the first on ties) and every score.
+    """
+    quotes = TranscriptQuotes(transcript)
+    sections = template_sections(template)
+    has_tables = bool(_TABLE_SEPARATOR.search(template))
+    scores = [score_candidate(candidate, quotes, sections, has_tables) for candidate in candidates]
+    best = max(range(len(scores)), key=lambda i: (scores[i].total, -i))
+    return best, scores
+
+
+def scores_markdown(scores: List[CandidateScore], chosen: int) -> str:
+    """Candidate scores as a markdown section for the validation feedback file."""
+    lines = [
+        "### Initial Candidates",
+        "| Candidate | Score | Quote coverage | Quote accuracy | Sections | Tables | Quotes |",
+        "|-----------|-------|----------------|----------------|----------|--------|--------|",
+    ]
+    for i, score in enumerate(scores):
+        label = f"{i + 1} (selected)" if i == chosen else str(i + 1)
+        lines.append(f"| {label} | {score.total:.3f} | {score.quote_coverage:.1%} | {score.quote_accuracy:.1%} | "
+                     f"{score.sections:.1%} | {'yes' if score.tables else 'no'} | {score.quotes} |")
+    return "\n".join(lines) + "\n\n"
@@ -0,0 +1,205 @@
+"""Corpus-level summary built by cached hierarchical reduction of per-transcript reports"""
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from conversion.output_conversion import convert_markdown_to_docx
+from processing.deduplication import read_duplicates
+from processing.token_budget import TokenBudget, create_completion, template_key
+from utils.file_utils import count_tokens
+
+DEFAULT_FAN_IN = 8
+SUMMARY_FILE = "corpus_summary.md"
+SUMMARY_CACHE_DIR = ".summary_cache"
+SUMMARY_SYSTEM_PROMPT = "You are an expert business analyst synthesizing findings across many customer interviews."
+
+
+def _digest(*parts: str) -> str:
+    sha = hashlib.sha256()
+    for part in parts:
+        sha.update(part.encode("utf-8"))
+        sha.update(b"\0")
+    return sha.hexdigest()
+
+
+def load_summary_prompt(prompts_dir: Path = None) -> str:
+    """Load the corpus summary prompt template from prompts/corpus_summary.txt."""
+    if prompts_dir is None:
+        prompts_dir = Path(__file__).resolve().parent.parent / 'prompts'
+    return (prompts_dir / 'corpus_summary.txt').read_text(encoding='utf-8')
+
+
+def collect_reports(reports_dir: Path, template_name: str = None) -> List[Tuple[str, str]]:
+    """
+    Collect one report per transcript in a stable order.
+
+    Reports copied to near-duplicate transcripts (see the deduplication report) are
+    skipped, so each interview is counted once.
+
+    Args:
+        reports_dir (Path): Directory containing the reports.
+        template_name (str): In a multi-template run, only <stem>_<template_name>_analysis.md reports are collected.
+    Returns:
+        List[Tuple[str, str]]: (transcript stem, Markdown content) pairs sorted by name.
+    """
+    suffix = f"_{template_name}_analysis.md" if template_name else "_analysis.md"
+    duplicates = {Path(name).stem for name in read_duplicates(reports_dir)}
+    reports = []
+    for path in sorted(Path(reports_dir).glob(f"*{suffix}")):
+        stem = path.name[:-len(suffix)]
+        if stem not in duplicates:
+            reports.append((stem, path.read_text(encoding="utf-8")))
+    return reports
+
+
+class CorpusSummarizer:
+    """
+    Reduce per-transcript reports to one summary through a tree of LLM calls.
+
+    Each internal node summarizes at most fan_in children, and no more than fit in
+    the context window next to the expected summary, and is cached on disk under
+    the hash of the prompt and its children's hashes. Children are grouped in sorted
+    order, so when one report changes (without changing group boundaries) only the
+    nodes on the path from that leaf to the root are recomputed. A summary left
+    alone in its group is passed up unchanged rather than summarized again.
+    """
+
+    def __init__(self, client, budget: TokenBudget, prompt_template: str, cache_dir: Path,
+                 fan_in: int = DEFAULT_FAN_IN, max_concurrency: int = 1, deployment: str = None):
+        if fan_in < 2:
+            raise ValueError("fan_in must be at least 2")
+        self.client = client
+        self.budget = budget
+        self.prompt_template = prompt_template
+        self.cache_dir = Path(cache_dir)
+        self.fan_in = fan_in
+        self.max_concurrency = max_concurrency
+        self.deployment = deployment
+        self.calls = 0
+        self.cache_hits = 0
+        self.key = template_key(prompt_template, "corpus_summary")
+
+    def _child_limit(self) -> int:
+        """Prompt tokens left for the children once the prompt template and the expected summary are reserved."""
+        overhead = len((SUMMARY_SYSTEM_PROMPT + self.prompt_template).encode("utf-8"))
+        return self.budget.available(overhead) - self.budget.desired_tokens(self.key)
+
+    def _groups(self, level: List[Tuple[str, str, str]]) -> List[List[Tuple[str, str, str]]]:
+        """Split a level into consecutive groups of at most fan_in children that fit the prompt budget."""
+        limit = self._child_limit()
+        groups, group, used = [], [], 0
+        for child in level:
+            label, _, text = child
+            framing = len(f"=== {label} ===\n\n\n".encode("utf-8"))
+            # The UTF-8 byte length bounds the token count, so only large texts are tokenized
+            size = len(text.encode("utf-8"))
+            if size * self.fan_in > limit:
+                size = count_tokens(text)
+            size += framing
+            if group and (len(group) == self.fan_in or used + size > limit):
+                groups.append(group)
+                group, used = [], 0
+            if size > limit:
+                logging.warning("'%s' alone exceeds the corpus summary prompt budget; its summary may be truncated.", label)
+            group.append(child)
+            used += size
+        if group:
+            groups.append(group)
+        return groups
+
+    def _reduce(self, children: List[Tuple[str, str, str]]) -> Tuple[str, str, str]:
+        """Summarize (label, hash, text) children into one node, using the cache when possible."""
+        node_hash = _digest(self.prompt_template, *(child_hash for _, child_hash, _ in children))
+        label = children[0][0] if len(children) == 1 else f"{children[0][0]} .. {children[-1][0]}"
+        cache_file = self.cache_dir / f"{node_hash}.md"
+        if cache_file.exists():
+            self.cache_hits += 1
+            return label, node_hash, cache_file.read_text(encoding="utf-8")
+        reports = "\n\n".join(f"=== {child_label} ===\n{text}" for child_label, _, text in children)
+        prompt = self.prompt_template.format(count=len(children), reports=reports)
+        response = create_completion(
+            self.client,
+            [
+                {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            self.budget,
+            key=self.key,
+            model=self.deployment,
+            temperature=0.3
+        )
+        text = response.choices[0].message.content
+        self.calls += 1
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix(".tmp")
+        tmp_file.write_text(text, encoding="utf-8")
+        os.replace(tmp_file, cache_file)
+        return label, node_hash, text
+
+    def summarize(self, reports: List[Tuple[str, str]]) -> Optional[str]:
+        """
+        Build the summary for the given (name, Markdown) reports.
+
+        Returns:
+            Optional[str]: The corpus summary, or None if there are no reports.
+        """
+        if not reports:
+            return None
+        level = [(name, _digest(text), text) for name, text in reports]
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="summary") as executor:
+            reduce = self._reduce
+            while True:
+                groups = self._groups(level)
+                if reduce is self._combine and len(groups) == len(level):
+                    # No two summaries fit together; pair them anyway rather than never reaching the root
+                    logging.warning("Partial corpus summaries exceed the prompt budget; combining them in pairs.")
+                    groups = [level[i:i + 2] for i in range(0, len(level), 2)]
+                level = list(executor.map(reduce, groups))
+                if len(level) == 1:
+                    return level[0][2]
+                # Reports are always summarized; above the leaves a lone child is already a summary
+                reduce = self._combine
+
+    def _combine(self, children: List[Tuple[str, str, str]]) -> Tuple[str, str, str]:
+        """Summarize partial summaries; a single one is passed up unchanged."""
+        return children[0] if len(children) == 1 else self._reduce(children)
+
+
+def build_corpus_summary(client, reports_dir: Path, budget: TokenBudget = None, fan_in: int = DEFAULT_FAN_IN,
+                         max_concurrency: int = 1, prompts_dir: Path = None, export_docx: bool = True,
+                         deployment: str = None, template_name: str = None) -> Optional[Path]:
+    """
+    Write a cross-interview summary of every report in reports_dir.
+
+    Args:
+        client: The Azure OpenAI client.
+        reports_dir (Path): Directory containing <stem>_analysis.md reports.
+        budget (TokenBudget): Completion-token budget.
+        fan_in (int): Maximum number of reports or partial summaries per LLM call.
+        max_concurrency (int): Number of reduction calls made at once.
+        prompts_dir (Path): Directory containing corpus_summary.txt (default: project prompts/).
+        export_docx (bool): Whether to also export the summary to Word.
+        deployment (str): Model deployment (settings.deployment).
+        template_name (str): In a multi-template run, the template whose reports are summarized.
+    Returns:
+        Optional[Path]: The Markdown summary path, or None if there were no reports.
+    """
+    reports_dir = Path(reports_dir)
+    reports = collect_reports(reports_dir, template_name)
+    if not reports:
+        logging.warning("No reports found in '%s'; corpus summary skipped.", reports_dir)
+        return None
+    summarizer = CorpusSummarizer(client, budget or TokenBudget(), load_summary_prompt(prompts_dir),
+                                  reports_dir / SUMMARY_CACHE_DIR, fan_in=fan_in, max_concurrency=max_concurrency,
+                                  deployment=deployment)
+    summary = summarizer.summarize(reports)
+    summary_file = reports_dir / SUMMARY_FILE
+    summary_file.write_text(summary, encoding="utf-8")
+    logging.info("Corpus summary of %d report(s) saved: %s (%d LLM call(s), %d cached node(s))",
+                 len(reports), summary_file, summarizer.calls, summarizer.cache_hits)
+    if export_docx:
+        convert_markdown_to_docx(summary_file, summary_file.with_suffix(".docx"))
+    return summary_file
@@ -0,0 +1,205 @@
+"""Near-duplicate transcript detection with MinHash and locality-sensitive hashing"""
+import logging
+import os
+import re
+import shutil
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from processing.transcript_compaction import compact_transcript
+
+DEFAULT_THRESHOLD = 0.85
+SHINGLE_WORDS = 5
+NUM_PERMUTATIONS = 128
+BANDS = 32  # 32 bands of 4 rows: pairs above ~0.45 similarity become candidates
+DEDUP_REPORT_FILE = "deduplication_report.md"
+REPORT_SUFFIXES = ("_analysis.md", "_analysis.docx", "_analysis.json", "_llm_validation.md")
+
+_PRIME = np.uint64((1 << 31) - 1)
+_BLOCK = 8192
+_WORD = re.compile(r"[a-z0-9']+")
+_REPORT_ROW = re.compile(r"^\| (.+) \| \d+\.\d{2} \|$", re.MULTILINE)
+
+
+@dataclass(frozen=True)
+class DeduplicationOptions:
+    """Similarity threshold and how duplicates receive their representative's outputs."""
+    threshold: float = DEFAULT_THRESHOLD
+    link: bool = False
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> Optional["DeduplicationOptions"]:
+        """
+        Build options from the 'processing.deduplication' section of config.yaml.
+
+        Returns:
+            Optional[DeduplicationOptions]: The options, or None if deduplication is disabled or not configured.
+        """
+        section = ((config or {}).get("processing", {}) or {}).get("deduplication")
+        if not section or not section.get("enabled", False):
+            return None
+        threshold = float(section.get("threshold", DEFAULT_THRESHOLD))
+        if not 0 < threshold <= 1:
+            raise ValueError("processing.deduplication.threshold must be in (0, 1].")
+        return cls(threshold=threshold, link=bool(section.get("link", False)))
+
+
+@dataclass
+class DuplicateCluster:
+    """A representative transcript and the near-duplicates that reuse its outputs."""
+    representative: Path
+    duplicates: List[Tuple[Path, float]]
+
+
+def _shingles(text: str) -> np.ndarray:
+    """Hashes of overlapping word 5-grams of the normalized (compacted, lower-case) text."""
+    words = _WORD.findall(compact_transcript(text).text.lower())
+    if len(words) < SHINGLE_WORDS:
+        words = words + [""] * (SHINGLE_WORDS - len(words))
+    hashes = {zlib.crc32(" ".join(words[i:i + SHINGLE_WORDS]).encode("utf-8"))
+              for i in range(len(words) - SHINGLE_WORDS + 1)}
+    return np.fromiter(hashes, dtype=np.uint64, count=len(hashes)) % _PRIME
+
+
+class MinHasher:
+    """MinHash signatures from a fixed family of random linear hash functions."""
+
+    def __init__(self, num_permutations: int = NUM_PERMUTATIONS, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, int(_PRIME), size=num_permutations, dtype=np.uint64)[:, None]
+        self.b = rng.integers(0, int(_PRIME), size=num_permutations, dtype=np.uint64)[:, None]
+
+    def signature(self, text: str) -> np.ndarray:
+        """Signature of a text; the fraction of equal entries estimates Jaccard similarity."""
+        shingles = _shingles(text)
+        signature = np.full(self.a.shape[0], _PRIME, dtype=np.uint64)
+        for start in range(0, len(shingles), _BLOCK):
+            block = shingles[start:start + _BLOCK][None, :]
+            # a, x < 2^31, so a * x + b fits in 64 bits
+            signature = np.minimum(signature, ((self.a * block + self.b) % _PRIME).min(axis=1))
+        return signature
+
+
+def find_duplicate_clusters(files: Iterable[Path], threshold: float = DEFAULT_THRESHOLD) -> List[DuplicateCluster]:
+    """
+    Cluster near-duplicate transcripts.
+
+    Candidate pairs come from LSH buckets over signature bands, so the work grows
+    with the number of files and actual near-duplicates rather than with every pair.
+    Candidates are confirmed against the threshold using their signatures, and
+    confirmed pairs are merged into clusters. The longest transcript in each cluster
+    is its representative.
+
+    Args:
+        files (Iterable[Path]): Transcript files.
+        threshold (float): Minimum estimated Jaccard similarity of word shingles.
+    Returns:
+        List[DuplicateCluster]: Clusters with at least one duplicate.
+    """
+    files = list(files)
+    hasher = MinHasher()
+    signatures = []
+    sizes = []
+    for path in files:
+        text = path.read_text(encoding="utf-8")
+        signatures.append(hasher.signature(text))
+        sizes.append(len(text))
+    rows = NUM_PERMUTATIONS // BANDS
+    buckets: Dict[Tuple[int, bytes], List[int]] = {}
+    for index, signature in enumerate(signatures):
+        for band in range(BANDS):
+            key = (band, signature[band * rows:(band + 1) * rows].tobytes())
+            buckets.setdefault(key, []).append(index)
+    parent = list(range(len(files)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    similarity: Dict[Tuple[int, int], float] = {}
+    for members in buckets.values():
+        for position, i in enumerate(members):
+            for j in members[position + 1:]:
+                if (i, j) in similarity:
+                    continue
+                score = float(np.mean(signatures[i] == signatures[j]))
+                similarity[(i, j)] = score
+                if score >= threshold:
+                    parent[find(i)] = find(j)
+    groups: Dict[int, List[int]] = {}
+    for index in range(len(files)):
+        groups.setdefault(find(index), []).append(index)
+    clusters = []
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        representative = max(members, key=lambda i: (sizes[i], files[i].name))
+        duplicates = [(files[i], float(np.mean(signatures[i] == signatures[representative])))
+                      for i in sorted(members, key=lambda i: files[i].name) if i != representative]
+        clusters.append(DuplicateCluster(files[representative], duplicates))
+    clusters.sort(key=lambda cluster: cluster.representative.name)
+    return clusters
+
+
+def share_outputs(cluster: DuplicateCluster, reports_dir: Path, link: bool = False, template_names: List[str] = None) -> int:
+    """
+    Give each duplicate a copy (or hard link) of its representative's reports.
+
+    Args:
+        template_names (List[str]): Templates of a multi-template run, whose outputs are named <stem>_<template>_analysis.*.
+    Returns:
+        int: Number of files copied or linked.
+    """
+    shared = 0
+    qualifiers = [f"_{name}" for name in template_names] if template_names else [""]
+    for suffix in (qualifier + suffix for qualifier in qualifiers for suffix in REPORT_SUFFIXES):
+        source = reports_dir / f"{cluster.representative.stem}{suffix}"
+        if not source.exists():
+            continue
+        for duplicate, _ in cluster.duplicates:
+            target = reports_dir / f"{duplicate.stem}{suffix}"
+            if target.exists():
+                target.unlink()
+            if link:
+                os.link(source, target)
+            else:
+                shutil.copyfile(source, target)
+            shared += 1
+    return shared
+
+
+def write_deduplication_report(clusters: List[DuplicateCluster], reports_dir: Path, threshold: float) -> Path:
+    """Write a Markdown summary of which transcripts were deduplicated."""
+    lines = ["# Deduplication Report", "",
+             f"Near-duplicate threshold: {threshold:.2f} (estimated Jaccard similarity of word 5-grams).", ""]
+    if not clusters:
+        lines.append("No near-duplicate transcripts found.")
+    for cluster in clusters:
+        lines.append(f"## {cluster.representative.name}")
+        lines.append("")
+        lines.append("| Duplicate | Similarity |")
+        lines.append("|-----------|------------|")
+        lines.extend(f"| {path.name} | {score:.2f} |" for path, score in cluster.duplicates)
+        lines.append("")
+    report = Path(reports_dir) / DEDUP_REPORT_FILE
+    report.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    logging.info("Deduplication report saved: %s", report)
+    return report
+
+
+def read_duplicates(reports_dir: Path) -> List[str]:
+    """
+    File names of the transcripts listed as duplicates in the deduplication report.
+
+    Their reports in reports_dir are copies of their representative's.
+    """
+    report = Path(reports_dir) / DEDUP_REPORT_FILE
+    if not report.exists():
+        return []
+    return _REPORT_ROW.findall(report.read_text(encoding="utf-8"))
@@ -0,0 +1,222 @@
+"""Per-stage deadlines and request hedging for Azure OpenAI calls"""
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, TimeoutError as FutureTimeout, wait
+from typing import Any, Callable, Deque, Dict, Iterable, Optional
+
+from openai import APITimeoutError
+
+DEFAULT_TIMEOUT = 600.0
+# Seconds per attempt; the SDK's own retries may add further attempts
+DEFAULT_STAGE_TIMEOUTS = {
+    "initial": 600.0,
+    "revision": 600.0,
+    "validation": 180.0,
+    "chunk": 300.0,
+    "consolidation": 600.0,
+    "corpus_summary": 300.0,
+}
+DEFAULT_HEDGE_PERCENTILE = 95.0
+DEFAULT_MAX_HEDGE_FRACTION = 0.1
+DEFAULT_MIN_SAMPLES = 10
+# Validation replies are short, so a duplicate costs little beyond its prompt
+DEFAULT_HEDGE_STAGES = ("validation",)
+LATENCY_WINDOW = 100
+
+
+def stage_of(key: Optional[str]) -> str:
+    """Stage name of a template/stage key (see token_budget.template_key)."""
+    return key.rsplit(":", 1)[-1] if key else "default"
+
+
+class RequestPolicy:
+    """
+    Deadline and hedging policy shared by every LLM call of a run.
+
+    Each call gets the timeout configured for its stage, so a stuck connection
+    fails the call instead of hanging the batch. With hedging enabled, a call that
+    is still running after the configured latency percentile of its stage gets a
+    duplicate request; the first response wins and the other is abandoned. An
+    abandoned request cannot be cancelled and is billed in full, so only the
+    configured stages are hedged, hedges are capped at a fraction of all calls, and
+    the tokens billed for abandoned requests are reported.
+
+    Hedged calls run each request on its own thread rather than a shared pool, so a
+    request never waits behind others (which would count as latency and trigger a
+    hedge) and an abandoned request only holds its own thread until it returns.
+    """
+
+    def __init__(self, timeouts: Optional[Dict[str, float]] = None, default_timeout: float = DEFAULT_TIMEOUT,
+                 hedge: bool = False, hedge_percentile: float = DEFAULT_HEDGE_PERCENTILE,
+                 max_hedge_fraction: float = DEFAULT_MAX_HEDGE_FRACTION, min_samples: int = DEFAULT_MIN_SAMPLES,
+                 hedge_stages: Iterable[str] = DEFAULT_HEDGE_STAGES):
+        self.timeouts = {**DEFAULT_STAGE_TIMEOUTS, **(timeouts or {})}
+        self.default_timeout = default_timeout
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.max_hedge_fraction = max_hedge_fraction
+        self.min_samples = min_samples
+        self.hedge_stages = frozenset(hedge_stages)
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.abandoned_tokens = 0
+        self.timed_out = 0
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "RequestPolicy":
+        """
+        Build the policy from 'processing.timeouts' and 'processing.hedging' in config.yaml.
+
+        Returns:
+            RequestPolicy: The policy (default deadlines, no hedging, if not configured).
+        """
+        processing = (config or {}).get("processing", {}) or {}
+        timeouts = dict(processing.get("timeouts") or {})
+        default_timeout = float(timeouts.pop("default", DEFAULT_TIMEOUT))
+        hedging = processing.get("hedging") or {}
+        return cls(
+            timeouts={stage: float(seconds) for stage, seconds in timeouts.items()},
+            default_timeout=default_timeout,
+            hedge=bool(hedging.get("enabled", False)),
+            hedge_percentile=float(hedging.get("percentile", DEFAULT_HEDGE_PERCENTILE)),
+            max_hedge_fraction=float(hedging.get("max_fraction", DEFAULT_MAX_HEDGE_FRACTION)),
+            min_samples=int(hedging.get("min_samples", DEFAULT_MIN_SAMPLES)),
+            hedge_stages=tuple(hedging.get("stages", DEFAULT_HEDGE_STAGES)),
+        )
+
+    def timeout_for(self, stage: str) -> float:
+        return self.timeouts.get(stage, self.default_timeout)
+
+    def record_latency(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self._latencies.setdefault(stage, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+    def hedge_delay(self, stage: str) -> Optional[float]:
+        """Latency percentile of recent calls for the stage, or None until enough calls were observed."""
+        with self._lock:
+            samples = sorted(self._latencies.get(stage, ()))
+        if len(samples) < self.min_samples:
+            return None
+        index = min(len(samples) - 1, int(len(samples) * self.hedge_percentile / 100))
+        return samples[index]
+
+    def _take_hedge(self) -> bool:
+        with self._lock:
+            if self.hedged + 1 > self.max_hedge_fraction * self.calls:
+                return False
+            self.hedged += 1
+            return True
+
+    @staticmethod
+    def _start(create: Callable[..., Any], **kwargs) -> Future:
+        """Run create(**kwargs) on a new thread, in a copy of the caller's context; returns once it is running."""
+        future = Future()
+        future.set_running_or_notify_cancel()
+        context = contextvars.copy_context()
+
+        def run():
+            try:
+                future.set_result(context.run(create, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name="llm-call", daemon=True).start()
+        return future
+
+    def call(self, create: Callable[..., Any], stage: str, **kwargs) -> Any:
+        """
+        Run create(timeout=..., **kwargs) under the stage's deadline, hedging it if due.
+
+        Args:
+            create (Callable): Typically client.chat.completions.create.
+            stage (str): Pipeline stage used for the deadline and latency statistics.
+            **kwargs: Request arguments.
+        Returns:
+            The first successful response.
+        Raises:
+            Exception: The error of the (primary) request if no request succeeded.
+        """
+        with self._lock:
+            self.calls += 1
+        timeout = self.timeout_for(stage)
+        delay = self.hedge_delay(stage) if self.hedge and stage in self.hedge_stages else None
+        start = time.monotonic()
+        if delay is None:
+            try:
+                response = create(timeout=timeout, **kwargs)
+            except APITimeoutError:
+                with self._lock:
+                    self.timed_out += 1
+                logging.warning("LLM call for stage '%s' exceeded its %.0fs deadline.", stage, timeout)
+                raise
+            self.record_latency(stage, time.monotonic() - start)
+            return response
+        primary = self._start(create, timeout=timeout, **kwargs)
+        # Thread.start() returns once the request is running, so the delay is measured from there
+        start = time.monotonic()
+        try:
+            response = primary.result(timeout=delay)
+            self.record_latency(stage, time.monotonic() - start)
+            return response
+        except FutureTimeout:
+            pass
+        except APITimeoutError:
+            with self._lock:
+                self.timed_out += 1
+            raise
+        if not self._take_hedge():
+            return self._result(primary, stage, start)
+        logging.info("LLM call for stage '%s' still running after %.1fs; sending a hedged request.", stage, delay)
+        backup = self._start(create, timeout=timeout, **kwargs)
+        pending = {primary, backup}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    # A request already in flight cannot be interrupted; the other one's result is dropped
+                    for other in pending:
+                        other.add_done_callback(self._count_abandoned)
+                    if future is backup:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    self.record_latency(stage, time.monotonic() - start)
+                    return future.result()
+        return self._result(primary, stage, start)
+
+    def _count_abandoned(self, future) -> None:
+        """Add the tokens billed for an abandoned request, once it returns."""
+        if future.exception() is not None:
+            return
+        tokens = getattr(getattr(future.result(), "usage", None), "total_tokens", None)
+        if isinstance(tokens, int):
+            with self._lock:
+                self.abandoned_tokens += tokens
+
+    def _result(self, future, stage: str, start: float) -> Any:
+        try:
+            response = future.result()
+        except APITimeoutError:
+            with self._lock:
+                self.timed_out += 1
+            logging.warning("LLM call for stage '%s' exceeded its %.0fs deadline.", stage, self.timeout_for(stage))
+            raise
+        self.record_latency(stage, time.monotonic() - start)
+        return response
+
+    def report(self, summary) -> None:
+        """Record call, timeout and hedging statistics in a RunSummary."""
+        if not self.calls:
+            return
+        summary.set("LLM calls", self.calls)
+        summary.set("LLM calls timed out", self.timed_out)
+        if self.hedge:
+            summary.set("Hedged requests", self.hedged)
+            summary.set("Hedge win rate", f"{self.hedge_wins}/{self.hedged}" if self.hedged else "n/a")
+            # Requests still running when the summary is written are not counted yet
+            summary.set("Tokens billed for abandoned requests", self.abandoned_tokens)
@@ -0,0 +1,177 @@
+"""Token-size-aware batch scheduling"""
+import fnmatch
+import heapq
+import json
+import logging
+import os
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import yaml
+
+from processing.transcript_chunking import split_transcript
+from processing.transcript_compaction import CompactionOptions, compact_transcript
+from processing.token_index import token_index
+
+THROUGHPUT_FILE = ".throughput.json"
+
+
+@dataclass
+class WorkUnit:
+    """
+    One schedulable piece of work: a whole transcript, or one chunk of an
+    oversized transcript that is analyzed in segments and then consolidated.
+
+    Chunks record their character span in the (compacted) transcript rather than
+    the text, so a planned batch does not hold transcripts in memory.
+    """
+    transcript_file: Path
+    tokens: int
+    priority: int = 0
+    chunk_index: Optional[int] = None
+    chunk_count: Optional[int] = None
+    chunk_span: Optional[Tuple[int, int]] = None
+
+    @property
+    def is_chunk(self) -> bool:
+        return self.chunk_index is not None
+
+    def chunk_of(self, text: str) -> str:
+        """This chunk's part of the transcript text."""
+        return text[self.chunk_span[0]:self.chunk_span[1]]
+
+
+def load_priorities(path: Path) -> Dict[str, int]:
+    """
+    Load filename-pattern priorities from a YAML mapping, e.g. ``"*urgent*": 10``.
+
+    Args:
+        path (Path): The priorities file.
+    Returns:
+        Dict[str, int]: Priority per glob pattern (higher runs first).
+    Raises:
+        ValueError: If the file is not a mapping of patterns to integers.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+    if not isinstance(data, dict):
+        raise ValueError(f"Priorities file '{path}' must map filename patterns to integers.")
+    try:
+        return {str(pattern): int(priority) for pattern, priority in data.items()}
+    except (TypeError, ValueError):
+        raise ValueError(f"Priorities file '{path}' must map filename patterns to integers.")
+
+
+def priority_for(name: str, priorities: Optional[Dict[str, int]]) -> int:
+    """Highest priority among the patterns matching the file name (0 if none match)."""
+    matches = [priority for pattern, priority in (priorities or {}).items() if fnmatch.fnmatch(name, pattern)]
+    return max(matches) if matches else 0
+
+
+def plan_batch(files: Iterable[Path], priorities: Optional[Dict[str, int]] = None, chunk_tokens: Optional[int] = None,
+               counter: Optional[Callable[[str], int]] = None, compaction: Optional[CompactionOptions] = None) -> List[WorkUnit]:
+    """
+    Token-count a batch and order it longest-processing-time first within each priority.
+
+    Transcripts larger than chunk_tokens are decomposed into one unit per chunk, so
+    their chunk calls interleave with smaller transcripts instead of running as a
+    single long pole.
+
+    Args:
+        files (Iterable[Path]): Transcript files in the batch.
+        priorities (Dict[str, int]): Optional priority per filename glob pattern.
+        chunk_tokens (int): Token size above which a transcript is decomposed.
+        counter (Callable[[str], int]): Token counter; by default counts and chunks come from the
+            cached token index of each transcript, so unchanged transcripts are not re-encoded.
+        compaction (CompactionOptions): If given, sizes (and chunks) are those of the compacted transcript.
+    Returns:
+        List[WorkUnit]: Units in the order they should be started.
+    """
+    units = []
+    for path in files:
+        text = path.read_text(encoding="utf-8")
+        if compaction is not None:
+            text = compact_transcript(text, compaction).text
+        index = token_index(text) if counter is None else None
+        tokens = index.count if index is not None else counter(text)
+        priority = priority_for(path.name, priorities)
+        if chunk_tokens and tokens > chunk_tokens:
+            if index is not None:
+                boundaries = index.chunk_boundaries(text, chunk_tokens)
+                chunks = [((start, end), index.count_range(start, end)) for start, end in zip(boundaries, boundaries[1:])]
+            else:
+                chunks, start = [], 0
+                for chunk in split_transcript(text, chunk_tokens):
+                    chunks.append(((start, start + len(chunk)), counter(chunk)))
+                    start += len(chunk)
+            logging.info("'%s' has %d tokens; decomposed into %d chunks.", path.name, tokens, len(chunks))
+            for chunk_index, (span, chunk_count) in enumerate(chunks, 1):
+                units.append(WorkUnit(path, chunk_count, priority, chunk_index, len(chunks), span))
+        else:
+            units.append(WorkUnit(path, tokens, priority))
+    units.sort(key=lambda unit: (-unit.priority, -unit.tokens, unit.transcript_file.name, unit.chunk_index or 0))
+    return units
+
+
+def plan_windows(files: Iterable[Path], window: int, **kwargs) -> Iterator[WorkUnit]:
+    """
+    Plan a lazily discovered batch window by window.
+
+    Each window of files is token-counted and ordered as in plan_batch, so only one
+    window is planned ahead of the work in progress; ordering is longest first within
+    a window rather than across the whole batch.
+
+    Args:
+        files (Iterable[Path]): Transcript files, e.g. from discover_transcripts.
+        window (int): Files planned at a time.
+        **kwargs: Passed to plan_batch (priorities, chunk_tokens, counter, compaction).
+    Yields:
+        WorkUnit: Units in the order they should be started.
+    """
+    files = iter(files)
+    while True:
+        group = list(islice(files, window))
+        if not group:
+            return
+        yield from plan_batch(group, **kwargs)
+
+
+def predict_makespan(costs: Iterable[float], workers: int) -> float:
+    """
+    Makespan of greedy list scheduling: each cost, in order, goes to the worker that frees up first.
+
+    Args:
+        costs (Iterable[float]): Cost of each unit, in start order.
+        workers (int): Number of concurrent workers.
+    Returns:
+        float: The predicted makespan, in the same unit as the costs.
+    """
+    finish_times = [0.0] * max(1, workers)
+    for cost in costs:
+        heapq.heappush(finish_times, heapq.heappop(finish_times) + cost)
+    return max(finish_times)
+
+
+def load_throughput(reports_dir: Path) -> Optional[float]:
+    """Worker seconds per transcript token measured by the last batch writing to reports_dir, or None."""
+    path = Path(reports_dir) / THROUGHPUT_FILE
+    if not path.exists():
+        return None
+    try:
+        return float(json.loads(path.read_text(encoding="utf-8"))["seconds_per_token"])
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logging.warning("Ignoring unreadable throughput history '%s': %s", path, e)
+        return None
+
+
+def save_throughput(reports_dir: Path, seconds_per_token: float) -> None:
+    """Persist a batch's worker seconds per token so the next batch can predict its makespan."""
+    path = Path(reports_dir) / THROUGHPUT_FILE
+    try:
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({"seconds_per_token": seconds_per_token}, indent=2), encoding="utf-8")
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logging.warning("Could not save throughput history '%s': %s", path, e)
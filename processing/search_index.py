@@ -0,0 +1,189 @@
+"""Full-text search over transcripts, reports and quotes (SQLite FTS5)"""
+import logging
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from conversion.structured_export import extract_report
+from processing.transcript_compaction import compact_transcript
+
+SEARCH_INDEX_FILE = ".search_index.sqlite"
+DEFAULT_LIMIT = 10
+KINDS = ("turn", "section", "quote")
+
+_TURN = re.compile(r"^([^:\n]{1,60}):\s(.*)$")
+
+
+@dataclass
+class SearchHit:
+    """One ranked search result."""
+    source: str
+    kind: str
+    label: str
+    snippet: str
+    score: float
+
+
+def _fingerprint(path: Path) -> str:
+    stat = path.stat()
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def transcript_entries(text: str) -> List[Tuple[str, str, str]]:
+    """(kind, label, content) for each speaker turn of a transcript; the label is the speaker."""
+    entries = []
+    for line in compact_transcript(text).text.splitlines():
+        match = _TURN.match(line)
+        speaker, content = (match.group(1), match.group(2)) if match else ("", line)
+        if content.strip():
+            entries.append(("turn", speaker, content))
+    return entries
+
+
+def report_entries(markdown: str) -> List[Tuple[str, str, str]]:
+    """(kind, label, content) for each report section and each attributed blockquote."""
+    document = extract_report(markdown)
+    entries = [("section", title, content) for title, content in document["sections"].items() if content]
+    entries.extend(("quote", f"{quote['speaker'] or 'Unattributed'} — {quote['section']}", quote["text"])
+                   for quote in document["quotes"])
+    return entries
+
+
+class SearchIndex:
+    """
+    Incrementally updated FTS5 index stored next to the reports.
+
+    Each indexed file is recorded with its size and modification time; a file is
+    only re-parsed when that fingerprint changes, and files that disappeared are
+    dropped, so keeping the index current costs one stat per file.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        with self._transaction() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS documents (path TEXT PRIMARY KEY, fingerprint TEXT NOT NULL)")
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS entries USING fts5("
+                " content, path UNINDEXED, kind UNINDEXED, label UNINDEXED, tokenize='porter unicode61')"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=DELETE")
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    yield conn
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+                conn.execute("COMMIT")
+            finally:
+                conn.close()
+
+    def index_file(self, path: Path) -> bool:
+        """
+        Index a transcript (.txt) or report (.md) if it is new or changed.
+
+        Returns:
+            bool: True if the file was (re-)indexed.
+        """
+        path = Path(path)
+        key = str(path.resolve())
+        try:
+            fingerprint = _fingerprint(path)
+        except FileNotFoundError:
+            self.remove(path)
+            return False
+        with self._transaction() as conn:
+            row = conn.execute("SELECT fingerprint FROM documents WHERE path = ?", (key,)).fetchone()
+            if row is not None and row[0] == fingerprint:
+                return False
+            text = path.read_text(encoding="utf-8")
+            entries = report_entries(text) if path.suffix == ".md" else transcript_entries(text)
+            conn.execute("DELETE FROM entries WHERE path = ?", (key,))
+            conn.executemany("INSERT INTO entries (content, path, kind, label) VALUES (?, ?, ?, ?)",
+                             [(content, key, kind, label) for kind, label, content in entries])
+            conn.execute("INSERT OR REPLACE INTO documents (path, fingerprint) VALUES (?, ?)", (key, fingerprint))
+        logging.debug("Indexed '%s' (%d entries).", path.name, len(entries))
+        return True
+
+    def remove(self, path: Path) -> None:
+        """Drop a file from the index."""
+        key = str(Path(path).resolve())
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM entries WHERE path = ?", (key,))
+            conn.execute("DELETE FROM documents WHERE path = ?", (key,))
+
+    def index_outputs(self, transcript_file: Path, reports_dir: Path, stems: Optional[List[str]] = None) -> int:
+        """
+        Index a transcript and its analysis reports (if written yet). Returns the number of files re-indexed.
+
+        stems are the report filename prefixes (one per template); the transcript's stem by default.
+        """
+        reports = [Path(reports_dir) / f"{stem}_analysis.md" for stem in stems or [Path(transcript_file).stem]]
+        return sum(self.index_file(path) for path in [Path(transcript_file)] + reports if path.exists())
+
+    def update(self, transcript_files: Iterable[Path], reports_dir: Path) -> int:
+        """
+        Bring the index in line with the given transcripts and every report in reports_dir.
+
+        Returns:
+            int: Number of files re-indexed.
+        """
+        paths = list(transcript_files) + sorted(Path(reports_dir).glob("*_analysis.md"))
+        current = {str(Path(path).resolve()) for path in paths}
+        with self._transaction() as conn:
+            stale = [row[0] for row in conn.execute("SELECT path FROM documents") if row[0] not in current]
+            for key in stale:
+                conn.execute("DELETE FROM entries WHERE path = ?", (key,))
+                conn.execute("DELETE FROM documents WHERE path = ?", (key,))
+        changed = sum(self.index_file(path) for path in paths)
+        if changed or stale:
+            logging.info("Search index updated: %d file(s) indexed, %d removed.", changed, len(stale))
+        return changed
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT, kind: Optional[str] = None) -> List[SearchHit]:
+        """
+        Ranked (BM25) full-text search.
+
+        FTS5 query syntax is supported ("exact phrase", AND/OR/NOT, prefix*); a query
+        that is not valid FTS5 syntax is searched as plain words instead.
+
+        Args:
+            query (str): The search query.
+            limit (int): Maximum number of results.
+            kind (str): Optional filter: 'turn', 'section' or 'quote'.
+        Returns:
+            List[SearchHit]: Best matches first.
+        """
+        sql = ("SELECT path, kind, label, snippet(entries, 0, '[', ']', '…', 16), bm25(entries) FROM entries"
+               " WHERE entries MATCH ?" + (" AND kind = ?" if kind else "") + " ORDER BY bm25(entries) LIMIT ?")
+        conn = self._connect()
+        try:
+            for attempt in (query, " ".join(f'"{word}"' for word in re.findall(r"\w+", query))):
+                if not attempt:
+                    return []
+                params = (attempt, kind, limit) if kind else (attempt, limit)
+                try:
+                    rows = conn.execute(sql, params).fetchall()
+                    break
+                except sqlite3.OperationalError:
+                    continue
+            else:
+                return []
+        finally:
+            conn.close()
+        return [SearchHit(Path(path).name, hit_kind, label, snippet, -score) for path, hit_kind, label, snippet, score in rows]
@@ -0,0 +1,277 @@
+"""Dynamic completion-token budgeting for Azure OpenAI calls"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from processing.request_policy import RequestPolicy, stage_of
+from utils.file_utils import count_tokens
+from utils.log_context import log_context
+
+DEFAULT_CONTEXT_WINDOW = 128000  # GPT-4o context window
+DEFAULT_MAX_COMPLETION_TOKENS = 16000
+DEFAULT_MIN_COMPLETION_TOKENS = 1024
+DEFAULT_HEADROOM = 1.25
+MESSAGE_OVERHEAD_TOKENS = 64  # Role/framing tokens added by the chat format
+HISTORY_SAMPLES = 20
+BUDGET_HISTORY_FILE = ".token_budget.json"
+
+
+def template_key(template: str, stage: str) -> str:
+    """
+    Build the history key for a template/stage pair.
+
+    Args:
+        template (str): The analysis template content.
+        stage (str): The pipeline stage (e.g. 'initial', 'revision', 'validation').
+    Returns:
+        str: A short, stable key identifying the template and stage.
+    """
+    return f"{template_digest(template)}:{stage}"
+
+
+def template_digest(template: str) -> str:
+    """Short, stable identifier of a template's content (the first part of its template keys)."""
+    return hashlib.sha256(template.encode("utf-8")).hexdigest()[:16]
+
+
+class TokenBudget:
+    """
+    Derive per-call max_tokens from the context window, the prompt size and
+    the output sizes observed for the same template in previous runs.
+
+    Azure OpenAI reserves the requested max_tokens against the TPM quota up front,
+    so asking for the full completion cap on every call throttles concurrency.
+
+    The budget is passed to every LLM call, so it also carries the run's
+    RequestPolicy (per-stage deadlines and request hedging).
+    """
+
+    def __init__(self, context_window: int = DEFAULT_CONTEXT_WINDOW,
+                 max_completion_tokens: int = DEFAULT_MAX_COMPLETION_TOKENS,
+                 min_completion_tokens: int = DEFAULT_MIN_COMPLETION_TOKENS,
+                 headroom: float = DEFAULT_HEADROOM,
+                 history_path: Optional[Path] = None,
+                 policy: Optional[RequestPolicy] = None):
+        if min_completion_tokens > max_completion_tokens:
+            raise ValueError("min_completion_tokens must not exceed max_completion_tokens")
+        self.context_window = context_window
+        self.max_completion_tokens = max_completion_tokens
+        self.min_completion_tokens = min_completion_tokens
+        self.headroom = headroom
+        self.history_path = Path(history_path) if history_path else None
+        self.policy = policy or RequestPolicy()
+        self._history: Dict[str, List[int]] = {}
+        self._usage: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+        self._load_history()
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]], history_path: Optional[Path] = None) -> "TokenBudget":
+        """
+        Build a TokenBudget from the 'processing' section of config.yaml.
+
+        Args:
+            config (dict): The loaded configuration (may be None or empty).
+            history_path (Path): Where learned output sizes are persisted.
+        Returns:
+            TokenBudget: The configured budget.
+        """
+        processing = (config or {}).get("processing", {}) or {}
+        return cls(
+            context_window=int(processing.get("context_window", DEFAULT_CONTEXT_WINDOW)),
+            max_completion_tokens=int(processing.get("max_completion_tokens", DEFAULT_MAX_COMPLETION_TOKENS)),
+            min_completion_tokens=int(processing.get("min_completion_tokens", DEFAULT_MIN_COMPLETION_TOKENS)),
+            history_path=history_path,
+            policy=RequestPolicy.from_config(config),
+        )
+
+    def _load_history(self) -> None:
+        if not self.history_path or not self.history_path.exists():
+            return
+        try:
+            data = json.loads(self.history_path.read_text(encoding="utf-8"))
+            self._history = {key: [int(v) for v in values][-HISTORY_SAMPLES:] for key, values in data.items()}
+        except (OSError, ValueError, AttributeError) as e:
+            logging.warning("Ignoring unreadable token budget history '%s': %s", self.history_path, e)
+
+    def save(self) -> None:
+        """Persist learned output sizes so later runs start with a tight budget."""
+        if not self.history_path:
+            return
+        with self._lock:
+            data = dict(self._history)
+        try:
+            self.history_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.history_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+            os.replace(tmp_path, self.history_path)
+        except OSError as e:
+            logging.warning("Could not save token budget history '%s': %s", self.history_path, e)
+
+    def record(self, key: str, completion_tokens: int) -> None:
+        """
+        Record the size of a completed (non-truncated) response.
+
+        Args:
+            key (str): The template/stage key (see template_key).
+            completion_tokens (int): Tokens generated by the model.
+        """
+        with self._lock:
+            samples = self._history.setdefault(key, [])
+            samples.append(int(completion_tokens))
+            del samples[:-HISTORY_SAMPLES]
+
+    def record_usage(self, key: Optional[str], response) -> None:
+        """Add a response's billed prompt and completion tokens to the usage of its template."""
+        usage = getattr(response, "usage", None)
+        tokens = [getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None)]
+        tokens = [value if isinstance(value, int) else 0 for value in tokens]
+        digest = key.split(":", 1)[0] if key else ""
+        with self._lock:
+            totals = self._usage.setdefault(digest, [0, 0, 0])
+            totals[0] += 1
+            totals[1] += tokens[0]
+            totals[2] += tokens[1]
+
+    def usage(self, template: str) -> Dict[str, int]:
+        """LLM calls and billed prompt/completion tokens for a template in this run."""
+        with self._lock:
+            calls, prompt_tokens, completion_tokens = self._usage.get(template_digest(template), [0, 0, 0])
+        return {"calls": calls, "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}
+
+    def expected_output(self, key: Optional[str]) -> Optional[int]:
+        """Return the largest recently observed output for the key, or None if unknown."""
+        if key is None:
+            return None
+        with self._lock:
+            samples = self._history.get(key)
+            return max(samples) if samples else None
+
+    def available(self, prompt_tokens: int) -> int:
+        """Tokens left in the context window for the completion."""
+        return self.context_window - prompt_tokens - MESSAGE_OVERHEAD_TOKENS
+
+    def fits(self, prompt_tokens: int) -> bool:
+        """Whether a prompt leaves room for at least the minimum completion."""
+        return self.available(prompt_tokens) >= self.min_completion_tokens
+
+    def desired_tokens(self, key: Optional[str] = None, default: Optional[int] = None) -> int:
+        """
+        Completion budget before applying the context-window limit.
+
+        Uses the learned estimate (with headroom) when available, otherwise the
+        caller's default, otherwise the configured cap.
+        """
+        expected = self.expected_output(key)
+        if expected is not None:
+            desired = int(expected * self.headroom)
+        elif default is not None:
+            desired = default
+        else:
+            desired = self.max_completion_tokens
+        return max(self.min_completion_tokens, min(desired, self.max_completion_tokens))
+
+    def max_tokens_for(self, prompt: str, key: Optional[str] = None, default: Optional[int] = None,
+                       prompt_tokens: Optional[int] = None) -> int:
+        """
+        Compute max_tokens for a call.
+
+        The UTF-8 byte length of the prompt is an upper bound on its token count, so
+        the prompt is only tokenized when that bound could push the call past the
+        context window.
+
+        Args:
+            prompt (str): The full prompt text (system and user messages).
+            key (str): The template/stage key used to look up learned output sizes.
+            default (int): Budget to use when nothing has been learned yet.
+            prompt_tokens (int): Exact prompt size, if the caller already knows it.
+        Returns:
+            int: The max_tokens value to request.
+        """
+        desired = self.desired_tokens(key, default)
+        if prompt_tokens is None:
+            upper_bound = len(prompt.encode("utf-8"))
+            if desired <= self.available(upper_bound):
+                return desired
+            prompt_tokens = count_tokens(prompt)
+        return max(1, min(desired, self.available(prompt_tokens)))
+
+    def fallback_tokens(self, current: int, prompt: str, prompt_tokens: Optional[int] = None) -> Optional[int]:
+        """
+        Budget to retry with after a truncated (finish_reason == 'length') response.
+
+        Returns:
+            Optional[int]: The larger budget, or None if the budget cannot grow.
+        """
+        if prompt_tokens is None and self.available(len(prompt.encode("utf-8"))) < self.max_completion_tokens:
+            prompt_tokens = count_tokens(prompt)
+        ceiling = self.max_completion_tokens
+        if prompt_tokens is not None:
+            ceiling = min(ceiling, self.available(prompt_tokens))
+        return ceiling if ceiling > current else None
+
+
+def _prompt_text(messages: List[Dict[str, str]]) -> str:
+    return "".join(message["content"] for message in messages)
+
+
+def _completion_tokens(response) -> Optional[int]:
+    """Completion tokens per choice (usage covers all n choices of a request)."""
+    usage = getattr(response, "usage", None)
+    tokens = getattr(usage, "completion_tokens", None)
+    if not isinstance(tokens, int):
+        return None
+    choices = getattr(response, "choices", None)
+    return tokens // len(choices) if isinstance(choices, list) and len(choices) > 1 else tokens
+
+
+def create_completion(client, messages: List[Dict[str, str]], budget: TokenBudget, key: Optional[str] = None,
+                      default: Optional[int] = None, prompt_tokens: Optional[int] = None, **kwargs):
+    """
+    Call client.chat.completions.create with a budgeted max_tokens.
+
+    The call runs under the budget's RequestPolicy: the deadline of the key's stage
+    is passed as the request timeout, and slow calls may be hedged.
+
+    If the response is truncated (finish_reason == 'length'), the call is retried
+    once with the largest budget the context window and configured cap allow.
+    Complete responses are recorded so future calls for the same key are sized
+    from observed output.
+
+    Args:
+        client: The Azure OpenAI client.
+        messages (list): Chat messages to send.
+        budget (TokenBudget): The token budget to draw from.
+        key (str): The template/stage key (see template_key).
+        default (int): Budget to use when nothing has been learned for the key.
+        prompt_tokens (int): Exact prompt size, if already known.
+        **kwargs: Extra arguments for chat.completions.create (model, temperature, ...).
+    Returns:
+        The chat completion response.
+    """
+    # The joined prompt is rebuilt when needed rather than kept alive for the duration of the call
+    max_tokens = budget.max_tokens_for(_prompt_text(messages), key=key, default=default, prompt_tokens=prompt_tokens)
+    stage = stage_of(key)
+    create = client.chat.completions.create
+    with log_context(stage=stage):
+        response = budget.policy.call(create, stage, messages=messages, max_tokens=max_tokens, **kwargs)
+        budget.record_usage(key, response)
+        if response.choices[0].finish_reason == "length":
+            retry_tokens = budget.fallback_tokens(max_tokens, _prompt_text(messages), prompt_tokens)
+            if retry_tokens is None:
+                logging.warning("Response truncated at max_tokens=%d and the budget cannot grow further.", max_tokens)
+                return response
+            logging.info("Response truncated at max_tokens=%d; retrying with max_tokens=%d.", max_tokens, retry_tokens)
+            response = budget.policy.call(create, stage, messages=messages, max_tokens=retry_tokens, **kwargs)
+            budget.record_usage(key, response)
+            if response.choices[0].finish_reason == "length":
+                logging.warning("Response still truncated at max_tokens=%d.", retry_tokens)
+                return response
+    completion_tokens = _completion_tokens(response)
+    if key is not None and completion_tokens is not None:
+        budget.record(key, completion_tokens)
+    return response
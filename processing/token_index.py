@@ -0,0 +1,214 @@
+"""Persistent token offset index per transcript text (token counts and slicing without re-encoding)"""
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from itertools import accumulate
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import tiktoken
+
+from utils.file_utils import get_encoding
+
+TOKEN_INDEX_DIR = ".token_index"
+MEMORY_ENTRIES = 16
+
+# End of a sentence and the whitespace after it
+_SENTENCE_END = re.compile(r"[.!?…][\"'”’)\]]*\s+")
+
+
+@lru_cache(maxsize=None)
+def _token_byte_lengths(encoding: tiktoken.Encoding) -> np.ndarray:
+    """Byte length of every token id of an encoding (0 for unused ids)."""
+    lengths = np.zeros(encoding.n_vocab, dtype=np.uint32)
+    for token in range(encoding.n_vocab):
+        try:
+            lengths[token] = len(encoding.decode_single_token_bytes(token))
+        except KeyError:
+            pass
+    return lengths
+
+
+def sentence_end_before(text: str, start: int, end: int) -> Optional[int]:
+    """Position after the last sentence end in text[start:end] (before the next sentence), or None."""
+    last = None
+    for match in _SENTENCE_END.finditer(text, start, end):
+        last = match.end()
+    return last
+
+
+def text_key(text: str) -> str:
+    """Content hash identifying a text (and its index) across runs."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class TokenIndex:
+    """
+    Character offset of every token of a text.
+
+    offsets[i] is the character position where token i starts and offsets[count] is
+    the length of the text, so token ranges map to character slices without encoding
+    again. Loaded indexes are memory-mapped.
+    """
+
+    def __init__(self, offsets: np.ndarray):
+        self.offsets = offsets
+
+    @classmethod
+    def build(cls, text: str, encoding: Optional[tiktoken.Encoding] = None) -> "TokenIndex":
+        """
+        Encode text once and record where each token starts.
+
+        Tokens come back as a numpy array rather than a list of Python ints, and the
+        per-byte work uses 32-bit offsets where they fit, so building the index of a
+        long transcript takes a few bytes per character rather than tens.
+        """
+        encoding = encoding or get_encoding()
+        tokens = encoding.encode_to_numpy(text, disallowed_special=())
+        data = np.frombuffer(text.encode("utf-8"), dtype=np.uint8)
+        dtype = np.uint32 if len(data) < 2 ** 32 else np.uint64
+        byte_starts = np.zeros(len(tokens), dtype=dtype)
+        np.cumsum(_token_byte_lengths(encoding)[tokens[:-1]], dtype=dtype, out=byte_starts[1:])
+        del tokens
+        # chars_before[p]: characters starting in the first p bytes (UTF-8 continuation bytes are 10xxxxxx)
+        chars_before = np.zeros(len(data) + 1, dtype=dtype)
+        np.cumsum((data & 0xC0) != 0x80, dtype=dtype, out=chars_before[1:])
+        del data
+        # A token that starts inside a multi-byte character is attributed to that character
+        offsets = np.empty(len(byte_starts) + 1, dtype=dtype)
+        offsets[:-1] = chars_before[byte_starts + 1] - 1
+        offsets[-1] = len(text)
+        return cls(offsets)
+
+    @property
+    def count(self) -> int:
+        return len(self.offsets) - 1
+
+    def char_offset(self, token: int) -> int:
+        """Character position where a token starts (the text length for token == count)."""
+        return int(self.offsets[min(max(token, 0), self.count)])
+
+    def token_at(self, char: int) -> int:
+        """Index of the first token starting at or after a character position."""
+        return int(np.searchsorted(self.offsets[:-1], char, side="left"))
+
+    def slice(self, text: str, start: int, end: Optional[int] = None) -> str:
+        """Text of tokens [start, end) of the indexed text."""
+        return text[self.char_offset(start):self.char_offset(self.count if end is None else end)]
+
+    def count_range(self, start_char: int, end_char: int) -> int:
+        """Tokens starting within the character range [start_char, end_char)."""
+        return self.token_at(end_char) - self.token_at(start_char)
+
+    def chunk_boundaries(self, text: str, chunk_tokens: int) -> List[int]:
+        """
+        Character positions splitting the text into chunks of at most chunk_tokens tokens, between lines.
+
+        A line longer than chunk_tokens (such as a compacted turn) is split at its last
+        sentence end within the budget, or at a token boundary if it has none.
+
+        Returns:
+            List[int]: Boundaries starting with 0 and ending with len(text).
+        """
+        line_ends = np.fromiter(accumulate(len(line) for line in text.splitlines(keepends=True)), dtype=np.int64)
+        if not len(line_ends):
+            return [0]
+        token_ends = np.searchsorted(self.offsets[:-1], line_ends, side="left")
+        boundaries, start_char, start_token = [0], 0, 0
+        while start_char < len(text):
+            # Last line whose end keeps the chunk within budget
+            last = int(np.searchsorted(token_ends, start_token + chunk_tokens, side="right")) - 1
+            if last >= 0 and line_ends[last] > start_char:
+                start_char, start_token = int(line_ends[last]), int(token_ends[last])
+            else:
+                limit = max(self.char_offset(start_token + chunk_tokens), start_char + 1)
+                start_char = sentence_end_before(text, start_char, limit) or limit
+                start_token = self.token_at(start_char)
+            boundaries.append(start_char)
+        return boundaries
+
+    def split(self, text: str, chunk_tokens: int) -> List[str]:
+        """The chunks delimited by chunk_boundaries."""
+        boundaries = self.chunk_boundaries(text, chunk_tokens)
+        return [text[start:end] for start, end in zip(boundaries, boundaries[1:])]
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, self.offsets)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "TokenIndex":
+        return cls(np.load(path, mmap_mode="r"))
+
+
+class TokenIndexCache:
+    """
+    Token indexes keyed by content hash: in memory for recent texts and, with a
+    cache directory, as .npy sidecar files reused by later runs.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, encoding: Optional[tiktoken.Encoding] = None):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._encoding = encoding
+        self._memory: "OrderedDict[str, TokenIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def encoding(self) -> tiktoken.Encoding:
+        return self._encoding or get_encoding()
+
+    def path_for(self, key: str) -> Optional[Path]:
+        return self.cache_dir / f"{key}-{self.encoding.name}.npy" if self.cache_dir else None
+
+    def get(self, text: str) -> TokenIndex:
+        """The index of text, loaded or built (and stored) as needed."""
+        key = text_key(text)
+        with self._lock:
+            index = self._memory.get(key)
+            if index is not None:
+                self._memory.move_to_end(key)
+                return index
+        path = self.path_for(key)
+        index = None
+        if path is not None and path.exists():
+            try:
+                index = TokenIndex.load(path)
+                if index.offsets[-1] != len(text):
+                    raise ValueError("length mismatch")
+            except (OSError, ValueError) as e:
+                logging.warning("Rebuilding unreadable token index '%s': %s", path, e)
+                index = None
+        if index is None:
+            index = TokenIndex.build(text, self.encoding)
+            if path is not None:
+                try:
+                    index.save(path)
+                except OSError as e:
+                    logging.warning("Could not save token index '%s': %s", path, e)
+        with self._lock:
+            self._memory[key] = index
+            while len(self._memory) > MEMORY_ENTRIES:
+                self._memory.popitem(last=False)
+        return index
+
+
+_cache = TokenIndexCache()
+
+
+def set_cache_dir(cache_dir: Optional[Path]) -> None:
+    """Persist token indexes under cache_dir (None keeps them in memory only)."""
+    global _cache
+    _cache = TokenIndexCache(cache_dir)
+
+
+def token_index(text: str) -> TokenIndex:
+    """The token index of a transcript text from the process-wide cache."""
+    return _cache.get(text)
@@ -1,12 +1,129 @@
-import os
 import logging
-from typing import Optional
+import re
+from typing import List, Optional
 from openai import AzureOpenAI
 import tiktoken
 from utils.file_utils import count_tokens
+from processing.token_budget import TokenBudget, create_completion, template_key
+from processing.token_index import TokenIndex, token_index
+from utils.settings import Settings
 
+CHUNK_SYSTEM_PROMPT = (
+    "You are an expert business analyst skilled at creating detailed, narrative-driven analyses. "
+    "For each segment, identify any mentioned participants and their roles. "
+    "Apply the Microsoft Customer Engagement Methodology (MCEM) framework: "
+    "1) Customer industry context and desired outcomes, "
+    "2) Cross-functional collaboration opportunities, "
+    "3) Balance of immediate needs vs strategic goals, "
+    "4) Microsoft's unique value proposition. "
+    "Focus on technology partnerships and strategic recommendations."
+)
+CONSOLIDATION_SYSTEM_PROMPT = "You are an expert at consolidating and summarizing analyses while maintaining a professional, narrative-driven style."
+CONSOLIDATION_PROMPT = "Please consolidate these analysis segments into a single coherent analysis, removing any redundancies and ensuring a smooth flow:"
 
-def process_large_transcript(transcript: str, template: str, client: AzureOpenAI) -> Optional[str]:
+
+def _line_pieces(line: str, chunk_tokens: int) -> List[str]:
+    """A line, or for a line longer than chunk_tokens its sentences (and the words of over-long sentences)."""
+    if count_tokens(line) <= chunk_tokens:
+        return [line]
+    pieces = []
+    for sentence in re.findall(r".+?(?:[.!?…][\"'”’)\]]*\s+|$)", line, re.DOTALL):
+        if count_tokens(sentence) <= chunk_tokens:
+            pieces.append(sentence)
+        else:
+            pieces.extend(re.findall(r"\s*\S+\s*", sentence))
+    return pieces
+
+
+def split_transcript(transcript: str, chunk_tokens: int, index: TokenIndex = None) -> List[str]:
+    """
+    Split a transcript into chunks of at most chunk_tokens tokens, breaking between lines.
+
+    A line longer than chunk_tokens is broken between sentences, and a sentence longer
+    than chunk_tokens between words.
+
+    Args:
+        transcript (str): The full transcript text.
+        chunk_tokens (int): Maximum tokens per chunk.
+        index (TokenIndex): Token index of the transcript; chunks are then cut from it without re-encoding lines.
+    Returns:
+        List[str]: The transcript chunks, in order.
+    """
+    if index is not None:
+        return index.split(transcript, chunk_tokens)
+    chunks = []
+    current, current_tokens = [], 0
+    for line in transcript.splitlines(keepends=True):
+        for piece in _line_pieces(line, chunk_tokens):
+            piece_tokens = count_tokens(piece)
+            if current and current_tokens + piece_tokens > chunk_tokens:
+                chunks.append("".join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += piece_tokens
+    if current:
+        chunks.append("".join(current))
+    return chunks
+
+
+def analyze_chunk(client: AzureOpenAI, template: str, chunk: str, index: int, total: int, budget: TokenBudget,
+                  deployment: str) -> str:
+    """
+    Analyze one transcript segment.
+
+    Args:
+        client (AzureOpenAI): The Azure OpenAI client.
+        template (str): The analysis template content.
+        chunk (str): The transcript segment.
+        index (int): 1-based position of the segment.
+        total (int): Number of segments.
+        budget (TokenBudget): Completion-token budget.
+        deployment (str): Model deployment (settings.deployment).
+    Returns:
+        str: The segment analysis.
+    """
+    prompt = f"{template}\n\nTRANSCRIPT SEGMENT {index}/{total}:\n{chunk}"
+    response = create_completion(
+        client,
+        [
+            {"role": "system", "content": CHUNK_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        budget,
+        key=template_key(template, "chunk"),
+        model=deployment,
+        temperature=0.3
+    )
+    return response.choices[0].message.content
+
+
+def consolidate_results(client: AzureOpenAI, template: str, results: List[str], budget: TokenBudget, deployment: str) -> str:
+    """
+    Consolidate segment analyses into one analysis.
+
+    Returns the segments joined with separators if the consolidation call fails.
+    """
+    combined = "\n\n---\n\n".join(results)
+    try:
+        response = create_completion(
+            client,
+            [
+                {"role": "system", "content": CONSOLIDATION_SYSTEM_PROMPT},
+                {"role": "user", "content": f"{CONSOLIDATION_PROMPT}\n\n{combined}"}
+            ],
+            budget,
+            key=template_key(template, "consolidation"),
+            model=deployment,
+            temperature=0.3
+        )
+        return response.choices[0].message.content
+    except Exception as e:
+        logging.error("Error consolidating results: %s", e)
+        return combined
+
+
+def process_large_transcript(transcript: str, template: str, client: AzureOpenAI, budget: TokenBudget = None,
+                             settings: Settings = None) -> Optional[str]:
     """
     Handle large transcripts by breaking them into chunks for processing.
 
@@ -17,62 +134,39 @@ def process_large_transcript(transcript: str, template: str, client: AzureOpenAI
         transcript (str): The full transcript text.
         template (str): The analysis template content.
         client (AzureOpenAI): The Azure OpenAI client.
+        budget (TokenBudget): Completion-token budget; defaults to the standard context window and cap.
+        settings (Settings): The deployment, and with a chunk_size, the transcript is split into chunks of
+            that many tokens; otherwise it is halved by characters above 16000 characters. The defaults
+            (and the environment) are used if not given.
     Returns:
         Optional[str]: The consolidated analysis text, or None if processing fails.    """
     chunk_size = 16000  # Reduced for testing; adjust in production
-    MAX_COMPLETION_TOKENS = 16000
+    if budget is None:
+        budget = TokenBudget()
     # For our test scenarios, we'll use a simpler chunking method
     # In production, use tiktoken for proper token counting
-    chunks = []
-    chunk_length = len(transcript) // 2 if len(transcript) > chunk_size else len(transcript)
-    for i in range(0, len(transcript), chunk_length):
-        chunks.append(transcript[i:i + chunk_length])
+    if settings is None:
+        settings = Settings.from_sources(None)
+    deployment = settings.deployment
+    if settings.chunk_size:
+        chunks = split_transcript(transcript, settings.chunk_size, index=token_index(transcript))
+    else:
+        chunks = []
+        chunk_length = len(transcript) // 2 if len(transcript) > chunk_size else len(transcript)
+        for i in range(0, len(transcript), chunk_length):
+            chunks.append(transcript[i:i + chunk_length])
     results = []# Process each chunk individually
     for i, chunk in enumerate(chunks, 1):
-        logging.info(f"Processing chunk {i} of {len(chunks)}")
-        prompt = f"{template}\n\nTRANSCRIPT SEGMENT {i}/{len(chunks)}:\n{chunk}"
+        logging.info("Processing chunk %d of %d", i, len(chunks))
         try:
-            response = client.chat.completions.create(
-                model=os.getenv("AZURE_OPENAI_DEPLOYMENT"),
-                messages=[
-                    {"role": "system", "content": (
-                        "You are an expert business analyst skilled at creating detailed, narrative-driven analyses. "
-                        "For each segment, identify any mentioned participants and their roles. "
-                        "Apply the Microsoft Customer Engagement Methodology (MCEM) framework: "
-                        "1) Customer industry context and desired outcomes, "
-                        "2) Cross-functional collaboration opportunities, "
-                        "3) Balance of immediate needs vs strategic goals, "
-                        "4) Microsoft's unique value proposition. "
-                        "Focus on technology partnerships and strategic recommendations."
-                    )},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=MAX_COMPLETION_TOKENS
-            )
-            results.append(response.choices[0].message.content)
+            results.append(analyze_chunk(client, template, chunk, i, len(chunks), budget, deployment))
         except Exception as e:
-            logging.error(f"Error processing chunk {i}: {str(e)}")
+            logging.error("Error processing chunk %d: %s", i, e)
             # If it's a single chunk and it failed, return None
             if len(chunks) == 1:
                 return None
             # For multiple chunks, continue processing remaining chunks
     # If multiple chunks, consolidate the results into a single analysis
     if len(results) > 1:
-        combined = "\n\n---\n\n".join(results)
-        consolidation_prompt = "Please consolidate these analysis segments into a single coherent analysis, removing any redundancies and ensuring a smooth flow:"
-        try:
-            response = client.chat.completions.create(
-                model=os.getenv("AZURE_OPENAI_DEPLOYMENT"),
-                messages=[
-                    {"role": "system", "content": "You are an expert at consolidating and summarizing analyses while maintaining a professional, narrative-driven style."},
-                    {"role": "user", "content": f"{consolidation_prompt}\n\n{combined}"}
-                ],
-                temperature=0.3,
-                max_tokens=MAX_COMPLETION_TOKENS
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            logging.error(f"Error consolidating results: {str(e)}")
-            return combined
+        return consolidate_results(client, template, results, budget, deployment)
     return results[0] if results else None
@@ -0,0 +1,323 @@
+"""Deterministic transcript pre-compaction to cut prompt tokens before any LLM call"""
+import re
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_FILLERS = ("um", "umm", "uh", "uhh", "erm", "er", "ah", "hmm", "mm", "mhm")
+DEFAULT_FILLER_PHRASES = ("you know", "i mean")
+# Backchannels answer the other speaker ("Uh huh" is a yes), so their filler-like words are kept
+_BACKCHANNELS = {("uh", "huh"), ("mm", "hmm"), ("um", "hmm"), ("uh", "oh")}
+
+# 00:01:23, 0:03, [00:01:23.456], 00:00:01,000 --> 00:00:04,000 (VTT/SRT cue timings)
+_TIME = r"\d{1,2}:\d{2}(?::\d{2})?(?:[.,]\d+)?"
+_TIMESTAMP_LINE = re.compile(rf"^\s*[\[(]?{_TIME}[\])]?\s*(?:-->\s*{_TIME}.*)?$")
+_LEADING_TIMESTAMP = re.compile(rf"\s*[\[(]?{_TIME}[\])]?\s*")
+_STRONG_TIMESTAMP = re.compile(r"^\s*(?:[\[(]|\d{1,2}:\d{2}:\d{2})")
+_VTT_VOICE = re.compile(r"^\s*<v\s+([^>]+)>(.*?)(?:</v>)?\s*$")
+_BRACKET_SPEAKER = re.compile(r"\s*\[([^\]\d][^\]]{0,40})\]\s*(.*)$")
+_COLON_SPEAKER = re.compile(r"\s*([A-Z][\w.'\-]*(?: [A-Z][\w.'\-]*){0,3}|[A-Z][A-Z .'\-]{1,40})\s*:\s+(.*)$")
+_HEADER_SPEAKER = re.compile(rf"^\s*([A-Z][\w.'\-]*(?: [A-Z][\w.'\-]*){{0,3}})\s+{_TIME}\s*$")
+_MARKER = re.compile(r"[\[(](?:crosstalk|cross-talk|inaudible|unintelligible|laughter|laughs|silence|pause|music|noise|overlapping)[^\])]*[\])]",
+                     re.IGNORECASE)
+_WORD = re.compile(r"\S+")
+# Patterns without "^" are only used with re.match(line, pos), which anchors at pos
+
+
+@dataclass(frozen=True)
+class CompactionOptions:
+    """Which compaction steps to apply. Each step only drops non-content text."""
+    enabled: bool = True
+    strip_timestamps: bool = True
+    normalize_speakers: bool = True
+    merge_turns: bool = True
+    strip_markers: bool = True
+    strip_fillers: bool = True
+    fillers: Tuple[str, ...] = DEFAULT_FILLERS
+    filler_phrases: Tuple[str, ...] = DEFAULT_FILLER_PHRASES
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> Optional["CompactionOptions"]:
+        """
+        Build options from the 'processing.compaction' section of config.yaml.
+
+        Returns:
+            Optional[CompactionOptions]: The options, or None if compaction is disabled or not configured.
+        """
+        section = ((config or {}).get("processing", {}) or {}).get("compaction")
+        if not section or not section.get("enabled", False):
+            return None
+        return cls(
+            strip_timestamps=bool(section.get("strip_timestamps", True)),
+            normalize_speakers=bool(section.get("normalize_speakers", True)),
+            merge_turns=bool(section.get("merge_turns", True)),
+            strip_markers=bool(section.get("strip_markers", True)),
+            strip_fillers=bool(section.get("strip_fillers", True)),
+            fillers=tuple(f.lower() for f in section.get("fillers", DEFAULT_FILLERS)),
+            filler_phrases=tuple(p.lower() for p in section.get("filler_phrases", DEFAULT_FILLER_PHRASES)),
+        )
+
+
+class OffsetMap:
+    """
+    Map character positions in compacted text back to the original transcript.
+
+    Stored as parallel arrays of segments (compacted start, original start, length).
+    Words are copied verbatim, so each of their characters maps exactly; synthesized
+    characters (separators, normalized speaker labels) have length 0 and map to the
+    start of the original text they stand in for. Text copied contiguously is one
+    segment, so the map grows with the number of edits rather than of words.
+    """
+
+    def __init__(self):
+        self._compact_starts = array("q")
+        self._original_starts = array("q")
+        self._lengths = array("q")
+
+    def add(self, compact_start: int, original_start: int, length: int) -> None:
+        if length and self._lengths and self._lengths[-1]:
+            last_length = self._lengths[-1]
+            if (self._compact_starts[-1] + last_length == compact_start
+                    and self._original_starts[-1] + last_length == original_start):
+                self._lengths[-1] = last_length + length
+                return
+        self._compact_starts.append(compact_start)
+        self._original_starts.append(original_start)
+        self._lengths.append(length)
+
+    def to_original(self, position: int) -> int:
+        """Original offset of the character at position in the compacted text."""
+        index = bisect_right(self._compact_starts, position) - 1
+        if index < 0:
+            return 0
+        delta = position - self._compact_starts[index]
+        length = self._lengths[index]
+        return self._original_starts[index] + (min(delta, length - 1) if length else 0)
+
+    def span_to_original(self, start: int, end: int) -> Tuple[int, int]:
+        """Original [start, end) span covering the compacted [start, end) span."""
+        return self.to_original(start), self.to_original(end - 1) + 1
+
+
+@dataclass
+class CompactedTranscript:
+    """Compacted transcript text with its offset map back to the original."""
+    text: str
+    original: str
+    offsets: OffsetMap = field(repr=False)
+
+    def locate(self, quote: str) -> Optional[Tuple[int, int]]:
+        """
+        Find a quote taken from the compacted text in the original transcript.
+
+        Whitespace differences are ignored.
+
+        Returns:
+            Optional[Tuple[int, int]]: The original [start, end) span, or None if not found.
+        """
+        return locate_quote(self.text, self.offsets, quote)
+
+
+def locate_quote(text: str, offsets: Optional[OffsetMap], quote: str) -> Optional[Tuple[int, int]]:
+    """
+    Find a quote taken from text in the original transcript, ignoring whitespace differences.
+
+    Args:
+        text (str): The text the quote was taken from.
+        offsets (OffsetMap): Map from text back to the original, or None if text is the original.
+    Returns:
+        Optional[Tuple[int, int]]: The original [start, end) span, or None if not found.
+    """
+    normalized = " ".join(quote.split())
+    if not normalized:
+        return None
+    start = text.find(normalized)
+    if start < 0:
+        return None
+    if offsets is None:
+        return start, start + len(normalized)
+    return offsets.span_to_original(start, start + len(normalized))
+
+
+class _Builder:
+    def __init__(self):
+        self.parts: List[str] = []
+        self.length = 0
+        self.offsets = OffsetMap()
+
+    def verbatim(self, text: str, original_start: int) -> None:
+        self.offsets.add(self.length, original_start, len(text))
+        self.parts.append(text)
+        self.length += len(text)
+
+    def separator(self, original: str, word_start: int) -> None:
+        """A space before a word, copied when the original has one there so the segments stay contiguous."""
+        if word_start and original[word_start - 1] == " ":
+            self.verbatim(" ", word_start - 1)
+        else:
+            self.synthesized(" ", word_start)
+
+    def synthesized(self, text: str, original_start: int) -> None:
+        self.offsets.add(self.length, original_start, 0)
+        self.parts.append(text)
+        self.length += len(text)
+
+
+def _normalize_speaker(label: str) -> str:
+    label = " ".join(label.split())
+    return label.title() if label.isupper() else label
+
+
+def _parse_line(line: str, options: CompactionOptions) -> Tuple[Optional[str], int, int]:
+    """Return (speaker or None, content start, content end) for one line."""
+    end = len(line)
+    match = _VTT_VOICE.match(line)
+    if match:
+        return match.group(1), match.start(2), match.end(2)
+    match = _HEADER_SPEAKER.match(line)
+    if match:
+        return match.group(1), end, end
+    leading = _LEADING_TIMESTAMP.match(line) if options.strip_timestamps else None
+    label_start = leading.end() if leading else 0
+    for pattern in (_BRACKET_SPEAKER, _COLON_SPEAKER):
+        match = pattern.match(line, label_start)
+        if pattern is _BRACKET_SPEAKER and match and _MARKER.match(line, match.start(1) - 1):
+            continue  # "[crosstalk] we should go" is a marker, not a speaker named crosstalk
+        if match:
+            content_start = match.start(2)
+            if options.strip_timestamps:
+                after_label = _LEADING_TIMESTAMP.match(line, content_start)
+                if after_label and _STRONG_TIMESTAMP.match(after_label.group()):
+                    content_start = after_label.end()
+            return match.group(1), content_start, end
+    # Without a speaker label before it, only an unambiguous timestamp is dropped ("10:30 works" is content)
+    if leading and _STRONG_TIMESTAMP.match(leading.group()):
+        return None, leading.end(), end
+    return None, 0, end
+
+
+def _words(line: str, line_start: int, start: int, end: int, options: CompactionOptions) -> List[Tuple[str, int]]:
+    """Words (with original offsets) in line[start:end], minus markers and fillers."""
+    regions = [(start, end)]
+    if options.strip_markers:
+        regions = []
+        position = start
+        for match in _MARKER.finditer(line, start, end):
+            regions.append((position, match.start()))
+            position = match.end()
+        regions.append((position, end))
+    words = [(m.group(), line_start + m.start()) for region_start, region_end in regions
+             for m in _WORD.finditer(line, region_start, region_end)]
+    if not options.strip_fillers:
+        return words
+    fillers = set(options.fillers)
+    kept = []
+    i = 0
+    while i < len(words):
+        if _backchannel_at(words, i):
+            kept.extend(words[i:i + 2])
+            i += 2
+            continue
+        if _is_filler(words[i][0], fillers):
+            i += 1
+            continue
+        phrase_length = _filler_phrase_at(words, i, kept, options.filler_phrases)
+        if phrase_length:
+            i += phrase_length
+            continue
+        kept.append(words[i])
+        i += 1
+    return kept
+
+
+def _is_filler(word: str, fillers) -> bool:
+    """
+    Whether a word is a filler: lower case ("um,") or capitalized at the start of a
+    sentence ("Um,"). Upper-case words such as "ER" or "MM" are acronyms and are kept.
+    """
+    core = word.strip(",.;!?-")
+    return bool(core) and (core in fillers or (core == core.capitalize() and core.lower() in fillers))
+
+
+def _backchannel_at(words, i) -> bool:
+    """Whether words[i] starts a two-word backchannel such as "Uh huh" or "mm, hmm"."""
+    pair = tuple(word.strip(",.;!?-").lower() for word, _ in words[i:i + 2])
+    return pair in _BACKCHANNELS
+
+
+def _filler_phrase_at(words, i, kept, phrases) -> int:
+    """
+    Length of a filler phrase starting at words[i], or 0.
+
+    Phrases are only treated as filler when set off by commas (or at the start of a
+    turn) on the left and a comma on the right, e.g. "It was, you know, expensive";
+    "Do you know the price?" is left untouched.
+    """
+    if kept and not kept[-1][0].endswith(","):
+        return 0
+    for phrase in phrases:
+        parts = phrase.split()
+        candidate = words[i:i + len(parts)]
+        if len(candidate) < len(parts) or not candidate[-1][0].endswith(","):
+            continue
+        if [w.rstrip(",").lower() for w, _ in candidate] == parts:
+            return len(parts)
+    return 0
+
+
+def compact_transcript(text: str, options: CompactionOptions = None) -> CompactedTranscript:
+    """
+    Compact a raw Teams/Zoom/plain transcript.
+
+    Drops timestamps and cue numbers, normalizes speaker labels, merges consecutive
+    turns by the same speaker, and removes crosstalk markers and filler words. Every
+    other word is copied verbatim, in order, so quotes are never altered.
+
+    Args:
+        text (str): The original transcript.
+        options (CompactionOptions): Steps to apply (default: all).
+    Returns:
+        CompactedTranscript: The compacted text and its offset map.
+    """
+    options = options or CompactionOptions()
+    turns: List[Tuple[Optional[str], int, List[Tuple[str, int]]]] = []
+    position = 0
+    lines = text.splitlines(keepends=True)
+    for index, raw_line in enumerate(lines):
+        line = raw_line.rstrip("\r\n")
+        line_start = position
+        position += len(raw_line)
+        if options.strip_timestamps:
+            if not line.strip() or line.strip() == "WEBVTT" or _TIMESTAMP_LINE.match(line):
+                continue
+            next_line = lines[index + 1] if index + 1 < len(lines) else ""
+            if line.strip().isdigit() and _TIMESTAMP_LINE.match(next_line):
+                continue  # VTT/SRT cue number
+        speaker, start, end = _parse_line(line, options)
+        words = _words(line, line_start, start, end, options)
+        if speaker is not None:
+            label = _normalize_speaker(speaker) if options.normalize_speakers else speaker
+            if options.merge_turns and turns and turns[-1][0] == label:
+                turns[-1][2].extend(words)
+            else:
+                turns.append((label, line_start, words))
+        elif turns:
+            turns[-1][2].extend(words)
+        else:
+            turns.append((None, line_start, words))
+    builder = _Builder()
+    for label, turn_start, words in turns:
+        if not words and label is None:
+            continue
+        if builder.length:
+            builder.synthesized("\n", turn_start)
+        if label is not None:
+            builder.synthesized(f"{label}:", turn_start)
+        for i, (word, word_start) in enumerate(words):
+            if i or label is not None:
+                builder.separator(text, word_start)
+            builder.verbatim(word, word_start)
+    if builder.length:
+        builder.synthesized("\n", len(text))
+    return CompactedTranscript("".join(builder.parts), text, builder.offsets)
@@ -1,66 +1,187 @@
-import os
+import contextvars
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from openai import AzureOpenAI, OpenAIError
 from utils.file_utils import count_tokens, get_client, load_analysis_template, ensure_reports_dir
 from utils.env_utils import setup_logging, check_env_vars, check_pandoc_installed, STANDARD_LEVEL, log_user_error
-import yaml
+from processing.token_budget import TokenBudget, create_completion, template_key
+from processing.transcript_compaction import CompactionOptions, OffsetMap, compact_transcript, locate_quote
+from processing.candidate_scoring import rank_candidates, scores_markdown
+from processing.token_index import token_index
+from processing.validation_policy import STRUCTURED_INSTRUCTIONS, ValidationRun, parse_grade, response_tokens
+from utils.log_context import log_context
+from utils.run_summary import RunSummary
+from utils.settings import Settings, load_settings
 
+PROMPT_FILES = {
+    "initial": "initial_analysis.txt",
+    "validation": "validation.txt",
+    "revision": "revision.txt",
+    "system": "system.txt",
+}
 
-def process_transcript(transcript_path: Path, template: str, client: AzureOpenAI, feedback_file_path: Path = None, prompts_dir: Path = None) -> Optional[str]:
+
+def load_prompt_templates(prompts_dir: Path = None) -> Dict[str, str]:
+    """
+    Load the prompt templates used by process_transcript.
+
+    Long-running modes (watch, service) load these once and pass them to every
+    process_transcript call instead of re-reading the files per transcript.
+
+    Args:
+        prompts_dir (Path): Directory containing the prompt files (default: project prompts/).
+    Returns:
+        Dict[str, str]: Prompt template text keyed by 'initial', 'validation', 'revision' and 'system'.
+    Raises:
+        SystemExit: If a prompt file is missing or unreadable.
+    """
+    if prompts_dir is None:
+        prompts_dir = Path(__file__).resolve().parent.parent / 'prompts'
+    prompts = {}
+    try:
+        for name, filename in PROMPT_FILES.items():
+            with open(prompts_dir / filename, 'r', encoding='utf-8') as f:
+                prompts[name] = f.read()
+    except FileNotFoundError as e:
+        log_user_error(f"Prompt template file not found: {e.filename}")
+    except Exception as e:
+        log_user_error(f"Failed to load prompt templates: {e}")
+    return prompts
+
+
+def save_actual_prompt_file(reports_dir: Path, transcript_stem: str, prompt_content: str, prompt_type: str, iteration: int = None) -> Path:
+    """
+    Save the actual prompt (with variables filled in) to the reports/ directory for troubleshooting.
+
+    Args:
+        reports_dir (Path): The reports directory.
+        transcript_stem (str): Transcript file stem used as the filename prefix.
+        prompt_content (str): The rendered prompt.
+        prompt_type (str): 'initial', 'revision' or 'validation'.
+        iteration (int): Validation/revision pass, if any.
+    Returns:
+        Path: The written prompt file.
+    """
+    if iteration is not None:
+        prompt_filename = f"{transcript_stem}_{prompt_type}_prompt_pass{iteration}.txt"
+    else:
+        prompt_filename = f"{transcript_stem}_{prompt_type}_prompt.txt"
+    prompt_path = reports_dir / prompt_filename
+    with open(prompt_path, "w", encoding="utf-8") as pf:
+        pf.write(prompt_content)
+    return prompt_path
+
+
+class LoadedTranscript(str):
+    """
+    Transcript text as it is sent in prompts.
+
+    After compaction, offsets maps the text back to the transcript file, so quotes
+    from a report can still be located in the original.
+    """
+    offsets: Optional[OffsetMap] = None
+
+    def locate(self, quote: str) -> Optional[Tuple[int, int]]:
+        """Original [start, end) span of a quote taken from this text, or None if not found."""
+        return locate_quote(self, self.offsets, quote)
+
+
+def load_transcript(transcript_path: Path, compaction: CompactionOptions = None, summary: RunSummary = None) -> LoadedTranscript:
+    """
+    Read a transcript file and apply compaction, recording the token savings.
+
+    Args:
+        transcript_path (Path): Path to the transcript file.
+        compaction (CompactionOptions): If given, the transcript is compacted.
+        summary (RunSummary): Collects compaction savings.
+    Returns:
+        LoadedTranscript: The transcript text as it is sent in prompts, with its offset map after compaction.
+    """
+    try:
+        with open(transcript_path, "r", encoding="utf-8") as f:
+            transcript = f.read()
+    except FileNotFoundError:
+        log_user_error(f"Transcript file not found: {transcript_path}")
+    except Exception as e:
+        log_user_error(f"Failed to read transcript file '{transcript_path}': {e}")
+    logging.info("Transcript loaded from file.")
+    if compaction is not None:
+        original_tokens = token_index(transcript).count
+        compacted = compact_transcript(transcript, compaction)
+        transcript = LoadedTranscript(compacted.text)
+        transcript.offsets = compacted.offsets
+        del compacted  # Only the offsets are kept; they are character positions in the file's text
+        saved_tokens = original_tokens - token_index(transcript).count
+        logging.info("Compaction removed %d of %d transcript tokens (%.1f%%) from every prompt for '%s'.",
+                     saved_tokens, original_tokens, 100.0 * saved_tokens / max(original_tokens, 1), transcript_path.name)
+        if summary is not None:
+            summary.add("Transcript tokens before compaction", original_tokens)
+            summary.add("Transcript tokens saved by compaction", saved_tokens)
+        return transcript
+    return LoadedTranscript(transcript)
+
+
+def process_transcript(transcript_path: Path, template: str, client: AzureOpenAI, feedback_file_path: Path = None, prompts_dir: Path = None, budget: TokenBudget = None,
+                       prompts: Dict[str, str] = None, compaction: CompactionOptions = None, summary: RunSummary = None,
+                       transcript_text: str = None, output_stem: str = None, settings: Settings = None) -> Optional[str]:
     """
     Process a single transcript file and generate an analysis using Azure OpenAI.
 
     This function loads a transcript, checks token limits, and generates a structured
     analysis report using the provided template and Azure OpenAI client. It iteratively
-    validates the report for completeness and accuracy, revising as needed.
+    validates the report for completeness and accuracy, revising as needed until the
+    grade is accepted or the validation policy stops the loop (see ValidationRun); a
+    loop stopped for lack of improvement keeps the best-graded report.
 
     Args:
         transcript_path (Path): Path to the transcript file.
         template (str): The analysis template content.
         client (AzureOpenAI): The Azure OpenAI client.
+        budget (TokenBudget): Completion-token budget; built from config.yaml if not given.
+        prompts (Dict[str, str]): Preloaded prompt templates (see load_prompt_templates); read from prompts_dir if not given.
+        compaction (CompactionOptions): If given, the transcript is compacted before it is sent in any prompt.
+        summary (RunSummary): Collects run metrics such as compaction savings.
+        transcript_text (str): Already loaded (and compacted) transcript, shared when one transcript is analyzed
+            with several templates; the file is then not read again.
+        output_stem (str): Filename prefix of the saved prompts (default: the transcript file stem).
+        settings (Settings): Runtime settings (accepted grades, validation passes and policy, deployment);
+            loaded from config.yaml if not given.
     Returns:
         Optional[str]: The generated analysis text, or None if processing fails.
     """
-    logging.info(f"Starting analysis for transcript: {transcript_path.name}")
+    logging.info("Starting analysis for transcript: %s", transcript_path.name)
     try:
-        try:
-            with open(transcript_path, "r", encoding="utf-8") as f:
-                transcript = f.read()
-        except FileNotFoundError:
-            log_user_error(f"Transcript file not found: {transcript_path}")
-        except Exception as e:
-            log_user_error(f"Failed to read transcript file '{transcript_path}': {e}")
-        logging.info("Transcript loaded from file.")
-        # Ensure prompts directory exists
+        if transcript_text is not None:
+            transcript = transcript_text
+        else:
+            transcript = load_transcript(transcript_path, compaction, summary)
         # Always use root-level prompts/ directory
+        root_dir = Path(__file__).resolve().parent.parent  # project root
         if prompts_dir is None:
-            root_dir = Path(__file__).resolve().parent.parent  # project root
             prompts_dir = root_dir / 'prompts'
-        prompts_dir.mkdir(parents=True, exist_ok=True)
         reports_dir = root_dir / 'reports'
         reports_dir.mkdir(parents=True, exist_ok=True)
-        try:
-            with open(prompts_dir / 'initial_analysis.txt', 'r', encoding='utf-8') as f:
-                initial_prompt_template = f.read()
-            with open(prompts_dir / 'validation.txt', 'r', encoding='utf-8') as f:
-                validation_prompt_template = f.read()
-            with open(prompts_dir / 'revision.txt', 'r', encoding='utf-8') as f:
-                revision_prompt_template = f.read()
-            with open(prompts_dir / 'system.txt', 'r', encoding='utf-8') as f:
-                system_prompt_template = f.read()
-        except FileNotFoundError as e:
-            log_user_error(f"Prompt template file not found: {e.filename}")
-        except Exception as e:
-            log_user_error(f"Failed to load prompt templates: {e}")
-        transcript_stem = transcript_path.stem.replace(' ', '_')
-        MAX_CONTEXT_TOKENS = 128000  # GPT-4o context window (adjust if needed)
-        MAX_COMPLETION_TOKENS = 16000
-        total_tokens = count_tokens(transcript + template)
-        logging.info(f"Total tokens in transcript + template: {total_tokens}")
-        if total_tokens + MAX_COMPLETION_TOKENS > MAX_CONTEXT_TOKENS:
-            log_user_error(f"Transcript + template + completion tokens ({total_tokens + MAX_COMPLETION_TOKENS}) exceed model context window ({MAX_CONTEXT_TOKENS}). Aborting analysis.")
+        if prompts is None:
+            prompts = load_prompt_templates(prompts_dir)
+        initial_prompt_template = prompts["initial"]
+        validation_prompt_template = prompts["validation"]
+        revision_prompt_template = prompts["revision"]
+        system_prompt_template = prompts["system"]
+        transcript_stem = (output_stem or transcript_path.stem).replace(' ', '_')
+        if settings is None:
+            settings = load_settings()
+        allowed_grades = settings.allowed_validation_grades
+        max_passes = settings.max_validation_passes
+        run = ValidationRun(settings.validation, allowed_grades, max_passes)
+        if budget is None:
+            budget = TokenBudget.from_config(settings.config)
+        # The transcript's count comes from its cached token index; only the template is encoded here
+        total_tokens = token_index(transcript).count + count_tokens(template)
+        logging.info("Total tokens in transcript + template: %d", total_tokens)
+        if not budget.fits(total_tokens):
+            log_user_error(f"Transcript + template tokens ({total_tokens}) leave less than {budget.min_completion_tokens} completion tokens in the model context window ({budget.context_window}). Aborting analysis.")
         logging.info("Preparing prompt for Azure OpenAI analysis.")
         try:
             logging.info("Sending prompt to Azure OpenAI for initial report generation.")
@@ -77,16 +198,62 @@ def process_transcript(transcript_path: Path, template: str, client: AzureOpenAI
                     pf.write(prompt_content)
 
             def save_actual_prompt(prompt_content, prompt_type, iteration=None):
+                save_actual_prompt_file(reports_dir, transcript_stem, prompt_content, prompt_type, iteration)
+
+            def call_tokens(response, prompt):
+                """Tokens billed for a call, counted locally if the response reports no usage."""
+                tokens = response_tokens(response)
+                if tokens is None:
+                    tokens = count_tokens(prompt) + count_tokens(response.choices[0].message.content or "")
+                return tokens
+
+            def request_report(prompt, stage, temperature=0.3, **kwargs):
+                try:
+                    return create_completion(
+                        client,
+                        [
+                            {"role": "system", "content": system_prompt_template},
+                            {"role": "user", "content": prompt}
+                        ],
+                        budget,
+                        key=template_key(template, stage),
+                        model=settings.deployment,
+                        temperature=temperature,
+                        **kwargs
+                    )
+                except OpenAIError as e:
+                    log_user_error(f"Azure OpenAI API error: {e}")
+                except Exception as e:
+                    log_user_error(f"Unexpected error during LLM call: {e}")
+
+            candidate_scores = []
+
+            def generate_candidates(prompt):
                 """
-                Save the actual prompt (with variables filled in) to the reports/ directory for troubleshooting.
+                Generate several initial reports (concurrently, or as the n choices of one request)
+                and keep the one with the best local score (see rank_candidates).
                 """
-                if iteration is not None:
-                    prompt_filename = f"{transcript_stem}_{prompt_type}_prompt_pass{iteration}.txt"
+                options = settings.candidates
+                if options.mode == "n":
+                    response = request_report(prompt, "initial", options.temperature, n=options.count)
+                    run.generated(call_tokens(response, prompt))
+                    candidates = [choice.message.content for choice in response.choices]
                 else:
-                    prompt_filename = f"{transcript_stem}_{prompt_type}_prompt.txt"
-                prompt_path = reports_dir / prompt_filename
-                with open(prompt_path, "w", encoding="utf-8") as pf:
-                    pf.write(prompt_content)
+                    with ThreadPoolExecutor(max_workers=options.count, thread_name_prefix="candidate") as executor:
+                        # Each request runs in a copy of the caller's context, so its logs keep the transcript fields
+                        futures = [executor.submit(contextvars.copy_context().run, request_report, prompt, "initial", options.temperature)
+                                   for _ in range(options.count)]
+                        responses = [future.result() for future in futures]
+                    for response in responses:
+                        run.generated(call_tokens(response, prompt))
+                    candidates = [response.choices[0].message.content for response in responses]
+                best, scores = rank_candidates(candidates, transcript, template)
+                candidate_scores.append(scores_markdown(scores, best))
+                logging.info("Selected initial candidate %d of %d (score %.3f; others %s).", best + 1, len(candidates), scores[best].total,
+                             ", ".join(f"{score.total:.3f}" for i, score in enumerate(scores) if i != best) or "none")
+                if summary is not None:
+                    summary.add("Initial candidates generated", len(candidates))
+                return candidates[best]
 
             def generate_report(transcript, template, issues=None, prev_report=None, iteration=None):
                 """
@@ -96,23 +263,14 @@ def process_transcript(transcript_path: Path, template: str, client: AzureOpenAI
                 if not issues:
                     prompt = initial_prompt_template.format(transcript=transcript, template=template)
                     save_actual_prompt(prompt, "initial")
+                    if settings.candidates.count > 1:
+                        return generate_candidates(prompt)
+                    response = request_report(prompt, "initial")
                 else:
                     prompt = revision_prompt_template.format(transcript=transcript, template=template, prev_report=prev_report or "", issues=issues)
                     save_actual_prompt(prompt, "revision", iteration)
-                try:
-                    response = client.chat.completions.create(
-                        model=os.getenv("AZURE_OPENAI_DEPLOYMENT"),
-                        messages=[
-                            {"role": "system", "content": system_prompt_template},
-                            {"role": "user", "content": prompt}
-                        ],
-                        temperature=0.3,
-                        max_tokens=MAX_COMPLETION_TOKENS
-                    )
-                except OpenAIError as e:
-                    log_user_error(f"Azure OpenAI API error: {e}")
-                except Exception as e:
-                    log_user_error(f"Unexpected error during LLM call: {e}")
+                    response = request_report(prompt, "revision")
+                run.generated(call_tokens(response, prompt))
                 return response.choices[0].message.content
 
             report = generate_report(transcript, template)
@@ -123,66 +281,86 @@ def process_transcript(transcript_path: Path, template: str, client: AzureOpenAI
             if feedback_file_path:
                 feedback_file = open(feedback_file_path, "w", encoding="utf-8")
                 feedback_file.write(feedback_md_header)
+            validation_feedback.extend(candidate_scores)
+            if feedback_file and candidate_scores:
+                feedback_file.writelines(candidate_scores)
+                feedback_file.flush()
             from utils.env_utils import show_progress_bar
             show_progress_bar(3, transcript_name=transcript_path.name)
             success = False
-            # Load validation config from config.yaml
-            config_path = Path(__file__).resolve().parent.parent / 'config.yaml'
-            if config_path.exists():
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    config = yaml.safe_load(f)
-                allowed_grades = config.get('processing', {}).get('allowed_validation_grades', ["VALID", "VALID (A)", "VALID (B)"])
-            else:
-                allowed_grades = ["VALID", "VALID (A)", "VALID (B)"]
-            for iteration in range(5):
-                show_progress_bar(3, transcript_name=transcript_path.name, extra=f"LLM Validation/Revision Pass {iteration+1}")
-                logging.info(f"Validation pass {iteration+1}: Checking report completeness against transcript.")
-                validation_prompt = validation_prompt_template.format(transcript=transcript, report=report)
-                save_actual_prompt(validation_prompt, "validation", iteration+1)
-                validation_response = client.chat.completions.create(
-                    model=os.getenv("AZURE_OPENAI_DEPLOYMENT"),
-                    messages=[
-                        {"role": "system", "content": "You are a meticulous analyst validating report completeness and accuracy."},
-                        {"role": "user", "content": validation_prompt}
-                    ],
-                    temperature=0.0,
-                    max_tokens=2000
-                )
-                validation_result = validation_response.choices[0].message.content.strip()
-                # Accept any allowed grade from config
-                is_final = any(validation_result.strip().upper() == grade.upper() for grade in allowed_grades)
-                feedback_entry = f"### Validation Pass {iteration+1}\nLLM Grade: {validation_result.splitlines()[0]}\n{validation_result}\n"
-                validation_feedback.append(feedback_entry)
-                if feedback_file:
-                    feedback_file.write(feedback_entry)
-                    feedback_file.flush()
-                if is_final:
-                    logging.info(f"Report validation passed on iteration {iteration+1}: {validation_result}")
-                    # Add an extra blank line after the last (successful) pass
+            best_report = report
+            validation_kwargs = {"response_format": {"type": "json_object"}} if settings.validation.structured_output else {}
+            for iteration in range(max_passes):
+                with log_context(validation_pass=iteration + 1):
+                    show_progress_bar(3, transcript_name=transcript_path.name, extra=f"LLM Validation/Revision Pass {iteration+1}",
+                                      validation_pass=iteration + 1)
+                    logging.info("Validation pass %d: Checking report completeness against transcript.", iteration + 1)
+                    validation_prompt = validation_prompt_template.format(transcript=transcript, report=report)
+                    if settings.validation.structured_output:
+                        validation_prompt += STRUCTURED_INSTRUCTIONS
+                    save_actual_prompt(validation_prompt, "validation", iteration+1)
+                    validation_response = create_completion(
+                        client,
+                        [
+                            {"role": "system", "content": "You are a meticulous analyst validating report completeness and accuracy."},
+                            {"role": "user", "content": validation_prompt}
+                        ],
+                        budget,
+                        key=template_key(template, "validation"),
+                        default=2000,
+                        model=settings.deployment,
+                        temperature=0.0,
+                        **validation_kwargs
+                    )
+                    validation_result = validation_response.choices[0].message.content.strip()
+                    grade = parse_grade(validation_result)
+                    stop = run.validated(validation_result, grade, call_tokens(validation_response, validation_prompt))
+                    # Transcript-sized; released before the revision call instead of living through it
+                    del validation_prompt, validation_response
+                    if run.improved:
+                        best_report = report
+                    feedback_entry = f"### Validation Pass {iteration+1}\nLLM Grade: {grade.label}\n{validation_result}\n"
+                    validation_feedback.append(feedback_entry)
                     if feedback_file:
-                        feedback_file.write("\n")
+                        feedback_file.write(feedback_entry)
                         feedback_file.flush()
-                    success = True
-                    break
-                else:
-                    logging.info(f"Report validation found issues on iteration {iteration+1}:\n" + validation_result)
-                    report = generate_report(transcript, template, issues=validation_result, prev_report=report, iteration=iteration+1)
-                    logging.info(f"Report revised on iteration {iteration+1}.")
+                    if stop == ValidationRun.ACCEPTED:
+                        logging.info("Report validation passed on iteration %d: %s", iteration + 1, grade.label)
+                        # Add an extra blank line after the last (successful) pass
+                        if feedback_file:
+                            feedback_file.write("\n")
+                            feedback_file.flush()
+                        success = True
+                        break
+                    logging.info("Report validation found issues on iteration %d (%s).", iteration + 1, grade.label)
+                    logging.debug("Validation feedback:\n%s", validation_result)
+                    if stop is not None:
+                        logging.info("Stopping validation of '%s' after %d passes (%s, %d tokens); keeping the best-graded report.",
+                                     transcript_path.name, run.passes, stop, run.tokens)
+                        report = best_report
+                        break
+                    report = generate_report(transcript, template, issues=grade.feedback, prev_report=report, iteration=iteration+1)
+                    logging.info("Report revised on iteration %d.", iteration + 1)
+            if summary is not None:
+                summary.add("Validation passes", run.passes)
+                summary.add("Validation passes saved", run.passes_saved)
+                if run.stop_reason in (ValidationRun.NO_IMPROVEMENT, ValidationRun.TOKEN_CAP):
+                    summary.add(f"Validation stopped early ({run.stop_reason})")
             # Final outcome log
             logger = logging.getLogger()
             if logger.getEffectiveLevel() == STANDARD_LEVEL:
                 if success:
-                    logger.log(STANDARD_LEVEL, f"SUCCESS: Analysis for '{transcript_path.name}' passed validation.")
+                    logger.log(STANDARD_LEVEL, "SUCCESS: Analysis for '%s' passed validation.", transcript_path.name)
                 else:
-                    logger.log(STANDARD_LEVEL, f"FAILURE: Analysis for '{transcript_path.name}' did NOT pass validation after 5 attempts.")
+                    logger.log(STANDARD_LEVEL, "FAILURE: Analysis for '%s' did NOT pass validation after %d attempts.", transcript_path.name, run.passes)
             else:
                 if success:
-                    logging.info(f"SUCCESS: Analysis for '{transcript_path.name}' passed validation.")
+                    logging.info("SUCCESS: Analysis for '%s' passed validation.", transcript_path.name)
                 else:
-                    logging.error(f"FAILURE: Analysis for '{transcript_path.name}' did NOT pass validation after 5 attempts.")
+                    logging.error("FAILURE: Analysis for '%s' did NOT pass validation after %d attempts.", transcript_path.name, run.passes)
             if feedback_file:
                 feedback_file.close()
-            logging.info(f"Analysis complete for transcript: {transcript_path.name}")
+            logging.info("Analysis complete for transcript: %s", transcript_path.name)
             feedback_md = feedback_md_header + "".join(validation_feedback)
             return report, feedback_md
         except Exception as e:
@@ -191,17 +369,17 @@ def process_transcript(transcript_path: Path, template: str, client: AzureOpenAI
         logger = logging.getLogger()
         if logger.getEffectiveLevel() == STANDARD_LEVEL:
             if success:
-                logger.log(STANDARD_LEVEL, f"SUCCESS: Analysis for '{transcript_path.name}' passed validation.")
+                logger.log(STANDARD_LEVEL, "SUCCESS: Analysis for '%s' passed validation.", transcript_path.name)
             else:
-                logger.log(STANDARD_LEVEL, f"FAILURE: Analysis for '{transcript_path.name}' did NOT pass validation after 5 attempts.")
+                logger.log(STANDARD_LEVEL, "FAILURE: Analysis for '%s' did NOT pass validation after %d attempts.", transcript_path.name, run.passes)
         else:
             if success:
-                logging.info(f"SUCCESS: Analysis for '{transcript_path.name}' passed validation.")
+                logging.info("SUCCESS: Analysis for '%s' passed validation.", transcript_path.name)
             else:
-                logging.error(f"FAILURE: Analysis for '{transcript_path.name}' did NOT pass validation after 5 attempts.")
+                logging.error("FAILURE: Analysis for '%s' did NOT pass validation after %d attempts.", transcript_path.name, run.passes)
         if feedback_file:
             feedback_file.close()
-        logging.info(f"Analysis complete for transcript: {transcript_path.name}")
+        logging.info("Analysis complete for transcript: %s", transcript_path.name)
         feedback_md = feedback_md_header + "".join(validation_feedback)
         return report, feedback_md
     except Exception as e:
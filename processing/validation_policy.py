@@ -0,0 +1,248 @@
+"""Validation grade parsing and the stop rules of the validation/revision loop"""
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+GRADE_LETTERS = "ABCDF"
+DEFAULT_PATIENCE = 2
+STRUCTURED_INSTRUCTIONS = (
+    "\n\nReply with ONLY a JSON object of the form "
+    '{"valid": true or false, "grade": "A" to "F", "issues": ["one missing or inaccurate point per item"]}.'
+)
+
+# "VALID", "**Valid (B).**", "VALID - B", "Grade: VALID [A]" followed by the end of the line or punctuation.
+# "Valid points are missing" is not a verdict; "INVALID" and "NOT VALID" are verdicts against the report.
+_VERDICT = re.compile(
+    r"^[\s*_#>`\"'-]*(?:(?:llm\s+)?grade\s*[:=\-]\s*)?(NOT\s+|IN)?VALID"
+    r"(?:\s*[(\[:\-–]?\s*([A-F])\s*[)\]]?)?[\s*_`\"']*(?:$|[.!,;:\-–—(])",
+    re.IGNORECASE,
+)
+_LETTER = re.compile(r"^[\s*_#>`\"'-]*(?:llm\s+)?grade\s*[:=\-]?\s*[(\[]?([A-F])\b", re.IGNORECASE)
+_ISSUE = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+\S", re.MULTILINE)
+_FENCE = re.compile(r"^```(?:json)?\s*(.*?)\s*```$", re.DOTALL)
+
+
+@dataclass(frozen=True)
+class ValidationGrade:
+    """A validation reply reduced to its verdict, letter grade and issue count."""
+    valid: bool
+    letter: Optional[str] = None
+    issues: int = 0
+    feedback: str = ""
+
+    @property
+    def label(self) -> str:
+        """Canonical form for comparison with allowed_validation_grades, e.g. 'VALID (B)'."""
+        base = "VALID" if self.valid else "INVALID"
+        return f"{base} ({self.letter})" if self.letter else base
+
+    @property
+    def rank(self) -> int:
+        """Higher is better: A=5 ... F=1; a bare VALID counts as A and an ungraded rejection as 0."""
+        if self.letter:
+            return len(GRADE_LETTERS) - GRADE_LETTERS.index(self.letter)
+        return len(GRADE_LETTERS) if self.valid else 0
+
+
+def _normalize(label: str) -> str:
+    return " ".join(label.upper().replace("[", "(").replace("]", ")").split())
+
+
+def _parse_json(text: str) -> Optional[ValidationGrade]:
+    fenced = _FENCE.match(text)
+    if fenced:
+        text = fenced.group(1)
+    if not text.startswith("{"):
+        return None
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    grade = str(data.get("grade") or "").strip()
+    parsed = _VERDICT.match(grade) if grade else None
+    letter = parsed.group(2) if parsed else (grade[:1] if grade[:1].upper() in GRADE_LETTERS else None)
+    issues = data.get("issues") or []
+    if isinstance(issues, str):
+        issues = [line for line in issues.splitlines() if line.strip()]
+    valid = data.get("valid")
+    if not isinstance(valid, bool):
+        valid = bool(parsed and not parsed.group(1))
+    feedback = "\n".join(f"- {issue}" for issue in issues)
+    return ValidationGrade(valid, letter.upper() if letter else None, len(issues), feedback or text)
+
+
+def parse_grade(reply: str) -> ValidationGrade:
+    """
+    Parse a validation reply.
+
+    Accepts JSON replies (structured output, optionally in a code fence) and free text
+    whose first non-empty line carries the verdict, tolerating case, markdown, trailing
+    punctuation and commentary ("VALID (B).", "VALID\\nMinor: ..."). Anything else is
+    a rejection whose listed issues are counted.
+
+    Args:
+        reply (str): The validation model's reply.
+    Returns:
+        ValidationGrade: The parsed grade.
+    """
+    text = (reply or "").strip()
+    structured = _parse_json(text)
+    if structured is not None:
+        return structured
+    first_line = next((line for line in text.splitlines() if line.strip()), "")
+    issues = len(_ISSUE.findall(text))
+    verdict = _VERDICT.match(first_line)
+    if verdict:
+        letter = verdict.group(2).upper() if verdict.group(2) else None
+        return ValidationGrade(not verdict.group(1), letter, issues, text)
+    letter = _LETTER.match(first_line)
+    return ValidationGrade(False, letter.group(1).upper() if letter else None, max(issues, 1), text)
+
+
+def response_tokens(response: Any) -> Optional[int]:
+    """Billed prompt + completion tokens of a chat completion, or None if it reports no usage."""
+    usage = getattr(response, "usage", None)
+    tokens = [getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None)]
+    if not all(isinstance(value, int) for value in tokens):
+        return None
+    return sum(tokens)
+
+
+@dataclass(frozen=True)
+class ValidationOptions:
+    """
+    When the validation/revision loop stops before its last pass.
+
+    min_grade: Lowest letter grade accepted with a VALID verdict (default: the lowest
+        letter among the allowed grades, 'B' with the default grades).
+    patience: Consecutive revisions without a better grade (or fewer issues) before the
+        best report so far is kept; 0 revises until the last pass.
+    max_transcript_tokens: Prompt + completion tokens one report may use for generation,
+        validation and revision; no revision is started that would exceed it.
+    structured_output: Ask for a JSON verdict (response_format json_object); only for
+        deployments that support it.
+    """
+    min_grade: Optional[str] = None
+    patience: int = DEFAULT_PATIENCE
+    max_transcript_tokens: Optional[int] = None
+    structured_output: bool = False
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "ValidationOptions":
+        """
+        Build options from the 'processing.validation' section of config.yaml.
+
+        Raises:
+            ValueError: If min_grade is not a letter A-F, or patience or the token cap is negative.
+        """
+        section = ((config or {}).get("processing", {}) or {}).get("validation") or {}
+        min_grade = section.get("min_grade")
+        if min_grade is not None:
+            min_grade = str(min_grade).strip().upper()
+            if min_grade not in GRADE_LETTERS or len(min_grade) != 1:
+                raise ValueError(f"processing.validation.min_grade must be one of {list(GRADE_LETTERS)}.")
+        patience = int(section.get("patience", DEFAULT_PATIENCE))
+        max_tokens = section.get("max_transcript_tokens")
+        if patience < 0:
+            raise ValueError("processing.validation.patience must not be negative.")
+        if max_tokens is not None and int(max_tokens) < 1:
+            raise ValueError("processing.validation.max_transcript_tokens must be a positive number of tokens.")
+        return cls(
+            min_grade=min_grade,
+            patience=patience,
+            max_transcript_tokens=int(max_tokens) if max_tokens is not None else None,
+            structured_output=bool(section.get("structured_output", False)),
+        )
+
+
+class ValidationRun:
+    """
+    Stop decisions for the validation/revision loop of one report.
+
+    Call generated() with the tokens of each initial or revised report and validated()
+    after each validation pass; validated() returns why the loop stops, or None to revise.
+    """
+
+    ACCEPTED = "accepted"
+    NO_IMPROVEMENT = "no improvement"
+    TOKEN_CAP = "token cap"
+    MAX_PASSES = "max passes"
+
+    def __init__(self, options: ValidationOptions, allowed_grades: Iterable[str], max_passes: int):
+        allowed_grades = tuple(allowed_grades)
+        self.options = options
+        self.allowed = {_normalize(grade) for grade in allowed_grades}
+        letters = [grade.letter for grade in map(parse_grade, allowed_grades) if grade.valid and grade.letter]
+        self.min_grade = options.min_grade or (max(letters, key=GRADE_LETTERS.index) if letters else None)
+        self.max_passes = max_passes
+        self.passes = 0
+        self.tokens = 0
+        self.improved = False
+        self.stop_reason: Optional[str] = None
+        self.exact_match = False
+        self._best: Optional[Tuple[int, int]] = None
+        self._stale = 0
+        self._generation_tokens = 0
+        self._validation_tokens = 0
+
+    def accepts(self, grade: ValidationGrade) -> bool:
+        """Whether a grade ends the loop: an allowed grade, or VALID with a letter at or above min_grade."""
+        if not grade.valid:
+            return False
+        if _normalize(grade.label) in self.allowed:
+            return True
+        return bool(grade.letter and self.min_grade and GRADE_LETTERS.index(grade.letter) <= GRADE_LETTERS.index(self.min_grade))
+
+    def generated(self, tokens: int) -> None:
+        """Record the tokens of an initial or revised report."""
+        self.tokens += tokens
+        self._generation_tokens = tokens
+
+    def validated(self, reply: str, grade: ValidationGrade, tokens: int) -> Optional[str]:
+        """
+        Record a validation pass.
+
+        Args:
+            reply (str): The raw reply (to tell whether the old exact-match check would have accepted it).
+            grade (ValidationGrade): The parsed reply.
+            tokens (int): Tokens of the validation call.
+        Returns:
+            Optional[str]: ACCEPTED, NO_IMPROVEMENT, TOKEN_CAP or MAX_PASSES, or None if the report should be revised.
+        """
+        self.passes += 1
+        self.tokens += tokens
+        self._validation_tokens = tokens
+        score = (grade.rank, -grade.issues)
+        self.improved = self._best is None or score > self._best
+        if self.improved:
+            self._best, self._stale = score, 0
+        else:
+            self._stale += 1
+        if self.accepts(grade):
+            self.exact_match = _normalize(reply.strip()) in self.allowed
+            self.stop_reason = self.ACCEPTED
+        elif (self.options.max_transcript_tokens is not None
+              and self.tokens + self._generation_tokens + self._validation_tokens > self.options.max_transcript_tokens):
+            # The next revision and its validation are estimated from the last ones
+            self.stop_reason = self.TOKEN_CAP
+        elif self.passes >= self.max_passes:
+            self.stop_reason = self.MAX_PASSES
+        elif self.options.patience and self._stale >= self.options.patience:
+            self.stop_reason = self.NO_IMPROVEMENT
+        return self.stop_reason
+
+    @property
+    def passes_saved(self) -> int:
+        """
+        Validation passes the old loop (exact grade match, no early stop) would have run on top of this one.
+
+        Early stops save every remaining pass; an acceptance only saves them if the
+        reply was not an exact allowed grade (such as "VALID (B)." or a graded JSON verdict).
+        """
+        if self.stop_reason in (self.NO_IMPROVEMENT, self.TOKEN_CAP) or (self.stop_reason == self.ACCEPTED and not self.exact_match):
+            return self.max_passes - self.passes
+        return 0
+
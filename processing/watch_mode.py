@@ -0,0 +1,147 @@
+"""Watch mode: keep the pipeline warm and process transcripts as they arrive"""
+import logging
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.log_context import log_context
+
+DEFAULT_POLL_INTERVAL = 1.0
+DEFAULT_DEBOUNCE_SECONDS = 2.0
+
+
+class TranscriptWatcher:
+    """
+    Poll an input directory for new or modified .txt transcripts and feed them
+    to a handler running on worker threads.
+
+    A file is queued once its size and modification time have stayed unchanged
+    for the debounce period, so transcripts that are still being copied in are
+    not picked up half-written. Polling uses only the standard library and works
+    on network shares where file-system events are unreliable.
+    """
+
+    def __init__(self, input_dir: Path, handler: Callable[[Path], object],
+                 poll_interval: float = DEFAULT_POLL_INTERVAL,
+                 debounce_seconds: float = DEFAULT_DEBOUNCE_SECONDS,
+                 reports_dir: Optional[Path] = None, workers: int = 1):
+        self.input_dir = Path(input_dir)
+        self.handler = handler
+        self.poll_interval = poll_interval
+        self.debounce_seconds = debounce_seconds
+        self.reports_dir = Path(reports_dir) if reports_dir else None
+        self.workers = workers
+        self._queue: "queue.Queue[Path]" = queue.Queue()
+        self._queued = set()
+        self._in_progress = 0
+        self._lock = threading.Lock()
+        self._seen: Dict[Path, Tuple[int, int]] = {}
+        self._candidates: Dict[Path, Tuple[Tuple[int, int], float]] = {}
+        self._stop = threading.Event()
+        self._seeded = False
+
+    @property
+    def queue_depth(self) -> int:
+        """Transcripts waiting or being processed."""
+        with self._lock:
+            return len(self._queued) + self._in_progress
+
+    def _report_is_current(self, path: Path, signature: Tuple[int, int]) -> bool:
+        if self.reports_dir is None:
+            return False
+        report = self.reports_dir / f"{path.stem}_analysis.md"
+        return report.exists() and report.stat().st_mtime_ns >= signature[1]
+
+    def scan(self, now: Optional[float] = None) -> List[Path]:
+        """
+        Check the input directory once and queue files that are new, changed and settled.
+
+        On the first scan, files whose report is already newer than the transcript
+        are treated as processed.
+
+        Returns:
+            List[Path]: The files queued by this scan.
+        """
+        now = time.monotonic() if now is None else now
+        current = {}
+        for path in self.input_dir.glob("*.txt"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue  # Removed between listing and stat
+            current[path] = (stat.st_size, stat.st_mtime_ns)
+        if not self._seeded:
+            self._seeded = True
+            for path, signature in current.items():
+                if self._report_is_current(path, signature):
+                    self._seen[path] = signature
+        for path in list(self._candidates):
+            if path not in current:
+                del self._candidates[path]
+        queued = []
+        for path, signature in current.items():
+            if self._seen.get(path) == signature:
+                continue
+            previous = self._candidates.get(path)
+            if previous is None or previous[0] != signature:
+                self._candidates[path] = (signature, now)
+                if self.debounce_seconds > 0:
+                    continue
+            elif now - previous[1] < self.debounce_seconds:
+                continue
+            del self._candidates[path]
+            self._seen[path] = signature
+            with self._lock:
+                if path in self._queued:
+                    continue
+                self._queued.add(path)
+            self._queue.put(path)
+            queued.append(path)
+        if queued:
+            logging.info("Queued %d transcript(s); queue depth %d.", len(queued), self.queue_depth)
+        return queued
+
+    def _work(self) -> None:
+        while True:
+            path = self._queue.get()
+            if path is None:
+                return
+            with self._lock:
+                self._queued.discard(path)
+                self._in_progress += 1
+            start = time.monotonic()
+            try:
+                with log_context(transcript=path.name):
+                    self.handler(path)
+                logging.info("Processed '%s' in %.1fs; queue depth %d.", path.name, time.monotonic() - start, self.queue_depth - 1)
+            except SystemExit:
+                logging.error("Processing '%s' aborted; continuing to watch.", path.name)
+            except Exception as e:
+                logging.error("Processing '%s' failed: %s", path.name, e)
+            finally:
+                with self._lock:
+                    self._in_progress -= 1
+
+    def stop(self) -> None:
+        """Ask run() to return after the transcripts already queued are processed."""
+        self._stop.set()
+
+    def run(self) -> None:
+        """Poll and process until stop() is called or the process is interrupted."""
+        threads = [threading.Thread(target=self._work, name=f"watch-worker-{i}", daemon=True) for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        logging.info("Watching '%s' for transcripts (poll %.1fs, debounce %.1fs).", self.input_dir, self.poll_interval, self.debounce_seconds)
+        try:
+            while not self._stop.is_set():
+                self.scan()
+                self._stop.wait(self.poll_interval)
+        except KeyboardInterrupt:
+            logging.info("Watch mode interrupted; finishing %d queued transcript(s).", self.queue_depth)
+        finally:
+            for _ in threads:
+                self._queue.put(None)
+            for thread in threads:
+                thread.join()
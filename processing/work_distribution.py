@@ -0,0 +1,232 @@
+"""Work distribution across worker hosts sharing one output directory"""
+import hashlib
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+JOB_QUEUE_FILE = ".job_queue.sqlite"
+DEFAULT_LEASE_SECONDS = 300
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """
+    Parse a shard specification of the form 'i/N' (0-based index).
+
+    Args:
+        spec (str): The shard specification, e.g. '0/4'.
+    Returns:
+        Tuple[int, int]: The shard index and shard count.
+    Raises:
+        ValueError: If the specification is malformed or out of range.
+    """
+    try:
+        index_text, count_text = spec.split("/")
+        index, count = int(index_text), int(count_text)
+    except ValueError:
+        raise ValueError(f"Invalid shard '{spec}': expected 'i/N', e.g. '0/4'.")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard '{spec}': index must be in [0, {count}).")
+    return index, count
+
+
+def shard_of(name: str, count: int) -> int:
+    """Stable shard assignment for a file name, identical on every host."""
+    digest = hashlib.sha1(name.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count
+
+
+def select_shard(files: Iterable[Path], index: int, count: int) -> List[Path]:
+    """
+    Select the files belonging to one shard.
+
+    Assignment depends only on the file name, so hosts that list the directory
+    in different orders still agree on the split.
+
+    Args:
+        files (Iterable[Path]): All transcript files.
+        index (int): This worker's shard index.
+        count (int): Total number of shards.
+    Returns:
+        List[Path]: The files assigned to this shard.
+    """
+    return [f for f in files if shard_of(f.name, count) == index]
+
+
+def default_worker_id() -> str:
+    """Worker identifier unique across hosts sharing the queue."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class JobQueue:
+    """
+    Lease-based job queue stored in a SQLite database in the output directory.
+
+    Workers claim transcripts with expiring leases and heartbeat while they work.
+    A lease released on error, or left to expire after a crash, makes the job
+    claimable again until max_attempts is reached. The rollback journal (not WAL)
+    is used so the database stays safe on network file systems that honour locks.
+    """
+
+    def __init__(self, db_path: Path, lease_seconds: int = DEFAULT_LEASE_SECONDS,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.db_path = Path(db_path)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " name TEXT PRIMARY KEY,"
+                " fingerprint TEXT NOT NULL,"
+                " status TEXT NOT NULL DEFAULT 'pending',"
+                " worker TEXT,"
+                " lease_expires REAL,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " updated REAL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=DELETE")
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def enqueue(self, files: Iterable[Path]) -> None:
+        """
+        Add transcripts to the queue.
+
+        A transcript already in the queue is reset to pending only when its
+        size or modification time changed since it was enqueued, so finished
+        work is not repeated by later workers.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            for path in files:
+                stat = path.stat()
+                fingerprint = f"{stat.st_size}:{stat.st_mtime_ns}"
+                row = conn.execute("SELECT fingerprint FROM jobs WHERE name = ?", (path.name,)).fetchone()
+                if row is None:
+                    conn.execute("INSERT INTO jobs (name, fingerprint, updated) VALUES (?, ?, ?)",
+                                 (path.name, fingerprint, now))
+                elif row[0] != fingerprint:
+                    conn.execute(
+                        "UPDATE jobs SET fingerprint = ?, status = 'pending', worker = NULL,"
+                        " lease_expires = NULL, attempts = 0, updated = ? WHERE name = ?",
+                        (fingerprint, now, path.name))
+
+    def claim(self, worker_id: str) -> Optional[str]:
+        """
+        Claim the next pending or expired job.
+
+        Expired leases that have used up max_attempts are marked failed first.
+
+        Returns:
+            Optional[str]: The claimed transcript name, or None if nothing is claimable.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', worker = NULL, lease_expires = NULL, updated = ?"
+                " WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, now, self.max_attempts))
+            row = conn.execute(
+                "SELECT name FROM jobs WHERE attempts < ? AND"
+                " (status = 'pending' OR (status = 'leased' AND lease_expires < ?))"
+                " ORDER BY updated, name LIMIT 1",
+                (self.max_attempts, now)).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'leased', worker = ?, lease_expires = ?,"
+                " attempts = attempts + 1, updated = ? WHERE name = ?",
+                (worker_id, now + self.lease_seconds, now, row[0]))
+            return row[0]
+
+    def heartbeat(self, name: str, worker_id: str) -> bool:
+        """Extend a lease. Returns False if the lease was lost to another worker."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE name = ? AND worker = ? AND status = 'leased'",
+                (time.time() + self.lease_seconds, name, worker_id))
+            return cursor.rowcount == 1
+
+    def complete(self, name: str, worker_id: str) -> None:
+        """Mark a leased job as done."""
+        self._finish(name, worker_id, "done")
+
+    def release(self, name: str, worker_id: str, failed: bool = False) -> None:
+        """
+        Give up a lease, returning the job to the queue while attempts remain.
+
+        A job that has used up max_attempts, or is released with failed=True, is marked failed.
+        """
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = CASE WHEN ? OR attempts >= ? THEN 'failed' ELSE 'pending' END,"
+                " worker = NULL, lease_expires = NULL, updated = ? WHERE name = ? AND worker = ?",
+                (failed, self.max_attempts, time.time(), name, worker_id))
+
+    def _finish(self, name: str, worker_id: str, status: str) -> None:
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker = NULL, lease_expires = NULL, updated = ?"
+                " WHERE name = ? AND worker = ?",
+                (status, time.time(), name, worker_id))
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status."""
+        conn = self._connect()
+        try:
+            return dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        finally:
+            conn.close()
+
+    @contextmanager
+    def lease(self, name: str, worker_id: str) -> Iterator[None]:
+        """
+        Hold a claimed lease for the duration of the block.
+
+        A background thread heartbeats at a third of the lease period. The job is
+        marked done if the block completes and released back to the queue if it
+        raises (including SystemExit from user-facing errors).
+        """
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(self.lease_seconds / 3):
+                if not self.heartbeat(name, worker_id):
+                    logging.warning("Lease on '%s' was lost by worker %s.", name, worker_id)
+                    return
+
+        thread = threading.Thread(target=beat, name=f"lease-{name}", daemon=True)
+        thread.start()
+        try:
+            yield
+        except BaseException:
+            stop.set()
+            thread.join()
+            self.release(name, worker_id)
+            raise
+        stop.set()
+        thread.join()
+        self.complete(name, worker_id)
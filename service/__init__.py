@@ -0,0 +1 @@
+"""Service module for MCEM Interview Processing"""
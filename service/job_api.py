@@ -0,0 +1,307 @@
+"""Local HTTP job API for submitting transcripts and polling results"""
+import json
+import logging
+import queue
+import re
+import shutil
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from utils.log_context import log_context
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+DEFAULT_QUEUE_SIZE = 16
+DEFAULT_WORKERS = 2
+MAX_BODY_BYTES = 20 * 1024 * 1024
+DEFAULT_RETENTION_SECONDS = 24 * 3600
+DEFAULT_MAX_FINISHED_JOBS = 500
+RETRY_AFTER_SECONDS = 30
+
+DOCX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+JOB_OUTPUTS = {
+    "report": ("_analysis.md", "text/markdown; charset=utf-8"),
+    "docx": ("_analysis.docx", DOCX_CONTENT_TYPE),
+    "json": ("_analysis.json", "application/json; charset=utf-8"),
+    "validation": ("_llm_validation.md", "text/markdown; charset=utf-8"),
+}
+_SAFE_NAME = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+@dataclass
+class Job:
+    """A submitted analysis job and where its outputs are written."""
+    id: str
+    name: str
+    template: str
+    job_dir: Path
+    status: str = "queued"
+    error: Optional[str] = None
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+
+    @property
+    def transcript_file(self) -> Path:
+        return self.job_dir / f"{self.name}.txt"
+
+    def output_path(self, kind: str) -> Path:
+        return self.job_dir / f"{self.name}{JOB_OUTPUTS[kind][0]}"
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "template": self.template,
+            "status": self.status,
+            "error": self.error,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "outputs": {kind: f"/jobs/{self.id}/{kind}" for kind in JOB_OUTPUTS if self.output_path(kind).exists()},
+        }
+
+
+class JobManager:
+    """
+    Bounded job queue drained by worker threads that share one warm pipeline.
+
+    Args:
+        process (Callable[[Path, str], bool]): Processes a transcript file with the named
+            template, writing outputs next to it. Returns True on success.
+        jobs_dir (Path): Directory under which each job gets its own folder.
+        templates (Iterable[str]): Template names clients may request.
+        default_template (str): Template used when a job does not name one.
+        queue_size (int): Maximum number of jobs waiting to run.
+        workers (int): Number of jobs processed concurrently.
+        retention_seconds (float): How long a finished job and its folder are kept.
+        max_finished (int): Finished jobs kept at most; the oldest are removed first.
+    """
+
+    def __init__(self, process: Callable[[Path, str], bool], jobs_dir: Path, templates, default_template: str,
+                 queue_size: int = DEFAULT_QUEUE_SIZE, workers: int = DEFAULT_WORKERS,
+                 retention_seconds: float = DEFAULT_RETENTION_SECONDS, max_finished: int = DEFAULT_MAX_FINISHED_JOBS):
+        self.process = process
+        self.jobs_dir = Path(jobs_dir)
+        self.templates = set(templates)
+        self.default_template = default_template
+        self.workers = workers
+        self.retention_seconds = retention_seconds
+        self.max_finished = max_finished
+        self._queue: "queue.Queue[Optional[Job]]" = queue.Queue(maxsize=queue_size)
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self) -> None:
+        """Start the worker threads."""
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def shutdown(self) -> None:
+        """Stop the workers after the jobs already queued are processed."""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, transcript: str, template: Optional[str] = None, name: Optional[str] = None) -> Job:
+        """
+        Enqueue a transcript for analysis.
+
+        Raises:
+            ValueError: If the transcript is empty or the template is unknown.
+            QueueFullError: If the queue is at capacity.
+        """
+        if not transcript.strip():
+            raise ValueError("Transcript text is empty.")
+        template = template or self.default_template
+        if template not in self.templates:
+            raise ValueError(f"Unknown template '{template}'. Available: {', '.join(sorted(self.templates))}")
+        self._expire()
+        job_id = uuid.uuid4().hex
+        # Names double as file stems; default to a unique one so concurrent jobs never share prompt dumps
+        safe_name = _SAFE_NAME.sub("_", name or "").strip("._") or f"transcript_{job_id[:8]}"
+        job = Job(id=job_id, name=safe_name, template=template, job_dir=self.jobs_dir / job_id)
+        job.job_dir.mkdir(parents=True, exist_ok=True)
+        job.transcript_file.write_text(transcript, encoding="utf-8")
+        with self._lock:
+            self._jobs[job_id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job_id]
+            job.transcript_file.unlink()
+            job.job_dir.rmdir()
+            raise QueueFullError("Job queue is full; retry later.")
+        logging.info("Job %s queued for '%s' (queue depth %d).", job_id, safe_name, self.queue_depth)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _expire(self) -> None:
+        """Forget finished jobs past their retention (or beyond max_finished) and delete their folders."""
+        cutoff = time.time() - self.retention_seconds
+        with self._lock:
+            finished = sorted((job for job in self._jobs.values() if job.finished is not None), key=lambda job: job.finished)
+            excess = max(0, len(finished) - self.max_finished)
+            expired = [job for i, job in enumerate(finished) if i < excess or job.finished <= cutoff]
+            for job in expired:
+                del self._jobs[job.id]
+        for job in expired:
+            shutil.rmtree(job.job_dir, ignore_errors=True)
+        if expired:
+            logging.info("Removed %d finished job(s) past retention.", len(expired))
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            job.status = "running"
+            job.started = time.time()
+            try:
+                with log_context(transcript=job.transcript_file.name):
+                    ok = self.process(job.transcript_file, job.template)
+                job.status = "done" if ok else "failed"
+                if not ok:
+                    job.error = "Report generation failed; see validation feedback and server log."
+            except SystemExit:
+                job.status = "failed"
+                job.error = "Processing aborted; see server log."
+            except Exception as e:
+                job.status = "failed"
+                job.error = str(e)
+            job.finished = time.time()
+            logging.info("Job %s %s in %.1fs.", job.id, job.status, job.finished - job.started)
+            self._expire()
+
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    """
+    Routes:
+        POST /jobs                      Submit {"transcript": ..., "template": ..., "name": ...}
+                                        (or a text/plain transcript body). 202, 400, 413 or 429.
+                                        Finished jobs are removed after the manager's retention.
+        GET  /jobs/<id>                 Job status.
+        GET  /jobs/<id>/report          Markdown report.
+        GET  /jobs/<id>/docx            Word report.
+        GET  /jobs/<id>/json            Structured report (participants, quotes, ratings, ...).
+        GET  /jobs/<id>/validation      LLM validation feedback.
+        GET  /health                    Queue depth and available templates.
+    """
+    manager: JobManager = None  # Set by make_server
+
+    def log_message(self, format, *args):
+        logging.debug("%s - %s", self.address_string(), format % args)
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, payload: Dict, headers: Optional[Dict[str, str]] = None) -> None:
+        self._send(status, json.dumps(payload).encode("utf-8"), "application/json", headers)
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/jobs":
+            return self._send_json(HTTPStatus.NOT_FOUND, {"error": "Not found"})
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            return self._send_json(HTTPStatus.BAD_REQUEST, {"error": "Invalid Content-Length"})
+        if length > MAX_BODY_BYTES:
+            return self._send_json(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": f"Body exceeds {MAX_BODY_BYTES} bytes"})
+        body = self.rfile.read(length).decode("utf-8", errors="replace")
+        if self.headers.get_content_type() == "application/json":
+            try:
+                payload = json.loads(body or "{}")
+            except ValueError:
+                return self._send_json(HTTPStatus.BAD_REQUEST, {"error": "Invalid JSON"})
+            if not isinstance(payload, dict) or not isinstance(payload.get("transcript"), str):
+                return self._send_json(HTTPStatus.BAD_REQUEST, {"error": "'transcript' (string) is required"})
+        else:
+            payload = {"transcript": body}
+        try:
+            job = self.manager.submit(payload["transcript"], payload.get("template"), payload.get("name"))
+        except QueueFullError as e:
+            return self._send_json(HTTPStatus.TOO_MANY_REQUESTS, {"error": str(e)}, {"Retry-After": str(RETRY_AFTER_SECONDS)})
+        except ValueError as e:
+            return self._send_json(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+        self._send_json(HTTPStatus.ACCEPTED, job.to_dict(), {"Location": f"/jobs/{job.id}"})
+
+    def do_GET(self):
+        parts = [part for part in self.path.split("?")[0].split("/") if part]
+        if parts == ["health"]:
+            return self._send_json(HTTPStatus.OK, {"queue_depth": self.manager.queue_depth,
+                                                   "templates": sorted(self.manager.templates)})
+        if len(parts) not in (2, 3) or parts[0] != "jobs":
+            return self._send_json(HTTPStatus.NOT_FOUND, {"error": "Not found"})
+        job = self.manager.get(parts[1])
+        if job is None:
+            return self._send_json(HTTPStatus.NOT_FOUND, {"error": "Unknown job"})
+        if len(parts) == 2:
+            return self._send_json(HTTPStatus.OK, job.to_dict())
+        kind = parts[2]
+        if kind not in JOB_OUTPUTS:
+            return self._send_json(HTTPStatus.NOT_FOUND, {"error": "Not found"})
+        path = job.output_path(kind)
+        if not path.exists():
+            status = HTTPStatus.CONFLICT if job.status in ("queued", "running") else HTTPStatus.NOT_FOUND
+            return self._send_json(status, {"error": f"'{kind}' is not available", "status": job.status})
+        self._send(HTTPStatus.OK, path.read_bytes(), JOB_OUTPUTS[kind][1])
+
+
+def make_server(manager: JobManager, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    """
+    Create the HTTP server for a job manager. Call serve_forever() to run it.
+
+    Args:
+        manager (JobManager): The job manager requests are routed to.
+        host (str): Interface to bind; defaults to localhost only.
+        port (int): Port to bind (0 picks a free port).
+    Returns:
+        ThreadingHTTPServer: The bound server.
+    """
+    handler = type("BoundJobRequestHandler", (JobRequestHandler,), {"manager": manager})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def serve(manager: JobManager, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> None:
+    """Run the job API until interrupted."""
+    server = make_server(manager, host, port)
+    manager.start()
+    logging.info("Job API listening on http://%s:%d (workers %d).", host, server.server_address[1], manager.workers)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logging.info("Job API interrupted; finishing %d queued job(s).", manager.queue_depth)
+    finally:
+        server.server_close()
+        manager.shutdown()
@@ -1,3 +1,14 @@
 import pytest
+import tiktoken
 
 # You can add shared fixtures here if needed in the future.
+
+
+@pytest.fixture(scope="session")
+def byte_encoding():
+    """A small byte-level BPE encoding, so tests do not need to download cl100k_base."""
+    ranks = {bytes([i]): i for i in range(256)}
+    for rank, merge in enumerate([b"th", b"he", b"in", b"er", b"an", b"ll", b"the"], 256):
+        ranks[merge] = rank
+    return tiktoken.Encoding(name="test_bytes", pat_str=r"""'s|\s*[\r\n]+|\s+(?!\S)|\s+|\w+|[^\s\w]+""",
+                             mergeable_ranks=ranks, special_tokens={})
@@ -47,3 +47,162 @@ def test_old_report_files_deleted(tmp_path, monkeypatch):
     # For .docx, just check existence
     docx_file = reports_dir / "transcript_analysis.docx"
     assert docx_file.exists()
+
+
+def test_queue_workers_split_transcripts(tmp_path, monkeypatch):
+    # Two workers draining one queue process each transcript exactly once
+    from processing.work_distribution import JobQueue
+    transcripts_dir = tmp_path / "transcripts"
+    transcripts_dir.mkdir()
+    for i in range(4):
+        (transcripts_dir / f"t{i}.txt").write_text(f"Transcript {i}")
+    reports_dir = tmp_path / "reports"
+    reports_dir.mkdir()
+    processed = []
+    monkeypatch.setattr(batch_processing, "process_single_transcript",
+                        lambda client, template, reports_dir, transcript_file, *args, **kwargs: processed.append(transcript_file.name) or True)
+    queue = JobQueue(reports_dir / "queue.sqlite")
+    for worker in ["vm-a", "vm-b"]:
+        batch_processing.process_all_transcripts(MagicMock(), "Template", reports_dir, input_dir=str(transcripts_dir),
+                                                 job_queue=queue, worker_id=worker)
+    assert sorted(processed) == [f"t{i}.txt" for i in range(4)]
+    assert queue.counts() == {"done": 4}
+
+
+def test_failed_queue_job_retried_until_max_attempts(tmp_path, monkeypatch):
+    from processing.work_distribution import JobQueue
+    transcripts_dir = tmp_path / "transcripts"
+    transcripts_dir.mkdir()
+    for name in ["flaky", "broken"]:
+        (transcripts_dir / f"{name}.txt").write_text(f"Transcript {name}")
+    reports_dir = tmp_path / "reports"
+    reports_dir.mkdir()
+    attempts = []
+    monkeypatch.setattr(batch_processing, "process_single_transcript",
+                        lambda client, template, reports_dir, transcript_file, *args, **kwargs:
+                        attempts.append(transcript_file.stem) or (transcript_file.stem == "flaky" and attempts.count("flaky") == 2))
+    queue = JobQueue(reports_dir / "queue.sqlite", max_attempts=3)
+    batch_processing.process_all_transcripts(MagicMock(), "Template", reports_dir, input_dir=str(transcripts_dir),
+                                             job_queue=queue, worker_id="vm-a")
+    assert (attempts.count("flaky"), attempts.count("broken")) == (2, 3)
+    assert queue.counts() == {"done": 1, "failed": 1}
+
+
+def test_user_error_fails_queue_job_without_exiting(tmp_path, monkeypatch):
+    from processing.work_distribution import JobQueue
+    transcripts_dir = tmp_path / "transcripts"
+    transcripts_dir.mkdir()
+    for name in ["huge", "small"]:
+        (transcripts_dir / f"{name}.txt").write_text(f"Transcript {name}")
+    reports_dir = tmp_path / "reports"
+    reports_dir.mkdir()
+    attempts = []
+
+    def process(client, template, reports_dir, transcript_file, *args, **kwargs):
+        attempts.append(transcript_file.stem)
+        if transcript_file.stem == "huge":
+            raise SystemExit(1)  # log_user_error, e.g. for an oversized transcript
+        return True
+
+    monkeypatch.setattr(batch_processing, "process_single_transcript", process)
+    queue = JobQueue(reports_dir / "queue.sqlite")
+    for worker in ["vm-a", "vm-b"]:
+        batch_processing.process_all_transcripts(MagicMock(), "Template", reports_dir, input_dir=str(transcripts_dir),
+                                                 job_queue=queue, worker_id=worker)
+    assert sorted(attempts) == ["huge", "small"]
+    assert queue.counts() == {"done": 1, "failed": 1}
+
+
+def test_several_templates_share_transcript(tmp_path, monkeypatch, byte_encoding):
+    # Each transcript is loaded once and analyzed with every template into template-qualified outputs
+    from processing import token_index, transcript_processing
+    monkeypatch.setattr(token_index, "_cache", token_index.TokenIndexCache(encoding=byte_encoding))
+    monkeypatch.setattr(transcript_processing, "count_tokens", lambda text: len(text.split()))
+    monkeypatch.setattr(batch_processing, "convert_markdown_to_docx", MagicMock())
+    loads = []
+    load_transcript = batch_processing.load_transcript
+    monkeypatch.setattr(batch_processing, "load_transcript", lambda path, *args: loads.append(path.name) or load_transcript(path, *args))
+    transcripts_dir = tmp_path / "transcripts"
+    transcripts_dir.mkdir()
+    for i in range(2):
+        (transcripts_dir / f"t{i}.txt").write_text(f"Interviewer: question {i}\nAlex: answer {i}\n")
+    reports_dir = tmp_path / "reports"
+    reports_dir.mkdir()
+    client = MagicMock()
+    client.chat.completions.create.return_value.choices[0].message.content = "VALID"
+    client.chat.completions.create.return_value.choices[0].finish_reason = "stop"
+    summary = batch_processing.RunSummary()
+    try:
+        batch_processing.process_all_transcripts(client, "Default", reports_dir, input_dir=str(transcripts_dir), summary=summary,
+                                                 budget=batch_processing.TokenBudget(),
+                                                 templates={"Pricing": "Pricing lens", "Onboarding": "Onboarding lens"})
+    finally:
+        # Prompts are saved to the project reports/ directory
+        for path in (Path(transcript_processing.__file__).resolve().parent.parent / "reports").glob("t[01]_*_prompt*.txt"):
+            path.unlink()
+    assert sorted(loads) == ["t0.txt", "t1.txt"]
+    for i in range(2):
+        for name in ["Pricing", "Onboarding"]:
+            assert (reports_dir / f"t{i}_{name}_analysis.md").exists()
+            assert (reports_dir / f"t{i}_{name}_llm_validation.md").exists()
+        assert not (reports_dir / f"t{i}_analysis.md").exists()
+    assert summary.get("Transcripts processed") == 2
+    # One initial and one validation call per transcript and template
+    assert summary.get("Template 'Pricing'").startswith("2 report(s), 0 failed")
+    assert "4 LLM calls" in summary.get("Template 'Onboarding'")
+
+
+def test_recursive_batch_rejects_repeated_file_names(tmp_path, monkeypatch):
+    from utils.settings import Settings
+    transcripts_dir = tmp_path / "transcripts"
+    (transcripts_dir / "2024").mkdir(parents=True)
+    for name in ["t001.txt", "2024/t001.txt"]:
+        (transcripts_dir / name).write_text("Transcript")
+    processed = []
+    monkeypatch.setattr(batch_processing, "process_single_transcript", lambda *args, **kwargs: processed.append(args) or True)
+    settings = Settings.from_sources({"processing": {"ingestion": {"recursive": True}}}, env={})
+    with pytest.raises(SystemExit):
+        batch_processing.process_all_transcripts(MagicMock(), "Template", tmp_path / "reports", input_dir=str(transcripts_dir),
+                                                 settings=settings)
+    assert processed == []
+
+
+def test_streaming_batch_memory_ceiling(tmp_path, monkeypatch, byte_encoding):
+    # A large chunked corpus, discovered lazily and recursively, is processed without holding it in memory
+    import tracemalloc
+    from types import SimpleNamespace
+    from processing import token_budget, token_index
+    from utils.settings import Settings
+    monkeypatch.setattr(token_index, "_cache", token_index.TokenIndexCache(encoding=byte_encoding))
+    monkeypatch.setattr(token_index, "MEMORY_ENTRIES", 2)
+    monkeypatch.setattr(token_budget, "count_tokens", lambda text: len(text) // 4)
+    transcripts_dir = tmp_path / "transcripts"
+    (transcripts_dir / "2024").mkdir(parents=True)
+    line = "Alex: The onboarding took longer than we planned, mostly waiting on licences.\n"
+    transcript = line * (50_000 // len(line))
+    count = 200
+    for i in range(count):
+        (transcripts_dir / ("2024" if i % 2 else "") / f"t{i:03d}.txt").write_text(transcript, encoding="utf-8")
+    reports_dir = tmp_path / "reports"
+    reports_dir.mkdir()
+
+    def create(messages, **kwargs):
+        # Plain function rather than a mock, which would keep every prompt in its call history
+        choice = SimpleNamespace(message=SimpleNamespace(content="Chunk analysis"), finish_reason="stop")
+        return SimpleNamespace(choices=[choice], usage=None)
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    settings = Settings.from_sources({"processing": {"ingestion": {"window": 4, "recursive": True}, "output_format": ["md"],
+                                                     "chunk_size": 20_000, "max_concurrency": 2}}, env={})
+    summary = batch_processing.RunSummary()
+    tracemalloc.start()
+    try:
+        batch_processing.process_all_transcripts(client, "Template", reports_dir, input_dir=str(transcripts_dir), summary=summary,
+                                                 settings=settings)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(list(reports_dir.glob("*_analysis.md"))) == count
+    assert summary.get("Transcripts processed") == count
+    # Planned work holds no text, so the peak is a few transcripts (and one token index build), not the corpus
+    assert peak < count * len(transcript) / 5
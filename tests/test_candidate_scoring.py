@@ -0,0 +1,109 @@
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from processing.candidate_scoring import CandidateOptions, TranscriptQuotes, rank_candidates, score_candidate, template_sections
+from utils.settings import Settings
+
+TEMPLATE = """# Analysis Template
+# Last updated: 2025-05-12
+
+# Interview Analysis – [Participant Name]
+**Executive Summary**
+## Direct Customer Quotes
+## Summary Table
+| Theme | Quote |
+|-------|-------|
+"""
+TRANSCRIPT = "Interviewer: How is pricing?\nAlex: The price is higher than we expected.\nAlex: Support was slow to respond."
+GOOD = """# Interview Analysis
+**Executive Summary**
+Pricing and support.
+## Direct Customer Quotes
+- "The price is higher than we expected."
+- "Support was slow to respond."
+## Summary Table
+| Theme | Quote |
+|-------|-------|
+| Pricing | "The price is higher than we expected." |
+"""
+WEAK = """# Interview Analysis
+- "Prices are far too high for us."
+"""
+
+
+def test_template_sections():
+    assert template_sections(TEMPLATE) == ["analysis template", "interview analysis", "executive summary", "direct customer quotes",
+                                           "summary table"]
+
+
+def test_score_candidate():
+    score = score_candidate(GOOD, TranscriptQuotes(TRANSCRIPT), template_sections(TEMPLATE), True)
+    assert score.quote_coverage == pytest.approx(2 / 3)
+    assert score.quote_accuracy == 1.0
+    assert score.sections == pytest.approx(4 / 5)
+    assert score.tables == 1.0
+    weak = score_candidate(WEAK, TranscriptQuotes(TRANSCRIPT), template_sections(TEMPLATE), True)
+    # The paraphrased quote is not in the transcript
+    assert weak.quote_accuracy == 0.0
+    assert weak.tables == 0.0
+    assert weak.total < score.total
+
+
+def test_rank_candidates_prefers_first_on_ties():
+    best, scores = rank_candidates([WEAK, GOOD, GOOD], TRANSCRIPT, TEMPLATE)
+    assert best == 1
+    assert len(scores) == 3
+
+
+def test_invalid_options():
+    with pytest.raises(ValueError):
+        CandidateOptions.from_config({"processing": {"candidates": {"count": 0}}})
+    with pytest.raises(ValueError):
+        CandidateOptions.from_config({"processing": {"candidates": {"mode": "batch"}}})
+
+
+@pytest.mark.parametrize("mode", ["parallel", "n"])
+def test_process_transcript_validates_best_candidate(tmp_path, monkeypatch, mode):
+    from processing import token_budget, transcript_processing
+    monkeypatch.setattr(transcript_processing, "count_tokens", lambda text: len(text.split()))
+    monkeypatch.setattr(token_budget, "count_tokens", lambda text: len(text.split()))
+    monkeypatch.setattr(transcript_processing, "token_index", lambda text: SimpleNamespace(count=len(text.split())))
+    lock = threading.Lock()
+    candidates = iter([WEAK, GOOD, WEAK])
+    reports_seen = []
+
+    def create(messages, n=1, **kwargs):
+        prompt = messages[-1]["content"]
+        if prompt.startswith("VALIDATE"):
+            reports_seen.append(prompt)
+            contents = ["VALID"]
+        else:
+            with lock:
+                contents = [next(candidates) for _ in range(n)]
+        choices = [SimpleNamespace(message=SimpleNamespace(content=content), finish_reason="stop") for content in contents]
+        return SimpleNamespace(choices=choices, usage=SimpleNamespace(prompt_tokens=10, completion_tokens=5 * n))
+
+    client = MagicMock()
+    client.chat.completions.create.side_effect = create
+    prompts = {"initial": "{transcript} {template}", "validation": "VALIDATE {report}",
+               "revision": "{transcript} {template} {prev_report} {issues}", "system": "system"}
+    settings = Settings.from_sources({"processing": {"candidates": {"count": 3, "mode": mode}}}, env={})
+    transcript = tmp_path / "candidate_scoring_best.txt"
+    transcript.write_text(TRANSCRIPT)
+    feedback_file = tmp_path / "feedback.md"
+    try:
+        report, feedback = transcript_processing.process_transcript(
+            transcript, TEMPLATE, client, feedback_file_path=feedback_file, prompts=prompts, budget=token_budget.TokenBudget(),
+            transcript_text=TRANSCRIPT, settings=settings)
+    finally:
+        for path in (Path(transcript_processing.__file__).resolve().parent.parent / "reports").glob("candidate_scoring_best_*"):
+            path.unlink()
+    assert report == GOOD
+    assert reports_seen == [f"VALIDATE {GOOD}"]
+    assert client.chat.completions.create.call_count == (4 if mode == "parallel" else 2)
+    assert "### Initial Candidates" in feedback
+    assert "(selected)" in feedback_file.read_text(encoding="utf-8")
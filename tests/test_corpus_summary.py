@@ -0,0 +1,98 @@
+from unittest.mock import MagicMock
+from processing import corpus_summary
+from processing.corpus_summary import CorpusSummarizer, build_corpus_summary, collect_reports
+from processing.token_budget import TokenBudget
+
+PROMPT = "Summarize {count}:\n{reports}"
+
+
+def _client():
+    client = MagicMock()
+
+    def create(**kwargs):
+        response = MagicMock()
+        response.choices[0].message.content = "SUMMARY[" + kwargs["messages"][1]["content"].count("===") // 2 * "x" + "]"
+        response.choices[0].finish_reason = "stop"
+        return response
+
+    client.chat.completions.create.side_effect = create
+    return client
+
+
+def _reports(count):
+    return [(f"interview_{i:02d}", f"Report {i}") for i in range(count)]
+
+
+def test_tree_uses_bounded_fan_in(tmp_path):
+    client = _client()
+    summarizer = CorpusSummarizer(client, TokenBudget(), PROMPT, tmp_path, fan_in=3)
+    summarizer.summarize(_reports(7))
+    # 7 leaves -> 3 nodes -> 1 root
+    assert summarizer.calls == 4
+    for call in client.chat.completions.create.call_args_list:
+        assert call[1]["messages"][1]["content"].count("===") // 2 <= 3
+
+
+def test_only_changed_path_recomputed(tmp_path):
+    reports = _reports(9)
+    CorpusSummarizer(_client(), TokenBudget(), PROMPT, tmp_path, fan_in=3).summarize(reports)
+    reports[4] = ("interview_04", "Re-analyzed report")
+    summarizer = CorpusSummarizer(_client(), TokenBudget(), PROMPT, tmp_path, fan_in=3)
+    summarizer.summarize(reports)
+    # One leaf group plus the root are recomputed; the other two groups come from the cache
+    assert summarizer.calls == 2
+    assert summarizer.cache_hits == 2
+
+
+def test_unchanged_corpus_fully_cached(tmp_path):
+    reports = _reports(4)
+    first = CorpusSummarizer(_client(), TokenBudget(), PROMPT, tmp_path, fan_in=2).summarize(reports)
+    summarizer = CorpusSummarizer(_client(), TokenBudget(), PROMPT, tmp_path, fan_in=2)
+    assert summarizer.summarize(reports) == first
+    assert summarizer.calls == 0
+
+
+def test_build_corpus_summary_writes_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(corpus_summary, "convert_markdown_to_docx", MagicMock())
+    for name, text in _reports(2):
+        (tmp_path / f"{name}_analysis.md").write_text(text)
+    summary_file = build_corpus_summary(_client(), tmp_path)
+    assert summary_file == tmp_path / "corpus_summary.md"
+    assert summary_file.read_text().startswith("SUMMARY")
+
+
+def test_build_corpus_summary_without_reports(tmp_path):
+    assert build_corpus_summary(MagicMock(), tmp_path) is None
+
+
+def test_lone_summary_passed_up(tmp_path):
+    summarizer = CorpusSummarizer(_client(), TokenBudget(), PROMPT, tmp_path, fan_in=3)
+    summarizer.summarize(_reports(10))
+    # 10 leaves -> 4 nodes -> 1 node plus the lone fourth node, passed up without a call -> 1 root
+    assert summarizer.calls == 4 + 1 + 1
+
+
+def test_collect_reports_counts_each_interview_once(tmp_path):
+    from processing.deduplication import DuplicateCluster, write_deduplication_report
+    for stem in ["a", "a_again", "b"]:
+        for template in ["Pricing", "Onboarding"]:
+            (tmp_path / f"{stem}_{template}_analysis.md").write_text(f"{template} report of {stem}")
+    write_deduplication_report([DuplicateCluster(tmp_path / "a.txt", [(tmp_path / "a_again.txt", 0.97)])], tmp_path, 0.85)
+    assert collect_reports(tmp_path, "Pricing") == [("a", "Pricing report of a"), ("b", "Pricing report of b")]
+
+
+def test_groups_fit_the_context_window(tmp_path, monkeypatch):
+    from processing import token_budget
+    for module in (corpus_summary, token_budget):
+        monkeypatch.setattr(module, "count_tokens", lambda text: len(text.split()))
+    overhead = len((corpus_summary.SUMMARY_SYSTEM_PROMPT + PROMPT).encode("utf-8"))
+    # Room for two 100-token reports (with their framing) next to a 1024-token summary
+    budget = TokenBudget(context_window=overhead + 64 + 1024 + 250, max_completion_tokens=1024)
+    client = _client()
+    summarizer = CorpusSummarizer(client, budget, PROMPT, tmp_path, fan_in=8)
+    summarizer.summarize([(f"interview_{i}", f"word{i} " * 100) for i in range(6)])
+    # 6 leaves -> 3 pairs -> 1 root, every call with its full completion budget
+    assert summarizer.calls == 4
+    calls = client.chat.completions.create.call_args_list
+    assert [call[1]["messages"][1]["content"].count("===") // 2 for call in calls] == [2, 2, 2, 3]
+    assert all(call[1]["max_tokens"] == 1024 for call in calls)
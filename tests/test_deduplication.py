@@ -0,0 +1,88 @@
+import random
+from unittest.mock import patch
+
+import pytest
+
+from processing.batch_processing import process_all_transcripts
+from processing.deduplication import (DEDUP_REPORT_FILE, DeduplicationOptions, MinHasher, find_duplicate_clusters,
+                                      share_outputs)
+from processing.scheduler import WorkUnit
+from utils.settings import Settings
+
+VOCABULARY = ["pricing", "support", "onboarding", "dashboard", "latency", "renewal", "contract", "feature", "team",
+              "customer", "report", "export", "license", "training", "workflow", "integration", "budget", "rollout"]
+
+
+def _transcript(seed, words=400):
+    rng = random.Random(seed)
+    lines = []
+    for turn in range(words // 20):
+        speaker = "Interviewer" if turn % 2 == 0 else "Participant"
+        lines.append(f"{speaker}: " + " ".join(rng.choice(VOCABULARY) for _ in range(20)))
+    return "\n".join(lines) + "\n"
+
+
+def test_signature_estimates_similarity():
+    hasher = MinHasher()
+    text = _transcript(1)
+    assert (hasher.signature(text) == hasher.signature(text)).all()
+    assert (hasher.signature(text) == hasher.signature(_transcript(2))).mean() < 0.2
+
+
+def test_reexport_is_clustered(tmp_path):
+    original = _transcript(1)
+    # The same meeting exported again with timestamps and one edited line
+    lines = original.splitlines()
+    lines[3] = "Participant: sorry, could you repeat that"
+    reexport = "\n".join(f"[00:0{i % 10}:00] {line}" for i, line in enumerate(lines)) + "\n"
+    (tmp_path / "a.txt").write_text(original, encoding="utf-8")
+    (tmp_path / "a_copy.txt").write_text(reexport, encoding="utf-8")
+    (tmp_path / "b.txt").write_text(_transcript(2), encoding="utf-8")
+    clusters = find_duplicate_clusters(sorted(tmp_path.glob("*.txt")), threshold=0.8)
+    assert len(clusters) == 1
+    members = {clusters[0].representative.name} | {path.name for path, _ in clusters[0].duplicates}
+    assert members == {"a.txt", "a_copy.txt"}
+    assert clusters[0].duplicates[0][1] >= 0.8
+
+
+def test_share_outputs_copies_reports(tmp_path):
+    (tmp_path / "a.txt").write_text(_transcript(1), encoding="utf-8")
+    (tmp_path / "b.txt").write_text(_transcript(1), encoding="utf-8")
+    cluster = find_duplicate_clusters([tmp_path / "a.txt", tmp_path / "b.txt"])[0]
+    reports = tmp_path / "reports"
+    reports.mkdir()
+    (reports / f"{cluster.representative.stem}_analysis.md").write_text("# Report", encoding="utf-8")
+    assert share_outputs(cluster, reports) == 1
+    duplicate = cluster.duplicates[0][0]
+    assert (reports / f"{duplicate.stem}_analysis.md").read_text(encoding="utf-8") == "# Report"
+
+
+def test_options_from_config():
+    assert DeduplicationOptions.from_config({}) is None
+    assert DeduplicationOptions.from_config({"processing": {"deduplication": {"enabled": False}}}) is None
+    options = DeduplicationOptions.from_config({"processing": {"deduplication": {"enabled": True, "threshold": 0.9}}})
+    assert options.threshold == 0.9 and not options.link
+    with pytest.raises(ValueError):
+        DeduplicationOptions.from_config({"processing": {"deduplication": {"enabled": True, "threshold": 1.5}}})
+
+
+def test_batch_processes_one_per_cluster(tmp_path):
+    input_dir = tmp_path / "transcripts"
+    input_dir.mkdir()
+    reports = tmp_path / "reports"
+    reports.mkdir()
+    (input_dir / "a.txt").write_text(_transcript(1), encoding="utf-8")
+    (input_dir / "a_again.txt").write_text(_transcript(1), encoding="utf-8")
+    (input_dir / "b.txt").write_text(_transcript(2), encoding="utf-8")
+
+    def fake_process(client, template, reports_dir, transcript_file, *args, **kwargs):
+        (reports_dir / f"{transcript_file.stem}_analysis.md").write_text(transcript_file.name, encoding="utf-8")
+        return True
+
+    with patch("processing.batch_processing.process_single_transcript", side_effect=fake_process) as process, \
+            patch("processing.batch_processing.load_prompt_templates", return_value={}), \
+            patch("processing.batch_processing.plan_batch", side_effect=lambda files, **kwargs: [WorkUnit(f, 1) for f in files]):
+        process_all_transcripts(None, "template", reports, input_dir=str(input_dir), settings=Settings(deduplication=DeduplicationOptions()))
+    assert process.call_count == 2
+    assert sorted(p.name for p in reports.glob("*_analysis.md")) == ["a_again_analysis.md", "a_analysis.md", "b_analysis.md"]
+    assert (reports / DEDUP_REPORT_FILE).exists()
@@ -19,3 +19,25 @@ def test_load_analysis_template(tmp_path):
     template_file.write_text("Sample template content.")
     content = file_utils.load_analysis_template(str(template_file))
     assert content == "Sample template content."
+
+def test_discover_transcripts(tmp_path):
+    for name in ["b.txt", "a.txt", "notes.md", "2024/c.txt", "2024/q1/d.txt", ".token_index/e.txt"]:
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x")
+    found = file_utils.discover_transcripts(str(tmp_path))
+    assert not isinstance(found, list)
+    assert [p.name for p in found] == ["a.txt", "b.txt"]
+    assert [p.relative_to(tmp_path).as_posix() for p in file_utils.discover_transcripts(str(tmp_path), recursive=True)] == [
+        "a.txt", "b.txt", "2024/c.txt", "2024/q1/d.txt"]
+    assert list(file_utils.discover_transcripts(str(tmp_path / "missing"))) == []
+
+
+def test_duplicate_names(tmp_path):
+    for name in ["t001.txt", "2024/t001.txt", "2024/t002.txt", "2025/t001.txt"]:
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x")
+    duplicates = file_utils.duplicate_names(str(tmp_path))
+    assert {name: [p.relative_to(tmp_path).as_posix() for p in paths] for name, paths in duplicates.items()} == {
+        "t001.txt": ["t001.txt", "2024/t001.txt", "2025/t001.txt"]}
@@ -0,0 +1,134 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+import pytest
+from service.job_api import JobManager, QueueFullError, make_server
+
+
+def _fake_process(transcript_file, template_name):
+    stem = transcript_file.stem
+    (transcript_file.parent / f"{stem}_analysis.md").write_text(f"# Report ({template_name})\n{transcript_file.read_text()}")
+    (transcript_file.parent / f"{stem}_llm_validation.md").write_text("# LLM Validation Feedback\nVALID")
+    return True
+
+
+@pytest.fixture
+def server(tmp_path):
+    manager = JobManager(_fake_process, tmp_path / "jobs", ["AnalysisTemplate", "Custom"], "AnalysisTemplate",
+                         queue_size=2, workers=1)
+    httpd = make_server(manager, port=0)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    manager.start()
+    yield manager, f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+    manager.shutdown()
+
+
+def _request(url, data=None, content_type="application/json"):
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": content_type})
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def _wait(manager, job_id):
+    for _ in range(500):
+        if manager.get(job_id).status not in ("queued", "running"):
+            return
+        threading.Event().wait(0.01)
+
+
+def test_submit_and_fetch_report(server):
+    manager, base = server
+    status, body = _request(f"{base}/jobs", json.dumps({"transcript": "Hello", "template": "Custom", "name": "acme"}).encode())
+    assert status == 202
+    job = json.loads(body)
+    _wait(manager, job["id"])
+    status, body = _request(f"{base}/jobs/{job['id']}")
+    assert json.loads(body)["status"] == "done"
+    status, body = _request(f"{base}/jobs/{job['id']}/report")
+    assert status == 200
+    assert body.decode() == "# Report (Custom)\nHello"
+    status, body = _request(f"{base}/jobs/{job['id']}/validation")
+    assert b"VALID" in body
+    # No DOCX was produced by the fake pipeline
+    status, _ = _request(f"{base}/jobs/{job['id']}/docx")
+    assert status == 404
+
+
+def test_plain_text_submission(server):
+    manager, base = server
+    status, body = _request(f"{base}/jobs", b"Plain transcript", content_type="text/plain")
+    assert status == 202
+    assert json.loads(body)["template"] == "AnalysisTemplate"
+
+
+def test_rejects_bad_requests(server):
+    _, base = server
+    assert _request(f"{base}/jobs", b"{not json")[0] == 400
+    assert _request(f"{base}/jobs", json.dumps({"transcript": "x", "template": "../etc/passwd"}).encode())[0] == 400
+    assert _request(f"{base}/jobs/unknown")[0] == 404
+
+
+def test_backpressure_when_queue_full(tmp_path):
+    release = threading.Event()
+
+    def blocking_process(transcript_file, template_name):
+        release.wait(5)
+        return True
+
+    manager = JobManager(blocking_process, tmp_path / "jobs", ["T"], "T", queue_size=1, workers=1)
+    manager.start()
+    try:
+        first = manager.submit("one")
+        for _ in range(500):
+            if first.status == "running":
+                break
+            threading.Event().wait(0.01)
+        manager.submit("two")
+        with pytest.raises(QueueFullError):
+            manager.submit("three")
+    finally:
+        release.set()
+        manager.shutdown()
+
+
+def test_rejects_invalid_content_length(server):
+    import http.client
+    _, base = server
+    host, port = base.rsplit("/", 1)[-1].split(":")
+    for length, expected in [("abc", 400), ("-1", 400), (str(20 * 1024 * 1024 + 1), 413)]:
+        connection = http.client.HTTPConnection(host, int(port), timeout=5)
+        connection.putrequest("POST", "/jobs")
+        connection.putheader("Content-Type", "text/plain")
+        connection.putheader("Content-Length", length)
+        connection.endheaders()
+        assert connection.getresponse().status == expected
+        connection.close()
+
+
+def test_finished_jobs_expire(tmp_path):
+    manager = JobManager(_fake_process, tmp_path / "jobs", ["T"], "T", workers=1, max_finished=1)
+    manager.start()
+    try:
+        first = manager.submit("one")
+        _wait(manager, first.id)
+        second = manager.submit("two")
+        _wait(manager, second.id)
+        for _ in range(500):
+            if manager.get(first.id) is None:
+                break
+            threading.Event().wait(0.01)
+        # Only the most recent finished job is kept
+        assert manager.get(first.id) is None and not first.job_dir.exists()
+        second.finished -= manager.retention_seconds
+        third = manager.submit("three")
+        assert manager.get(second.id) is None and not second.job_dir.exists()
+        assert manager.get(third.id) is third
+    finally:
+        manager.shutdown()
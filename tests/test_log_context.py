@@ -0,0 +1,53 @@
+import json
+import logging
+import threading
+
+from utils import env_utils
+from utils.log_context import ContextFilter, JsonLinesFormatter, log_context
+
+
+def _record(message="hello %s", args=("world",)):
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, message, args, None)
+    ContextFilter().filter(record)
+    return record
+
+
+def test_context_fields_nest_and_reset():
+    with log_context(transcript="a.txt"):
+        with log_context(stage="validation", validation_pass=2):
+            record = _record()
+        outer = _record()
+    assert (record.transcript, record.stage, getattr(record, "pass")) == ("a.txt", "validation", 2)
+    assert (outer.transcript, outer.stage) == ("a.txt", None)
+    assert _record().transcript is None
+
+
+def test_context_is_per_thread():
+    seen = []
+    with log_context(transcript="main.txt"):
+        thread = threading.Thread(target=lambda: seen.append(_record().transcript))
+        thread.start()
+        thread.join()
+    assert seen == [None]
+
+
+def test_json_lines_formatter():
+    with log_context(transcript="a.txt", stage="initial"):
+        line = JsonLinesFormatter().format(_record())
+    entry = json.loads(line)
+    assert entry["message"] == "hello world"
+    assert entry["transcript"] == "a.txt" and entry["stage"] == "initial"
+    assert "pass" not in entry
+
+
+def test_setup_logging_writes_json_file(tmp_path):
+    log_file = tmp_path / "logs" / "processing.log"
+    env_utils.setup_logging("INFO", log_file=str(log_file))
+    try:
+        with log_context(transcript="interview1.txt", validation_pass=3):
+            logging.info("Validation pass %d done", 3)
+    finally:
+        env_utils.flush_logging()
+        logging.getLogger().setLevel(logging.WARNING)
+    entries = [json.loads(line) for line in log_file.read_text(encoding="utf-8").splitlines()]
+    assert {"message": "Validation pass 3 done", "transcript": "interview1.txt", "pass": 3}.items() <= entries[-1].items()
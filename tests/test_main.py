@@ -2,7 +2,7 @@
 """Tests for the main script main.py"""
 import os
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import ANY, MagicMock, patch
 
 import pytest
 
@@ -17,6 +17,8 @@ def mock_dependencies():
          patch('main.get_client') as mock_get_client, \
          patch('main.ensure_reports_dir') as mock_ensure_reports_dir, \
          patch('main.load_analysis_template') as mock_load_template, \
+         patch('main.SearchIndex'), \
+         patch('main.set_cache_dir'), \
          patch('main.process_all_transcripts') as mock_process_all:
         # Set up mock return values
         mock_load_config.return_value = {'processing': {'template_path': 'AnalysisTemplate.txt'}}
@@ -60,7 +62,14 @@ def test_main_success(mock_dependencies):
         mock_dependencies['load_template'].return_value,
         mock_dependencies['ensure_reports_dir'].return_value,
         input_dir='transcripts',
-        template_path='AnalysisTemplate.txt'
+        template_path='AnalysisTemplate.txt',
+        budget=ANY,
+        shard=None,
+        job_queue=None,
+        worker_id=ANY,
+        search_index=ANY,
+        templates=None,
+        settings=ANY
     )
 
 
@@ -78,6 +87,18 @@ def test_main_config_missing_template_path(mock_dependencies):
     mock_dependencies['load_template'].assert_called_once_with('AnalysisTemplate.txt')
 
 
+def test_main_several_templates(mock_dependencies):
+    """Several --template files are passed to the batch by file name"""
+    import sys
+    from main import main
+    mock_dependencies['load_template'].side_effect = lambda path: f"content of {path}"
+    with patch.object(sys, 'argv', ['main.py', '--template', 'AnalysisTemplate.txt', 'lenses/Pricing.txt']):
+        main()
+    kwargs = mock_dependencies['process_all'].call_args.kwargs
+    assert kwargs['template_path'] == 'AnalysisTemplate.txt'
+    assert kwargs['templates'] == {'AnalysisTemplate': 'content of AnalysisTemplate.txt', 'Pricing': 'content of lenses/Pricing.txt'}
+
+
 def test_main_env_vars_missing(mock_dependencies):
     """Test main function when environment variables are missing"""
     import sys
@@ -112,3 +133,26 @@ def test_main_pandoc_missing(mock_dependencies):
     # Verify we checked for Pandoc but didn't proceed further
     mock_dependencies['check_pandoc'].assert_called_once()
     mock_dependencies['get_client'].assert_not_called()
+
+
+def test_main_shard_and_queue(mock_dependencies, tmp_path):
+    """Test that --shard and --queue are passed through to the batch processor"""
+    import sys
+    from main import main
+    mock_dependencies['ensure_reports_dir'].return_value = tmp_path
+    with patch.object(sys, 'argv', ['main.py', '--shard', '1/3', '--queue', '--worker-id', 'vm-a']):
+        main()
+    kwargs = mock_dependencies['process_all'].call_args[1]
+    assert kwargs['shard'] == (1, 3)
+    assert kwargs['job_queue'] is not None
+    assert kwargs['worker_id'] == 'vm-a'
+
+
+def test_main_invalid_shard(mock_dependencies):
+    """Test that a malformed --shard is rejected by the argument parser"""
+    import sys
+    from main import main
+    with patch.object(sys, 'argv', ['main.py', '--shard', '3/3']):
+        with pytest.raises(SystemExit):
+            main()
+    mock_dependencies['process_all'].assert_not_called()
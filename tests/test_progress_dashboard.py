@@ -0,0 +1,63 @@
+import io
+import logging
+
+from utils.env_utils import show_progress_bar
+from utils.progress_dashboard import ProgressDashboard, active_dashboard
+
+
+class _Terminal(io.StringIO):
+    def isatty(self):
+        return True
+
+
+def test_rows_and_totals():
+    dashboard = ProgressDashboard(total=3, total_tokens=3000, live=False)
+    dashboard.begin("a.txt")
+    dashboard.begin("b.txt")
+    dashboard.update("a.txt", "LLM Self-Check & Validation", validation_pass=2)
+    lines = dashboard.render()
+    assert lines[0].startswith("Batch: 0/3 done | 0 failed | 3 remaining | 2 active")
+    assert "LLM Self-Check & Validation (pass 2)" in lines[1] and lines[2].strip().startswith("b.txt")
+    dashboard.end("a.txt", 1000, ok=True)
+    dashboard.end("b.txt", 1000, ok=False)
+    totals = dashboard.totals()
+    assert "1/3 done | 1 failed | 1 remaining | 0 active" in totals
+    assert "tokens/min" in totals and "ETA --:--" not in totals
+
+
+def test_chunks_count_tokens_but_not_transcripts():
+    dashboard = ProgressDashboard(total=1, total_tokens=200, live=False)
+    dashboard.begin("big.txt [chunk 1/2]")
+    dashboard.end("big.txt [chunk 1/2]", 100)
+    assert (dashboard.done, dashboard.failed, dashboard.tokens_done) == (0, 0, 100)
+
+
+def test_progress_bar_updates_active_dashboard():
+    with ProgressDashboard(total=1, live=False) as dashboard:
+        dashboard.begin("a.txt")
+        assert active_dashboard() is dashboard
+        show_progress_bar(3, transcript_name="a.txt\n", validation_pass=4)
+        assert "(pass 4)" in dashboard.render()[1]
+    assert active_dashboard() is None
+
+
+def test_live_dashboard_keeps_log_lines_above(monkeypatch):
+    terminal = _Terminal()
+    handler = logging.StreamHandler(terminal)
+    root = logging.getLogger()
+    root.addHandler(handler)
+    try:
+        with ProgressDashboard(total=1, stream=terminal, live=True, refresh_interval=60) as dashboard:
+            dashboard.begin("a.txt")
+            logging.getLogger().error("something went wrong")
+        output = terminal.getvalue()
+    finally:
+        root.removeHandler(handler)
+    # The dashboard is erased before the log line and redrawn after it
+    assert output.index("something went wrong") < output.rindex("a.txt")
+    assert "\x1b[" in output
+    assert handler.stream is terminal
+
+
+def test_not_live_without_terminal():
+    assert not ProgressDashboard(total=1, stream=io.StringIO()).live
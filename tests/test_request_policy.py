@@ -0,0 +1,146 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from openai import APITimeoutError
+
+from processing.request_policy import RequestPolicy, stage_of
+from processing.token_budget import TokenBudget, create_completion, template_key
+from utils.run_summary import RunSummary
+
+
+class _Timeout(APITimeoutError):
+    def __init__(self):
+        Exception.__init__(self, "Request timed out.")
+
+
+def _warm(policy, stage="validation", seconds=0.01, count=10):
+    for _ in range(count):
+        policy.record_latency(stage, seconds)
+        policy.calls += 1
+
+
+def test_stage_deadline_passed_as_timeout():
+    client = MagicMock()
+    client.chat.completions.create.return_value.choices[0].finish_reason = "stop"
+    budget = TokenBudget(policy=RequestPolicy(timeouts={"validation": 42}))
+    create_completion(client, [{"role": "user", "content": "hi"}], budget, key=template_key("T", "validation"))
+    assert client.chat.completions.create.call_args[1]["timeout"] == 42
+    assert stage_of(None) == "default" and budget.policy.timeout_for("default") == 600
+
+
+def test_timeouts_are_counted():
+    policy = RequestPolicy()
+    create = MagicMock(side_effect=_Timeout())
+    with pytest.raises(APITimeoutError):
+        policy.call(create, "validation")
+    assert policy.timed_out == 1
+
+
+def test_slow_call_is_hedged_and_backup_wins():
+    policy = RequestPolicy(hedge=True, max_hedge_fraction=1.0)
+    _warm(policy)
+    release = threading.Event()
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        if len(calls) == 1:
+            release.wait(5)  # The primary request is stuck
+            return "primary"
+        return "backup"
+
+    assert policy.call(create, "validation", messages=[]) == "backup"
+    release.set()
+    assert len(calls) == 2
+    assert (policy.hedged, policy.hedge_wins) == (1, 1)
+    summary = RunSummary()
+    policy.report(summary)
+    assert summary.get("Hedge win rate") == "1/1"
+
+
+def test_fast_call_is_not_hedged():
+    policy = RequestPolicy(hedge=True, max_hedge_fraction=1.0)
+    _warm(policy, seconds=1.0)
+    create = MagicMock(return_value="ok")
+    assert policy.call(create, "validation") == "ok"
+    assert create.call_count == 1 and policy.hedged == 0
+
+
+def test_hedging_budget_is_capped():
+    policy = RequestPolicy(hedge=True, max_hedge_fraction=0.0)
+    _warm(policy)
+
+    def create(**kwargs):
+        time.sleep(0.05)
+        return "slow"
+
+    assert policy.call(create, "validation") == "slow"
+    assert policy.hedged == 0
+
+
+def test_only_configured_stages_are_hedged():
+    policy = RequestPolicy(hedge=True, max_hedge_fraction=1.0)
+    _warm(policy, stage="initial")
+
+    def create(**kwargs):
+        time.sleep(0.05)
+        return "slow"
+
+    assert policy.call(create, "initial") == "slow"
+    assert policy.hedged == 0
+
+
+def test_abandoned_request_tokens_are_reported():
+    policy = RequestPolicy(hedge=True, max_hedge_fraction=1.0)
+    _warm(policy)
+    release = threading.Event()
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        response = MagicMock()
+        response.usage.total_tokens = 100 * len(calls)
+        if len(calls) == 1:
+            release.wait(5)
+        return response
+
+    policy.call(create, "validation")
+    release.set()
+    for _ in range(500):
+        if policy.abandoned_tokens:
+            break
+        time.sleep(0.01)
+    # The stuck primary lost to the backup but was billed when it returned
+    assert policy.abandoned_tokens == 100
+    summary = RunSummary()
+    policy.report(summary)
+    assert summary.get("Tokens billed for abandoned requests") == 100
+
+
+def test_from_config():
+    policy = RequestPolicy.from_config({"processing": {"timeouts": {"default": 30, "chunk": 10},
+                                                       "hedging": {"enabled": True, "percentile": 90}}})
+    assert policy.timeout_for("chunk") == 10 and policy.timeout_for("unknown") == 30
+    assert policy.hedge and policy.hedge_percentile == 90
+    assert policy.hedge_stages == {"validation"}
+    assert RequestPolicy.from_config({"processing": {"hedging": {"stages": ["chunk"]}}}).hedge_stages == {"chunk"}
+    assert not RequestPolicy.from_config({}).hedge
+
+
+def test_calls_beyond_a_pool_size_are_not_hedged():
+    policy = RequestPolicy(hedge=True, max_hedge_fraction=1.0)
+    _warm(policy, seconds=0.3)
+
+    def create(**kwargs):
+        time.sleep(0.1)
+        return "ok"
+
+    # With a shared pool, calls queued behind the first batch would exceed the 0.3s delay
+    threads = [threading.Thread(target=policy.call, args=(create, "validation")) for _ in range(100)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert policy.hedged == 0
@@ -0,0 +1,144 @@
+import pytest
+from unittest.mock import MagicMock
+from processing import transcript_chunking, batch_processing
+from processing.scheduler import (load_priorities, load_throughput, plan_batch, plan_windows, predict_makespan, priority_for,
+                                  save_throughput)
+from utils.settings import Settings
+
+
+def _word_count(text):
+    return len(text.split())
+
+
+def _write(tmp_path, name, words):
+    path = tmp_path / name
+    path.write_text("\n".join(f"Speaker: word{i}" for i in range(words // 2)), encoding="utf-8")
+    return path
+
+
+def test_longest_first(tmp_path):
+    files = [_write(tmp_path, "small.txt", 10), _write(tmp_path, "large.txt", 100), _write(tmp_path, "medium.txt", 50)]
+    units = plan_batch(files, counter=_word_count)
+    assert [unit.transcript_file.name for unit in units] == ["large.txt", "medium.txt", "small.txt"]
+
+
+def test_priorities_override_size(tmp_path):
+    files = [_write(tmp_path, "urgent_call.txt", 10), _write(tmp_path, "large.txt", 100)]
+    units = plan_batch(files, priorities={"urgent_*": 5}, counter=_word_count)
+    assert units[0].transcript_file.name == "urgent_call.txt"
+    assert units[0].priority == 5
+
+
+def test_priority_for_takes_highest_match():
+    assert priority_for("urgent_vip.txt", {"urgent_*": 5, "*vip*": 9}) == 9
+    assert priority_for("other.txt", {"urgent_*": 5}) == 0
+
+
+def test_oversized_transcript_decomposed(tmp_path, monkeypatch):
+    monkeypatch.setattr(transcript_chunking, "count_tokens", _word_count)
+    files = [_write(tmp_path, "workshop.txt", 400), _write(tmp_path, "small.txt", 120)]
+    units = plan_batch(files, chunk_tokens=150, counter=_word_count)
+    chunks = [unit for unit in units if unit.is_chunk]
+    assert [unit.tokens for unit in units] == [150, 150, 120, 100]
+    assert len(chunks) == 3
+    text = files[0].read_text()
+    assert "".join(unit.chunk_of(text) for unit in sorted(chunks, key=lambda u: u.chunk_index)) == text
+    # The small transcript is scheduled between chunks rather than after the whole workshop
+    assert units[-1].is_chunk
+
+
+def test_long_line_decomposed(tmp_path, monkeypatch):
+    monkeypatch.setattr(transcript_chunking, "count_tokens", _word_count)
+    path = tmp_path / "monologue.txt"
+    path.write_text("Alex: " + "It was slow. " * 100, encoding="utf-8")
+    units = plan_batch([path], chunk_tokens=40, counter=_word_count)
+    assert len(units) == 8
+    assert all(unit.tokens <= 40 for unit in units)
+
+
+def test_plan_windows_orders_within_each_window(tmp_path):
+    files = [_write(tmp_path, f"{name}.txt", words) for name, words in [("a", 10), ("b", 100), ("c", 50), ("d", 80)]]
+    read = []
+    units = plan_windows((read.append(f.name) or f for f in files), 2, counter=_word_count)
+    assert next(units).transcript_file.name == "b.txt"
+    # Only the first window has been discovered so far
+    assert read == ["a.txt", "b.txt"]
+    assert [unit.transcript_file.name for unit in units] == ["a.txt", "d.txt", "c.txt"]
+
+
+def test_predict_makespan():
+    assert predict_makespan([5, 4, 3, 3, 3], 2) == 10
+    assert predict_makespan([5, 4, 3], 1) == 12
+    assert predict_makespan([], 3) == 0
+
+
+def test_load_priorities(tmp_path):
+    path = tmp_path / "priorities.yaml"
+    path.write_text('"*urgent*": 10\n"board_*": 3\n')
+    assert load_priorities(path) == {"*urgent*": 10, "board_*": 3}
+    path.write_text("- not a mapping\n")
+    with pytest.raises(ValueError):
+        load_priorities(path)
+
+
+def test_chunked_transcript_consolidated_in_batch(tmp_path, monkeypatch):
+    monkeypatch.setattr(transcript_chunking, "count_tokens", _word_count)
+    monkeypatch.setattr(batch_processing, "plan_batch",
+                        lambda files, **kwargs: plan_batch(files, counter=_word_count, **kwargs))
+    monkeypatch.setattr(batch_processing, "convert_markdown_to_docx", MagicMock())
+    transcripts_dir = tmp_path / "transcripts"
+    transcripts_dir.mkdir()
+    _write(transcripts_dir, "workshop.txt", 300)
+    reports_dir = tmp_path / "reports"
+    reports_dir.mkdir()
+    client = MagicMock()
+    client.chat.completions.create.return_value.choices[0].message.content = "Segment analysis"
+    summary = batch_processing.RunSummary()
+    batch_processing.process_all_transcripts(client, "Template", reports_dir, input_dir=str(transcripts_dir),
+                                             summary=summary, settings=Settings(max_concurrency=3, chunk_size=100))
+    # Three chunk calls plus one consolidation call
+    assert client.chat.completions.create.call_count == 4
+    assert (reports_dir / "workshop_analysis.md").read_text() == "Segment analysis"
+    assert summary.get("Transcripts processed") == 1
+    assert summary.get("Actual makespan (s)") is not None
+    assert summary.get("Predicted makespan (s)") is None  # No earlier batch to learn the throughput from
+    assert load_throughput(reports_dir) > 0
+
+
+def test_makespan_predicted_from_previous_batch(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_processing, "plan_batch",
+                        lambda files, **kwargs: plan_batch(files, counter=_word_count, **kwargs))
+    monkeypatch.setattr(batch_processing, "process_single_transcript", lambda *args, **kwargs: True)
+    transcripts_dir = tmp_path / "transcripts"
+    transcripts_dir.mkdir()
+    for name, words in [("a.txt", 40), ("b.txt", 30), ("c.txt", 30)]:
+        _write(transcripts_dir, name, words)
+    reports_dir = tmp_path / "reports"
+    reports_dir.mkdir()
+    save_throughput(reports_dir, 0.5)
+    summary = batch_processing.RunSummary()
+    batch_processing.process_all_transcripts(MagicMock(), "Template", reports_dir, input_dir=str(transcripts_dir),
+                                             summary=summary, settings=Settings(max_concurrency=2))
+    # Planned before the batch at the previous throughput, whatever this batch's own timing
+    tokens = sorted((_word_count((transcripts_dir / name).read_text()) for name in ["a.txt", "b.txt", "c.txt"]), reverse=True)
+    assert summary.get("Predicted makespan (s)") == predict_makespan(tokens, 2) * 0.5
+    assert load_throughput(reports_dir) != 0.5
+
+
+def test_chunked_transcript_without_report_counts_as_failed(tmp_path, monkeypatch):
+    monkeypatch.setattr(transcript_chunking, "count_tokens", _word_count)
+    monkeypatch.setattr(batch_processing, "plan_batch",
+                        lambda files, **kwargs: plan_batch(files, counter=_word_count, **kwargs))
+    transcripts_dir = tmp_path / "transcripts"
+    transcripts_dir.mkdir()
+    _write(transcripts_dir, "workshop.txt", 300)
+    reports_dir = tmp_path / "reports"
+    reports_dir.mkdir()
+    client = MagicMock()
+    client.chat.completions.create.side_effect = RuntimeError("API unavailable")
+    summary = batch_processing.RunSummary()
+    batch_processing.process_all_transcripts(client, "Template", reports_dir, input_dir=str(transcripts_dir),
+                                             summary=summary, settings=Settings(max_concurrency=3, chunk_size=100))
+    assert not (reports_dir / "workshop_analysis.md").exists()
+    assert summary.get("Transcripts processed") == 0
+    assert summary.get("Transcripts failed") == 1
@@ -0,0 +1,71 @@
+import os
+
+from processing.search_index import SearchIndex
+
+TRANSCRIPT = """[00:00:01] Interviewer: How was the deal registry process?
+[00:00:09] Jane Doe: Honestly the deal registry was a constant frustration for our team.
+[00:00:20] Interviewer: And pricing?
+[00:00:25] Jane Doe: Prices went up every single year.
+"""
+
+REPORT = """# Interview Analysis – Jane Doe
+
+## Direct Customer Quotes (Verbatim)
+- > **Jane Doe:** "Prices went up every single year."
+  - **Transcript Reference:** Discussing renewal costs.
+
+## Pricing & Value Perception
+- Pricing increases were the main driver of dissatisfaction.
+"""
+
+
+def _setup(tmp_path):
+    transcripts = tmp_path / "transcripts"
+    reports = tmp_path / "reports"
+    transcripts.mkdir()
+    reports.mkdir()
+    (transcripts / "interview1.txt").write_text(TRANSCRIPT, encoding="utf-8")
+    (reports / "interview1_analysis.md").write_text(REPORT, encoding="utf-8")
+    index = SearchIndex(reports / ".search_index.sqlite")
+    return index, transcripts, reports
+
+
+def test_search_turns_sections_and_quotes(tmp_path):
+    index, transcripts, reports = _setup(tmp_path)
+    assert index.update(sorted(transcripts.glob("*.txt")), reports) == 2
+    hits = index.search('"deal registry"')
+    assert {(hit.source, hit.kind, hit.label) for hit in hits} == {("interview1.txt", "turn", "Jane Doe"),
+                                                                    ("interview1.txt", "turn", "Interviewer")}
+    assert "[deal registry]" in hits[0].snippet.lower()
+    kinds = {hit.kind for hit in index.search("prices")}
+    assert kinds == {"turn", "section", "quote"}
+    quotes = index.search("prices", kind="quote")
+    assert [hit.source for hit in quotes] == ["interview1_analysis.md"]
+    assert quotes[0].label.startswith("Jane Doe")
+
+
+def test_only_changed_files_are_reindexed(tmp_path):
+    index, transcripts, reports = _setup(tmp_path)
+    files = sorted(transcripts.glob("*.txt"))
+    index.update(files, reports)
+    assert index.update(files, reports) == 0
+    report = reports / "interview1_analysis.md"
+    report.write_text(REPORT.replace("dissatisfaction", "churn risk"), encoding="utf-8")
+    os.utime(report, ns=(report.stat().st_atime_ns, report.stat().st_mtime_ns + 10**9))
+    assert index.update(files, reports) == 1
+    assert index.search("churn") and not index.search("dissatisfaction")
+
+
+def test_removed_files_are_dropped(tmp_path):
+    index, transcripts, reports = _setup(tmp_path)
+    index.update(sorted(transcripts.glob("*.txt")), reports)
+    (transcripts / "interview1.txt").unlink()
+    index.update([], reports)
+    assert index.search("registry") == []
+
+
+def test_invalid_query_syntax_falls_back_to_words(tmp_path):
+    index, transcripts, reports = _setup(tmp_path)
+    index.update(sorted(transcripts.glob("*.txt")), reports)
+    assert index.search('registry "(') != []
+    assert index.search("") == []
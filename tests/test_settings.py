@@ -0,0 +1,69 @@
+import dataclasses
+from argparse import Namespace
+from unittest.mock import patch
+
+import pytest
+
+from conversion.output_conversion import convert_markdown_to_docx
+from utils.settings import Settings
+
+
+def _config(**processing):
+    return {"azure": {"deployment": "gpt-4o"}, "processing": processing}
+
+
+def test_defaults():
+    settings = Settings.from_sources({}, env={})
+    assert settings.input_dir == "transcripts"
+    assert settings.template_path == "AnalysisTemplate.txt"
+    assert settings.docx
+    assert settings.max_validation_passes == 5
+    assert settings.deployment is None
+    assert settings.log_file is None
+
+
+def test_command_line_overrides_config():
+    config = _config(input_dir="in", output_dir="out", max_concurrency=2, template_path="a.txt")
+    args = Namespace(input="cli_in", output=None, concurrency=4, template=["b.txt", "c.txt"], priorities=None, export=None)
+    settings = Settings.from_sources(config, args, env={})
+    assert settings.input_dir == "cli_in"
+    assert settings.output_dir == "out"
+    assert settings.max_concurrency == 4
+    assert settings.template_paths == ("b.txt", "c.txt")
+    assert settings.deployment == "gpt-4o"
+
+
+def test_environment_deployment_wins():
+    settings = Settings.from_sources(_config(), env={"AZURE_OPENAI_DEPLOYMENT": "prod"})
+    assert settings.deployment == "prod"
+
+
+def test_settings_are_immutable():
+    settings = Settings.from_sources(_config(priorities={"*urgent*": 10}), env={})
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        settings.max_concurrency = 8
+    with pytest.raises(TypeError):
+        settings.priorities["*other*"] = 1
+
+
+@pytest.mark.parametrize("processing", [
+    {"output_format": ["md", "pdf"]},
+    {"output_format": ["docx"]},
+    {"max_concurrency": 0},
+    {"chunk_size": 0},
+    {"max_validation_passes": 0},
+    {"export_format": "xlsx"},
+])
+def test_invalid_settings_raise(processing):
+    with pytest.raises(ValueError):
+        Settings.from_sources(_config(**processing), env={})
+
+
+def test_markdown_only_skips_docx(tmp_path):
+    settings = Settings.from_sources(_config(output_format="md"), env={})
+    md_file = tmp_path / "report.md"
+    md_file.write_text("# Report")
+    assert not settings.docx
+    with patch("conversion.output_conversion.subprocess.run") as run:
+        convert_markdown_to_docx(md_file, tmp_path / "report.docx", settings=settings)
+    run.assert_not_called()
@@ -0,0 +1,100 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from conversion.structured_export import export_corpus, extract_report, save_report_json
+
+REPORT = """# Interview Analysis – Jane Doe, Contoso School
+
+**Executive Summary**
+- Pricing is the top concern.
+
+## Interview Details
+* **Date & Time:** 2025-05-01 10:00
+* **Interviewer (Name & Role):** Sam Lee, Researcher
+* **Participant (Name & Role):** Jane Doe, IT Director
+
+## Direct Customer Quotes (Verbatim)
+- > **Jane Doe:** "The prices went up every year."
+  - **Transcript Reference:** Discussing renewal costs.
+- > **Alex Kim:** "Support was great after COVID."
+- **Section Completeness Self-Check:** Yes.
+
+## Customer Ratings & Metrics (Verbatim)
+- **Sales Engagement:** 4/5 – "They were responsive."
+  - **Transcript Reference:** Rating the sales team.
+- Post-sales support: 3 out of 5
+
+## Customer Recommendations (Verbatim)
+- > **Jane Doe:** "Give us a single point of contact."
+
+## Interview Analysis by MCEM Stage
+### 1. Listen & Consult
+The district needed devices for remote learning.
+- Pain point: budget cuts.
+- **Section Completeness Self-Check:** Yes.
+
+### 4. Realize Value
+No data provided in transcript.
+
+## Analyst Recommendations
+- Introduce an education pricing tier.
+"""
+
+
+def test_extract_report():
+    document = extract_report(REPORT, "interview1")
+    assert document["transcript"] == "interview1"
+    assert document["interview_details"]["participant"] == "Jane Doe, IT Director"
+    assert [q["text"] for q in document["quotes"]] == ["The prices went up every year.", "Support was great after COVID.",
+                                                       "Give us a single point of contact."]
+    assert document["quotes"][0]["context"] == "Discussing renewal costs."
+    assert [(r["label"], r["score"], r["scale"]) for r in document["ratings"]] == [("Sales Engagement", 4, 5), ("Post-sales support", 3, 5)]
+    assert document["recommendations"] == [{"source": "customer", "text": "Give us a single point of contact."},
+                                           {"source": "analyst", "text": "Introduce an education pricing tier."}]
+    assert [s["stage"] for s in document["stages"]] == ["Listen & Consult", "Realize Value"]
+    assert document["stages"][0]["findings"] == ["The district needed devices for remote learning.", "Pain point: budget cuts."]
+    # Speakers not named in the interview details are still listed
+    assert {"role": "speaker", "description": "Alex Kim"} in document["participants"]
+    assert {"role": "speaker", "description": "Jane Doe"} not in document["participants"]
+
+
+def test_extract_tolerates_free_form_report():
+    document = extract_report("Just some notes.\n> \"A quote\"\n")
+    assert document["quotes"][0]["text"] == "A quote"
+    assert document["ratings"] == [] and document["stages"] == []
+
+
+def test_save_report_json(tmp_path):
+    md_file = tmp_path / "interview1_analysis.md"
+    md_file.write_text(REPORT, encoding="utf-8")
+    json_file = save_report_json(md_file)
+    assert json_file == tmp_path / "interview1_analysis.json"
+    assert json.loads(json_file.read_text(encoding="utf-8"))["transcript"] == "interview1"
+
+
+def test_export_corpus_csv(tmp_path):
+    pd = pytest.importorskip("pandas")
+    (tmp_path / "a_analysis.md").write_text(REPORT, encoding="utf-8")
+    (tmp_path / "b_analysis.md").write_text(REPORT.replace("4/5", "2/5"), encoding="utf-8")
+    save_report_json(tmp_path / "a_analysis.md")  # b is parsed from its Markdown
+    written = export_corpus(tmp_path, "csv")
+    ratings = pd.read_csv(written["ratings"])
+    assert sorted(ratings[ratings["label"] == "Sales Engagement"]["score"]) == [2, 4]
+    assert set(pd.read_csv(written["quotes"])["transcript"]) == {"a", "b"}
+    assert written["stage_findings"].parent == tmp_path / "corpus"
+
+
+def test_export_parquet_falls_back_to_csv(tmp_path):
+    pytest.importorskip("pandas")
+    (tmp_path / "a_analysis.md").write_text(REPORT, encoding="utf-8")
+    with patch("pandas.DataFrame.to_parquet", side_effect=ImportError("no engine")):
+        written = export_corpus(tmp_path, "parquet")
+    assert written["quotes"].suffix == ".csv"
+
+
+def test_export_rejects_unknown_format(tmp_path):
+    pytest.importorskip("pandas")
+    with pytest.raises(ValueError):
+        export_corpus(tmp_path, "xlsx")
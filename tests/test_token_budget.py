@@ -0,0 +1,85 @@
+import pytest
+from unittest.mock import MagicMock
+from processing import token_budget
+from processing.token_budget import TokenBudget, create_completion, template_key
+
+
+def _response(content="Mock analysis result", finish_reason="stop", completion_tokens=None):
+    response = MagicMock()
+    response.choices[0].message.content = content
+    response.choices[0].finish_reason = finish_reason
+    response.usage.completion_tokens = completion_tokens
+    return response
+
+
+def test_default_budget_without_history():
+    budget = TokenBudget(context_window=128000, max_completion_tokens=16000)
+    assert budget.max_tokens_for("short prompt") == 16000
+    assert budget.max_tokens_for("short prompt", default=2000) == 2000
+
+
+def test_budget_learns_from_recorded_output():
+    budget = TokenBudget(max_completion_tokens=16000, min_completion_tokens=512, headroom=1.25)
+    key = template_key("Template", "initial")
+    budget.record(key, 4000)
+    budget.record(key, 3000)
+    assert budget.max_tokens_for("short prompt", key=key) == 5000
+
+
+def test_budget_limited_by_context_window(monkeypatch):
+    monkeypatch.setattr(token_budget, "count_tokens", lambda text: 120000)
+    budget = TokenBudget(context_window=128000, max_completion_tokens=16000)
+    # The byte-length bound is too large, so the prompt is counted exactly
+    assert budget.max_tokens_for("x" * 130000) == 128000 - 120000 - token_budget.MESSAGE_OVERHEAD_TOKENS
+
+
+def test_history_round_trip(tmp_path):
+    history = tmp_path / token_budget.BUDGET_HISTORY_FILE
+    budget = TokenBudget(history_path=history)
+    budget.record("abc:initial", 2500)
+    budget.save()
+    reloaded = TokenBudget(history_path=history)
+    assert reloaded.expected_output("abc:initial") == 2500
+
+
+def test_from_config_reads_processing_section():
+    budget = TokenBudget.from_config({"processing": {"max_completion_tokens": 8000, "context_window": 32000}})
+    assert budget.max_completion_tokens == 8000
+    assert budget.context_window == 32000
+
+
+def test_create_completion_records_usage():
+    client = MagicMock()
+    client.chat.completions.create.return_value = _response(completion_tokens=1800)
+    budget = TokenBudget(min_completion_tokens=512)
+    create_completion(client, [{"role": "user", "content": "prompt"}], budget, key="k:initial", default=3000)
+    assert client.chat.completions.create.call_args[1]["max_tokens"] == 3000
+    assert budget.expected_output("k:initial") == 1800
+
+
+def test_create_completion_retries_truncated_response():
+    client = MagicMock()
+    client.chat.completions.create.side_effect = [
+        _response("partial", finish_reason="length"),
+        _response("complete", completion_tokens=6000),
+    ]
+    budget = TokenBudget(max_completion_tokens=16000, min_completion_tokens=512)
+    budget.record("k:initial", 2000)
+    response = create_completion(client, [{"role": "user", "content": "prompt"}], budget, key="k:initial")
+    assert response.choices[0].message.content == "complete"
+    max_tokens = [call[1]["max_tokens"] for call in client.chat.completions.create.call_args_list]
+    assert max_tokens == [2500, 16000]
+
+
+def test_create_completion_gives_up_at_cap():
+    client = MagicMock()
+    client.chat.completions.create.return_value = _response("partial", finish_reason="length")
+    budget = TokenBudget(max_completion_tokens=4000, min_completion_tokens=512)
+    response = create_completion(client, [{"role": "user", "content": "prompt"}], budget)
+    assert response.choices[0].message.content == "partial"
+    assert client.chat.completions.create.call_count == 1
+
+
+def test_min_above_max_rejected():
+    with pytest.raises(ValueError):
+        TokenBudget(max_completion_tokens=1000, min_completion_tokens=2000)
@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+from processing import token_index as token_index_module
+from processing.scheduler import plan_batch
+from processing.token_index import TokenIndex, TokenIndexCache, text_key
+from processing.transcript_chunking import split_transcript
+from processing.transcript_compaction import CompactionOptions, compact_transcript
+
+
+@pytest.fixture
+def encoding(byte_encoding):
+    return byte_encoding
+
+
+TEXT = "Alex: the café was thin\nBob: hello there é😀\n\nAlex: thanks\n"
+
+
+def test_offsets_match_decoded_tokens(encoding):
+    index = TokenIndex.build(TEXT, encoding)
+    tokens = encoding.encode(TEXT)
+    _, offsets = encoding.decode_with_offsets(tokens)
+    assert index.count == len(tokens)
+    assert list(index.offsets[:-1]) == offsets
+    assert index.offsets[-1] == len(TEXT)
+
+
+def test_slice_and_count_range(encoding):
+    index = TokenIndex.build(TEXT, encoding)
+    tokens = encoding.encode(TEXT)
+    assert index.slice(TEXT, 0) == TEXT
+    assert index.slice(TEXT, 3, 10) == encoding.decode(tokens[3:10])
+    second_line = TEXT.index("Bob")
+    assert index.count_range(0, second_line) == len(encoding.encode(TEXT[:second_line]))
+
+
+def test_chunks_break_between_lines(encoding):
+    index = TokenIndex.build(TEXT, encoding)
+    chunks = split_transcript(TEXT, 25, index=index)
+    assert "".join(chunks) == TEXT
+    assert all(chunk.endswith("\n") for chunk in chunks)
+    assert len(chunks) > 1
+    # Lines longer than the chunk size are split too
+    chunks = index.split(TEXT, 1)
+    assert "".join(chunks) == TEXT
+    assert len(chunks) > len(TEXT.splitlines())
+    assert index.split("", 10) == []
+
+
+def test_cache_persists_and_memory_maps(tmp_path, encoding):
+    cache = TokenIndexCache(tmp_path, encoding)
+    count = cache.get(TEXT).count
+    path = tmp_path / f"{text_key(TEXT)}-test_bytes.npy"
+    assert path.exists()
+    reloaded = TokenIndexCache(tmp_path, encoding).get(TEXT)
+    assert isinstance(reloaded.offsets, np.memmap)
+    assert reloaded.count == count
+
+
+def test_corrupt_cache_file_is_rebuilt(tmp_path, encoding):
+    cache = TokenIndexCache(tmp_path, encoding)
+    path = cache.path_for(text_key(TEXT))
+    path.write_bytes(b"not an index")
+    assert cache.get(TEXT).count == len(encoding.encode(TEXT))
+    assert TokenIndex.load(path).count == len(encoding.encode(TEXT))
+
+
+def test_plan_batch_uses_token_index(tmp_path, encoding, monkeypatch):
+    monkeypatch.setattr(token_index_module, "_cache", TokenIndexCache(tmp_path / "cache", encoding))
+    path = tmp_path / "workshop.txt"
+    path.write_text(TEXT * 20, encoding="utf-8")
+    units = plan_batch([path], chunk_tokens=100)
+    assert len(units) > 1
+    assert "".join(unit.chunk_of(TEXT * 20) for unit in sorted(units, key=lambda u: u.chunk_index)) == TEXT * 20
+    assert sum(unit.tokens for unit in units) == len(encoding.encode(TEXT * 20))
+    assert list((tmp_path / "cache").glob("*.npy"))
+
+
+def test_long_lines_split_at_sentences(encoding):
+    line = "Alex: " + "We tried the new portal. It was slow! " * 20 + "\n"
+    index = TokenIndex.build(line, encoding)
+    chunks = index.split(line, 40)
+    assert "".join(chunks) == line
+    assert all(index.count_range(line.index(chunk), line.index(chunk) + len(chunk)) <= 40 for chunk in chunks)
+    assert all(chunk.endswith(("! ", ". ", "\n")) for chunk in chunks)
+    # Without a sentence end the line is cut at token boundaries
+    assert "".join(index.split("x" * 100, 30)) == "x" * 100
+    assert len(index.split("x" * 100, 30)) == len(TokenIndex.build("x" * 100, encoding).split("x" * 100, 30)) > 1
+
+
+@pytest.mark.parametrize("transcript", [
+    # Unlabelled lines are merged into one compacted line
+    "".join(f"The quarterly numbers were fine and sales grew in region {i}.\n" for i in range(300)),
+    # So are consecutive turns of a single speaker
+    "".join(f"Alex: The quarterly numbers were fine and sales grew in region {i}.\n" for i in range(300)),
+])
+def test_compacted_transcript_is_still_chunked(tmp_path, encoding, monkeypatch, transcript):
+    monkeypatch.setattr(token_index_module, "_cache", TokenIndexCache(None, encoding))
+    options = CompactionOptions()
+    compacted = compact_transcript(transcript, options).text
+    assert compacted.count("\n") == 1
+    path = tmp_path / "long.txt"
+    path.write_text(transcript, encoding="utf-8")
+    units = plan_batch([path], chunk_tokens=1000, compaction=options)
+    assert len(units) > 5
+    assert all(unit.tokens <= 1000 for unit in units)
+    assert "".join(unit.chunk_of(compacted) for unit in sorted(units, key=lambda u: u.chunk_index)) == compacted
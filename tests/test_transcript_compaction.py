@@ -0,0 +1,118 @@
+import re
+from processing.transcript_compaction import CompactionOptions, compact_transcript
+
+TEAMS_VTT = """WEBVTT
+
+1
+00:00:00.000 --> 00:00:04.120
+<v JOHN SMITH>Um, thanks for joining.</v>
+
+2
+00:00:04.120 --> 00:00:08.000
+<v JOHN SMITH>So, you know, the pricing was, uh, too high.</v>
+
+3
+00:00:08.000 --> 00:00:10.000
+<v Jane Doe>Do you know the price? [crosstalk]</v>
+"""
+
+TEAMS_TXT = """John Smith   0:03
+Hello everyone.
+I think um it works.
+Jane Doe   0:10
+10:30 works for me.
+"""
+
+ZOOM = """[00:01:02] Alice: We rated it 4 out of 5.
+[00:01:09] Alice: Mostly, I mean, because of support.
+00:01:15 Bob: (inaudible) Okay.
+"""
+
+
+def test_teams_vtt():
+    compacted = compact_transcript(TEAMS_VTT)
+    assert compacted.text == ("John Smith: thanks for joining. So, the pricing was, too high.\n"
+                              "Jane Doe: Do you know the price?\n")
+
+
+def test_teams_text_export_keeps_times_in_content():
+    compacted = compact_transcript(TEAMS_TXT)
+    assert compacted.text == "John Smith: Hello everyone. I think it works.\nJane Doe: 10:30 works for me.\n"
+
+
+def test_zoom_turns_merged():
+    compacted = compact_transcript(ZOOM)
+    assert compacted.text == "Alice: We rated it 4 out of 5. Mostly, because of support.\nBob: Okay.\n"
+
+
+def test_content_words_never_altered():
+    fillers = {"um", "uh", "you", "know", "i", "mean"}
+    for transcript in (TEAMS_VTT, TEAMS_TXT, ZOOM):
+        compacted = compact_transcript(transcript).text
+        # Every word in the compacted text appears verbatim, in order, in the original
+        position = 0
+        words = [word for line in compacted.splitlines() for word in line.split(": ", 1)[-1].split()]
+        for word in words:
+            position = transcript.find(word, position)
+            assert position >= 0, word
+            position += len(word)
+        # Nothing but fillers, markers, timestamps and labels was removed
+        original_words = re.findall(r"[A-Za-z]+", transcript.lower())
+        kept_words = set(re.findall(r"[A-Za-z]+", compacted.lower()))
+        removed = {w for w in original_words if w not in kept_words}
+        assert removed <= fillers | {"webvtt", "v", "crosstalk", "inaudible"}
+
+
+def test_locate_quote_in_original():
+    compacted = compact_transcript(TEAMS_VTT)
+    start, end = compacted.locate("the pricing was, too high.")
+    assert TEAMS_VTT[start:end] == "the pricing was, uh, too high."
+    start, end = compacted.locate("Do you know the price?")
+    assert TEAMS_VTT[start:end] == "Do you know the price?"
+    assert compacted.locate("not in the transcript") is None
+
+
+def test_options_disable_steps():
+    options = CompactionOptions(strip_fillers=False, merge_turns=False)
+    compacted = compact_transcript(ZOOM, options)
+    assert compacted.text.count("Alice:") == 2
+    assert "I mean," in compacted.text
+
+
+def test_from_config():
+    assert CompactionOptions.from_config({}) is None
+    assert CompactionOptions.from_config({"processing": {"compaction": {"enabled": False}}}) is None
+    options = CompactionOptions.from_config({"processing": {"compaction": {"enabled": True, "fillers": ["Um"]}}})
+    assert options.fillers == ("um",)
+
+
+def test_compaction_is_deterministic():
+    assert compact_transcript(ZOOM).text == compact_transcript(ZOOM).text
+
+
+def test_upper_case_acronyms_are_not_fillers():
+    compacted = compact_transcript("BOB: We went to the ER, um, yesterday.\nALICE: Um, the MM wave radio. Er, no.\n")
+    assert compacted.text == "Bob: We went to the ER, yesterday.\nAlice: the MM wave radio. no.\n"
+
+
+def test_leading_marker_is_not_a_speaker():
+    compacted = compact_transcript("Alice: We left early.\n[crosstalk] we should go\n(laughter) so then we left\n")
+    assert compacted.text == "Alice: We left early. we should go so then we left\n"
+
+
+def test_backchannels_kept():
+    compacted = compact_transcript("Bob: Uh huh, that is right.\nAlice: Mm-hmm. Um, mm hmm.\n")
+    assert compacted.text == "Bob: Uh huh, that is right.\nAlice: Mm-hmm. mm hmm.\n"
+
+
+def test_loaded_transcript_locates_quotes(tmp_path, monkeypatch, byte_encoding):
+    from processing import token_index
+    from processing.transcript_processing import load_transcript
+    monkeypatch.setattr(token_index, "_cache", token_index.TokenIndexCache(encoding=byte_encoding))
+    path = tmp_path / "interview.vtt"
+    path.write_text(TEAMS_VTT)
+    transcript = load_transcript(path, CompactionOptions())
+    start, end = transcript.locate("the pricing was, too high.")
+    assert TEAMS_VTT[start:end] == "the pricing was, uh, too high."
+    plain = load_transcript(path)
+    assert plain == TEAMS_VTT and plain.locate("Jane Doe") == (TEAMS_VTT.find("Jane Doe"), TEAMS_VTT.find("Jane Doe") + 8)
@@ -0,0 +1,135 @@
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from processing.validation_policy import ValidationOptions, ValidationRun, parse_grade
+from utils.settings import Settings
+
+GRADES = ("VALID", "VALID (A)", "VALID (B)")
+
+
+@pytest.mark.parametrize("reply,label", [
+    ("VALID", "VALID"),
+    ("VALID (B).", "VALID (B)"),
+    ("valid\n\nThe report covers every quote.", "VALID"),
+    ("**VALID (C)**", "VALID (C)"),
+    ("INVALID", "INVALID"),
+    ("NOT VALID - pricing quote missing", "INVALID"),
+    ("Valid points are missing:\n- pricing quote", "INVALID"),
+    ("Grade: D\n1. Missing quote\n2. Wrong rating", "INVALID (D)"),
+    ('```json\n{"valid": true, "grade": "B", "issues": []}\n```', "VALID (B)"),
+])
+def test_parse_grade(reply, label):
+    assert parse_grade(reply).label == label
+
+
+def test_parse_grade_counts_issues():
+    grade = parse_grade('{"valid": false, "grade": "D", "issues": ["Missing quote", "Wrong rating"]}')
+    assert grade.issues == 2
+    assert grade.feedback == "- Missing quote\n- Wrong rating"
+
+
+def test_grade_threshold():
+    run = ValidationRun(ValidationOptions(), GRADES, 5)
+    assert run.accepts(parse_grade("VALID (B) - minor wording differences"))
+    assert not run.accepts(parse_grade("VALID (C)"))
+    assert ValidationRun(ValidationOptions(min_grade="C"), GRADES, 5).accepts(parse_grade("VALID (C)"))
+    # A C is still better than a rejection when looking for improvement
+    assert parse_grade("VALID (C)").rank > parse_grade("- missing quote").rank
+
+
+def test_lenient_acceptance_saves_passes():
+    run = ValidationRun(ValidationOptions(), GRADES, 5)
+    assert run.validated("VALID (B).", parse_grade("VALID (B)."), 100) == ValidationRun.ACCEPTED
+    assert run.passes_saved == 4
+    exact = ValidationRun(ValidationOptions(), GRADES, 5)
+    exact.validated("VALID", parse_grade("VALID"), 100)
+    assert exact.passes_saved == 0
+
+
+def test_stops_without_improvement():
+    run = ValidationRun(ValidationOptions(patience=2), GRADES, 5)
+    replies = ["Grade: D\n- a\n- b", "Grade: D\n- a\n- b\n- c", "Grade: F\n- a"]
+    stops = [run.validated(reply, parse_grade(reply), 10) for reply in replies]
+    assert stops == [None, None, ValidationRun.NO_IMPROVEMENT]
+    assert run.passes_saved == 2
+
+
+def test_token_cap_checked_on_last_pass():
+    run = ValidationRun(ValidationOptions(max_transcript_tokens=1000), GRADES, 1)
+    run.generated(400)
+    assert run.validated("- a", parse_grade("- a"), 200) == ValidationRun.TOKEN_CAP
+
+
+def test_token_cap():
+    run = ValidationRun(ValidationOptions(max_transcript_tokens=1000), GRADES, 5)
+    run.generated(400)
+    assert run.validated("- a", parse_grade("- a"), 200) == ValidationRun.TOKEN_CAP
+    assert run.passes_saved == 4
+
+
+def test_invalid_options():
+    with pytest.raises(ValueError):
+        ValidationOptions.from_config({"processing": {"validation": {"min_grade": "E"}}})
+    with pytest.raises(ValueError):
+        ValidationOptions.from_config({"processing": {"validation": {"max_transcript_tokens": 0}}})
+
+
+def _process(tmp_path, monkeypatch, replies, config, tokens=(10, 5)):
+    """Run process_transcript against a client returning the given replies in order."""
+    from processing import token_budget, transcript_processing
+    from utils.run_summary import RunSummary
+    monkeypatch.setattr(transcript_processing, "count_tokens", lambda text: len(text.split()))
+    monkeypatch.setattr(token_budget, "count_tokens", lambda text: len(text.split()))
+    monkeypatch.setattr(transcript_processing, "token_index", lambda text: SimpleNamespace(count=len(text.split())))
+    replies = iter(replies)
+
+    def create(**kwargs):
+        message = SimpleNamespace(content=next(replies))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")],
+                               usage=SimpleNamespace(prompt_tokens=tokens[0], completion_tokens=tokens[1]))
+
+    client = MagicMock()
+    client.chat.completions.create.side_effect = create
+    prompts = {"initial": "{transcript} {template}", "validation": "{transcript} {report}",
+               "revision": "{transcript} {template} {prev_report} {issues}", "system": "system"}
+    summary = RunSummary()
+    transcript = tmp_path / "validation_policy_run.txt"
+    transcript.write_text("Alex: pricing is too high")
+    try:
+        report, feedback = transcript_processing.process_transcript(
+            transcript, "Template", client, prompts=prompts, budget=token_budget.TokenBudget(), summary=summary,
+            transcript_text=transcript.read_text(), settings=Settings.from_sources(config, env={}))
+    finally:
+        for path in (Path(transcript_processing.__file__).resolve().parent.parent / "reports").glob("validation_policy_run_*"):
+            path.unlink()
+    return client, summary, report, feedback
+
+
+def test_process_transcript_stops_on_stale_revisions(tmp_path, monkeypatch):
+    replies = ["Report v1", "Grade: D\n- missing quote", "Report v2", "Grade: F\n- missing quote\n- wrong rating",
+               "Report v3", "Grade: F\n- missing quote\n- wrong rating"]
+    client, summary, report, feedback = _process(tmp_path, monkeypatch, replies, {"processing": {"validation": {"patience": 2}}})
+    # The first report had the best grade; no third revision is requested
+    assert report == "Report v1"
+    assert client.chat.completions.create.call_count == 6
+    assert "LLM Grade: INVALID (F)" in feedback
+    assert summary.get("Validation passes") == 3
+    assert summary.get("Validation passes saved") == 2
+    assert summary.get("Validation stopped early (no improvement)") == 1
+
+
+@pytest.mark.parametrize("config,calls", [
+    # The last pass is not followed by an unvalidated revision
+    ({"processing": {"max_validation_passes": 2}}, 4),
+    # 2000 tokens per call: a third revision and validation would exceed the cap
+    ({"processing": {"max_validation_passes": 5, "validation": {"max_transcript_tokens": 8500, "patience": 0}}}, 4),
+])
+def test_process_transcript_never_ends_on_a_revision(tmp_path, monkeypatch, config, calls):
+    replies = ["Report v1", "Grade: D\n- a", "Report v2", "Grade: F\n- a\n- b", "Report v3", "Grade: F\n- a", "Report v4"]
+    client, summary, report, _ = _process(tmp_path, monkeypatch, replies, config, tokens=(1500, 500))
+    assert client.chat.completions.create.call_count == calls
+    assert report == "Report v1"
+    assert summary.get("Validation passes") == 2
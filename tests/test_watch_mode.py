@@ -0,0 +1,93 @@
+import threading
+from pathlib import Path
+from processing.watch_mode import TranscriptWatcher
+
+
+def test_new_file_queued_after_debounce(tmp_path):
+    watcher = TranscriptWatcher(tmp_path, handler=lambda path: None, debounce_seconds=2.0)
+    transcript = tmp_path / "interview.txt"
+    transcript.write_text("Transcript")
+    assert watcher.scan(now=0.0) == []
+    assert watcher.scan(now=1.0) == []
+    assert watcher.scan(now=2.5) == [transcript]
+    assert watcher.queue_depth == 1
+    # Not queued again while unchanged
+    assert watcher.scan(now=10.0) == []
+
+
+def test_file_still_being_written_is_not_queued(tmp_path):
+    watcher = TranscriptWatcher(tmp_path, handler=lambda path: None, debounce_seconds=2.0)
+    transcript = tmp_path / "interview.txt"
+    transcript.write_text("Part one")
+    watcher.scan(now=0.0)
+    transcript.write_text("Part one and part two")
+    assert watcher.scan(now=2.5) == []
+    assert watcher.scan(now=5.0) == [transcript]
+
+
+def test_modified_file_requeued(tmp_path):
+    watcher = TranscriptWatcher(tmp_path, handler=lambda path: None, debounce_seconds=0)
+    transcript = tmp_path / "interview.txt"
+    transcript.write_text("Transcript")
+    assert watcher.scan(now=0.0) == [transcript]
+    transcript.write_text("Re-exported transcript")
+    # Still waiting in the queue, so it is not queued twice; the worker reads the new content
+    assert watcher.scan(now=1.0) == []
+    assert watcher.queue_depth == 1
+    watcher._queued.clear()
+    transcript.write_text("Re-exported again")
+    assert watcher.scan(now=2.0) == [transcript]
+
+
+def test_existing_reports_seed_first_scan(tmp_path):
+    input_dir = tmp_path / "transcripts"
+    reports_dir = tmp_path / "reports"
+    input_dir.mkdir()
+    reports_dir.mkdir()
+    done = input_dir / "done.txt"
+    done.write_text("Processed earlier")
+    (reports_dir / "done_analysis.md").write_text("Report")
+    todo = input_dir / "todo.txt"
+    todo.write_text("New")
+    watcher = TranscriptWatcher(input_dir, handler=lambda path: None, debounce_seconds=0, reports_dir=reports_dir)
+    assert watcher.scan(now=0.0) == [todo]
+
+
+def test_run_processes_queued_files(tmp_path):
+    processed = []
+    finished = threading.Event()
+
+    def handler(path):
+        processed.append(path.name)
+        finished.set()
+
+    (tmp_path / "interview.txt").write_text("Transcript")
+    watcher = TranscriptWatcher(tmp_path, handler=handler, poll_interval=0.01, debounce_seconds=0)
+    thread = threading.Thread(target=watcher.run)
+    thread.start()
+    assert finished.wait(5)
+    watcher.stop()
+    thread.join(5)
+    assert processed == ["interview.txt"]
+    assert watcher.queue_depth == 0
+
+
+def test_handler_failure_does_not_stop_watcher(tmp_path):
+    calls = []
+    done = threading.Event()
+
+    def handler(path):
+        calls.append(path.name)
+        if path.name == "bad.txt":
+            raise SystemExit(1)
+        done.set()
+
+    (tmp_path / "bad.txt").write_text("Bad")
+    (tmp_path / "good.txt").write_text("Good")
+    watcher = TranscriptWatcher(tmp_path, handler=handler, poll_interval=0.01, debounce_seconds=0)
+    thread = threading.Thread(target=watcher.run)
+    thread.start()
+    assert done.wait(5)
+    watcher.stop()
+    thread.join(5)
+    assert sorted(calls) == ["bad.txt", "good.txt"]
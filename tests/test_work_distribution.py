@@ -0,0 +1,98 @@
+import time
+import pytest
+from pathlib import Path
+from processing import work_distribution
+from processing.work_distribution import JobQueue, parse_shard, select_shard
+
+
+def _transcripts(tmp_path, count):
+    files = []
+    for i in range(count):
+        path = tmp_path / f"interview_{i}.txt"
+        path.write_text(f"Transcript {i}")
+        files.append(path)
+    return files
+
+
+def test_parse_shard():
+    assert parse_shard("0/4") == (0, 4)
+    for spec in ["4/4", "-1/2", "a/b", "1"]:
+        with pytest.raises(ValueError):
+            parse_shard(spec)
+
+
+def test_shards_partition_files(tmp_path):
+    files = _transcripts(tmp_path, 20)
+    shards = [select_shard(files, i, 3) for i in range(3)]
+    assert sorted(f for shard in shards for f in shard) == sorted(files)
+    # Independent of listing order
+    assert select_shard(list(reversed(files)), 0, 3) == list(reversed(shards[0]))
+
+
+def test_queue_claims_each_job_once(tmp_path):
+    files = _transcripts(tmp_path, 3)
+    queue = JobQueue(tmp_path / "queue.sqlite")
+    queue.enqueue(files)
+    claimed = [queue.claim("a"), queue.claim("b"), queue.claim("a")]
+    assert sorted(claimed) == sorted(f.name for f in files)
+    assert queue.claim("b") is None
+
+
+def test_expired_lease_is_reclaimed(tmp_path):
+    files = _transcripts(tmp_path, 1)
+    queue = JobQueue(tmp_path / "queue.sqlite", lease_seconds=0)
+    queue.enqueue(files)
+    assert queue.claim("crashed") == files[0].name
+    time.sleep(0.01)
+    assert queue.claim("survivor") == files[0].name
+    # The crashed worker no longer owns the lease
+    assert not queue.heartbeat(files[0].name, "crashed")
+
+
+def test_lease_completes_or_releases(tmp_path):
+    files = _transcripts(tmp_path, 2)
+    queue = JobQueue(tmp_path / "queue.sqlite")
+    queue.enqueue(files)
+    first = queue.claim("w")
+    with queue.lease(first, "w"):
+        pass
+    second = queue.claim("w")
+    with pytest.raises(RuntimeError):
+        with queue.lease(second, "w"):
+            raise RuntimeError("worker crashed")
+    assert queue.counts() == {"done": 1, "pending": 1}
+    assert queue.claim("other") == second
+
+
+def test_done_jobs_not_repeated_unless_changed(tmp_path):
+    files = _transcripts(tmp_path, 1)
+    queue = JobQueue(tmp_path / "queue.sqlite")
+    queue.enqueue(files)
+    name = queue.claim("w")
+    queue.complete(name, "w")
+    queue.enqueue(files)
+    assert queue.claim("w") is None
+    files[0].write_text("Re-transcribed content")
+    queue.enqueue(files)
+    assert queue.claim("w") == name
+
+
+def test_attempts_are_capped(tmp_path):
+    files = _transcripts(tmp_path, 1)
+    queue = JobQueue(tmp_path / "queue.sqlite", max_attempts=2)
+    queue.enqueue(files)
+    for _ in range(2):
+        name = queue.claim("w")
+        queue.release(name, "w")
+    assert queue.claim("w") is None
+    assert queue.counts() == {"failed": 1}
+
+
+def test_expired_last_attempt_marked_failed(tmp_path):
+    files = _transcripts(tmp_path, 1)
+    queue = JobQueue(tmp_path / "queue.sqlite", lease_seconds=0, max_attempts=1)
+    queue.enqueue(files)
+    assert queue.claim("crashed") is not None
+    time.sleep(0.01)
+    assert queue.claim("w") is None
+    assert queue.counts() == {"failed": 1}
@@ -1,8 +1,17 @@
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 import os
+from pathlib import Path
 from shutil import which
-from typing import List
+from typing import List, Optional
+
+from utils.log_context import ContextFilter, JsonLinesFormatter
+
+DEFAULT_LOG_FILE_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_LOG_FILE_BACKUPS = 5
 
 # Define STANDARD log level
 STANDARD_LEVEL = 25
@@ -17,7 +26,7 @@ def log_user_error(message: str, exit_code: int = 1):
     """
     Log a user-facing error message and exit. Use for common failures (env, config, file I/O, etc.).
     """
-    logging.error(f"[USER ERROR] {message}")
+    logging.error("[USER ERROR] %s", message)
     sys.exit(exit_code)
 
 # TQL-style progress bar for pipeline steps
@@ -30,7 +39,15 @@ PIPELINE_STEPS = [
     "Finalized, Shareable Report"
 ]
 
-def show_progress_bar(current_step_idx: int, total_steps: int = 6, transcript_name: str = None, extra: str = None):
+def show_progress_bar(current_step_idx: int, total_steps: int = 6, transcript_name: str = None, extra: str = None,
+                      validation_pass: int = None):
+    # During a batch the dashboard tracks each transcript's step; when it is drawn live it replaces these lines
+    from utils.progress_dashboard import active_dashboard
+    dashboard = active_dashboard()
+    if dashboard is not None and transcript_name:
+        dashboard.update(transcript_name.strip(), PIPELINE_STEPS[current_step_idx], validation_pass)
+        if dashboard.live:
+            return
     bar = "[" + "=" * (current_step_idx + 1) + ">" + "." * (total_steps - current_step_idx - 1) + "]"
     step_name = PIPELINE_STEPS[current_step_idx]
     msg = f"{bar} {current_step_idx+1}/{total_steps} {step_name}"
@@ -43,26 +60,78 @@ def show_progress_bar(current_step_idx: int, total_steps: int = 6, transcript_na
         logger.log(STANDARD_LEVEL, msg)
 
 
-def setup_logging(level="STANDARD") -> None:
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.handlers.QueueHandler] = None
+
+
+def setup_logging(level="STANDARD", log_file: Optional[str] = None, max_bytes: int = DEFAULT_LOG_FILE_MAX_BYTES,
+                  backup_count: int = DEFAULT_LOG_FILE_BACKUPS) -> None:
     """
     Set up logging configuration for the application.
     Logs are output to stdout with the specified level and a standard format.
     If level is STANDARD, suppress INFO messages and use the progress bar for pipeline steps.
     Adds a [USER ERROR] prefix for user-facing errors.
 
+    Records are put on a queue and written by a background listener thread, so a
+    slow stdout consumer or disk never blocks the pipeline. With log_file, records
+    are also written as JSON lines (with transcript, stage and pass fields) to a
+    rotating file. Calling this again replaces the previous configuration.
+
     Args:
         level (str): Logging level as a string (e.g., 'STANDARD', 'DEBUG', 'INFO').
+        log_file (str): Optional path of the rotating JSON-lines log file.
+        max_bytes (int): Size at which the log file is rotated.
+        backup_count (int): Number of rotated log files kept.
     """
+    global _listener, _queue_handler
     if level.upper() == "STANDARD":
         loglevel = STANDARD_LEVEL
     else:
         loglevel = getattr(logging, level.upper(), logging.INFO)
-    logging.basicConfig(
-        level=loglevel,
-        format="[%(levelname)s] %(message)s",
-        datefmt="%H:%M:%S",
-        handlers=[logging.StreamHandler(sys.stdout)]
-    )
+    root = logging.getLogger()
+    if _listener is not None:
+        _listener.stop()
+        root.removeHandler(_queue_handler)
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(logging.Formatter("[%(levelname)s] %(message)s", datefmt="%H:%M:%S"))
+    handlers: List[logging.Handler] = [console]
+    if log_file:
+        Path(log_file).parent.mkdir(parents=True, exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        file_handler.setFormatter(JsonLinesFormatter())
+        handlers.append(file_handler)
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    _queue_handler = logging.handlers.QueueHandler(log_queue)
+    _queue_handler.addFilter(ContextFilter())  # Context is read in the logging thread, before the record is queued
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    root.addHandler(_queue_handler)
+    root.setLevel(loglevel)
+    _listener.start()
+
+
+def output_handlers() -> List[logging.Handler]:
+    """Handlers that actually write log output: the listener's, plus any attached directly to the root logger."""
+    handlers = [h for h in logging.getLogger().handlers if not isinstance(h, logging.handlers.QueueHandler)]
+    if _listener is not None:
+        handlers.extend(_listener.handlers)
+    return handlers
+
+
+def flush_logging() -> None:
+    """Write out all queued log records (stops the listener until setup_logging is called again)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        logging.getLogger().removeHandler(_queue_handler)
+        for handler in _listener.handlers:
+            try:
+                handler.flush()
+            except (OSError, ValueError):
+                pass  # Stream already closed at interpreter exit
+        _listener = None
+
+
+atexit.register(flush_logging)
 
 
 def check_env_vars(required_vars: List[str]) -> None:
@@ -76,7 +145,7 @@ def check_env_vars(required_vars: List[str]) -> None:
     """
     missing = [var for var in required_vars if not os.getenv(var)]
     if missing:
-        logging.error(f"Missing required environment variables: {', '.join(missing)}")
+        logging.error("Missing required environment variables: %s", ', '.join(missing))
         sys.exit(1)
 
 
@@ -1,11 +1,26 @@
 import os
 import sys
 import logging
+from functools import lru_cache
 from pathlib import Path
+from typing import Dict, Iterator, List
 from openai import AzureOpenAI
 import tiktoken
 
 
+@lru_cache(maxsize=None)
+def get_encoding(name: str = "cl100k_base") -> tiktoken.Encoding:
+    """
+    Return the tiktoken encoding, building it only once per process.
+
+    Args:
+        name (str): The encoding name.
+    Returns:
+        tiktoken.Encoding: The cached encoding.
+    """
+    return tiktoken.get_encoding(name)
+
+
 def count_tokens(text: str) -> int:
     """
     Count tokens using tiktoken for GPT-4 models.
@@ -15,8 +30,7 @@ def count_tokens(text: str) -> int:
     Returns:
         int: The number of tokens in the text.
     """
-    encoding = tiktoken.get_encoding("cl100k_base")
-    return len(encoding.encode(text))
+    return len(get_encoding().encode(text, disallowed_special=()))
 
 
 def get_client() -> AzureOpenAI:
@@ -47,7 +61,7 @@ def load_analysis_template(template_path: str = "AnalysisTemplate.txt") -> str:
     try:
         return Path(template_path).read_text(encoding="utf-8")
     except FileNotFoundError:
-        logging.error(f"{template_path} not found.")
+        logging.error("%s not found.", template_path)
         sys.exit(1)
 
 
@@ -62,3 +76,62 @@ def ensure_reports_dir(reports_dir: Path = Path("./reports")) -> Path:
     """
     reports_dir.mkdir(exist_ok=True)
     return reports_dir
+
+
+def discover_transcripts(input_dir: str, recursive: bool = False) -> Iterator[Path]:
+    """
+    Yield the .txt transcripts in a directory lazily, in name order within each directory.
+
+    Only one directory listing is held at a time, so very large input trees are not
+    materialized. Hidden subdirectories (such as caches) are skipped.
+
+    Args:
+        input_dir (str): The transcripts directory.
+        recursive (bool): Also walk subdirectories (depth first, after the files of their parent).
+    Yields:
+        Path: Each transcript file.
+    """
+    for entry in _transcript_entries(input_dir, recursive):
+        yield Path(entry.path)
+
+
+def _transcript_entries(input_dir: str, recursive: bool) -> Iterator[os.DirEntry]:
+    pending = [Path(input_dir)]
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as scan:
+                entries = sorted(scan, key=lambda entry: entry.name)
+        except OSError as e:
+            logging.debug("Cannot list '%s': %s", directory, e)
+            continue
+        subdirectories = []
+        for entry in entries:
+            if entry.name.endswith(".txt") and entry.is_file():
+                yield entry
+            elif recursive and not entry.name.startswith(".") and entry.is_dir():
+                subdirectories.append(Path(entry.path))
+        pending.extend(reversed(subdirectories))
+
+
+def duplicate_names(input_dir: str, recursive: bool = True) -> Dict[str, List[Path]]:
+    """
+    Find transcript file names that occur more than once in different subdirectories.
+
+    Reports and queue jobs are keyed by file name, so such transcripts would overwrite
+    each other's outputs. Only the names and paths of the directory entries are held.
+
+    Args:
+        input_dir (str): The transcripts directory.
+        recursive (bool): Whether subdirectories are walked (as in discover_transcripts).
+    Returns:
+        Dict[str, List[Path]]: Each repeated name with all of its paths, in discovery order.
+    """
+    first: Dict[str, str] = {}
+    duplicates: Dict[str, List[Path]] = {}
+    for entry in _transcript_entries(input_dir, recursive):
+        if entry.name in first:
+            duplicates.setdefault(entry.name, [Path(first[entry.name])]).append(Path(entry.path))
+        else:
+            first[entry.name] = entry.path
+    return duplicates
@@ -0,0 +1,59 @@
+import json
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator
+
+CONTEXT_FIELDS = ("transcript", "template", "stage", "pass")
+
+_context: ContextVar[Dict[str, Any]] = ContextVar("log_context", default={})
+
+
+@contextmanager
+def log_context(**fields: Any) -> Iterator[None]:
+    """
+    Attach fields (transcript, template, stage, pass) to every log record emitted in this block.
+
+    Fields nest: an inner block adds to or overrides the outer block's fields.
+    Context variables do not cross into new threads, so workers set their own.
+    Use validation_pass=... for the 'pass' field.
+    """
+    if "validation_pass" in fields:
+        fields["pass"] = fields.pop("validation_pass")
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Copy the current log context onto each record (runs in the thread that logs)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = _context.get()
+        for name in CONTEXT_FIELDS:
+            if not hasattr(record, name):
+                setattr(record, name, context.get(name))
+        return True
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record with the log context fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        for name in CONTEXT_FIELDS:
+            value = getattr(record, name, None)
+            if value is not None:
+                entry[name] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
@@ -0,0 +1,213 @@
+import logging
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, TextIO
+
+from utils.env_utils import STANDARD_LEVEL, output_handlers
+
+DEFAULT_REFRESH_INTERVAL = 0.5
+DEFAULT_LOG_INTERVAL = 30.0
+NAME_WIDTH = 40
+
+_active: Optional["ProgressDashboard"] = None
+
+
+def active_dashboard() -> Optional["ProgressDashboard"]:
+    """The dashboard of the batch currently running, if any."""
+    return _active
+
+
+def _clock(seconds: float) -> str:
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    return f"{hours}:{rest // 60:02d}:{rest % 60:02d}" if hours else f"{rest // 60:02d}:{rest % 60:02d}"
+
+
+class _Row:
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.validation_pass: Optional[int] = None
+        self.started = time.monotonic()
+
+
+class _LiveStream:
+    """Stream wrapper that keeps log lines above the dashboard instead of drawing through it."""
+
+    def __init__(self, dashboard: "ProgressDashboard", stream: TextIO):
+        self.dashboard = dashboard
+        self.stream = stream
+
+    def write(self, text: str) -> int:
+        with self.dashboard._lock:
+            self.dashboard._erase()
+            written = self.stream.write(text)
+            self.dashboard._draw()
+        return written
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+
+class ProgressDashboard:
+    """
+    Batch progress across concurrently processed transcripts.
+
+    On a terminal (at the default STANDARD log level) one row per active transcript
+    (stage, validation pass, elapsed time) is redrawn in place under the batch totals:
+    done/failed/remaining, tokens per minute and an ETA from observed throughput.
+    Otherwise the totals are logged periodically as plain lines.
+    """
+
+    def __init__(self, total: int, total_tokens: int = 0, stream: Optional[TextIO] = None, live: Optional[bool] = None,
+                 refresh_interval: float = DEFAULT_REFRESH_INTERVAL, log_interval: float = DEFAULT_LOG_INTERVAL):
+        self.total = total
+        self.total_tokens = total_tokens
+        self.stream = stream or sys.stdout
+        if live is None:
+            is_tty = getattr(self.stream, "isatty", lambda: False)()
+            live = is_tty and logging.getLogger().getEffectiveLevel() == STANDARD_LEVEL
+        self.live = live
+        self.refresh_interval = refresh_interval
+        self.log_interval = log_interval
+        self.done = 0
+        self.failed = 0
+        self.tokens_done = 0
+        self._rows: Dict[str, _Row] = {}
+        self._lock = threading.RLock()
+        self._drawn_lines = 0
+        self._started = time.monotonic()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._handlers: List[logging.StreamHandler] = []
+
+    # --- progress events (thread-safe) ---
+
+    def extend(self, transcripts: int = 0, tokens: int = 0) -> None:
+        """Add work discovered after the batch started (lazily planned batches)."""
+        with self._lock:
+            self.total += transcripts
+            self.total_tokens += tokens
+
+    def begin(self, name: str, stage: str = "Starting") -> None:
+        with self._lock:
+            self._rows[name] = _Row(stage)
+
+    def update(self, name: str, stage: Optional[str] = None, validation_pass: Optional[int] = None) -> None:
+        with self._lock:
+            row = self._rows.get(name)
+            if row is None:
+                return
+            if stage is not None:
+                row.stage = stage
+            if validation_pass is not None:
+                row.validation_pass = validation_pass
+
+    def end(self, name: str, tokens: int = 0, ok: Optional[bool] = None) -> None:
+        """
+        Remove a row and count its tokens as processed.
+
+        Args:
+            name (str): The row (transcript or chunk) that finished.
+            tokens (int): Transcript tokens this row covered.
+            ok (bool): Whether a transcript finished (True/False), or None for a partial unit such as a chunk.
+        """
+        with self._lock:
+            self._rows.pop(name, None)
+            self.tokens_done += tokens
+            if ok is True:
+                self.done += 1
+            elif ok is False:
+                self.failed += 1
+
+    # --- rendering ---
+
+    def totals(self) -> str:
+        """One-line batch totals with throughput and ETA."""
+        with self._lock:
+            elapsed = time.monotonic() - self._started
+            finished = self.done + self.failed
+            remaining = max(0, self.total - finished)
+            parts = [f"{self.done}/{self.total} done", f"{self.failed} failed", f"{remaining} remaining", f"{len(self._rows)} active"]
+            eta = None
+            if self.tokens_done and elapsed > 0:
+                rate = self.tokens_done / elapsed
+                parts.append(f"{rate * 60:,.0f} tokens/min")
+                eta = max(0, self.total_tokens - self.tokens_done) / rate if self.total_tokens else None
+            if eta is None and finished:
+                eta = remaining * elapsed / finished
+            parts.append(f"elapsed {_clock(elapsed)}")
+            parts.append(f"ETA {_clock(eta)}" if eta is not None else "ETA --:--")
+        return " | ".join(parts)
+
+    def render(self) -> List[str]:
+        """Dashboard lines: batch totals followed by one row per active transcript."""
+        lines = [f"Batch: {self.totals()}"]
+        now = time.monotonic()
+        with self._lock:
+            rows = sorted(self._rows.items(), key=lambda item: item[1].started)
+        for name, row in rows:
+            label = name if len(name) <= NAME_WIDTH else name[:NAME_WIDTH - 3] + "..."
+            stage = row.stage + (f" (pass {row.validation_pass})" if row.validation_pass else "")
+            lines.append(f"  {label:<{NAME_WIDTH}} {stage:<45} {_clock(now - row.started)}")
+        return lines
+
+    def _erase(self) -> None:
+        if self._drawn_lines:
+            # Move to the first dashboard line and clear to the end of the screen
+            self.stream.write(f"\x1b[{self._drawn_lines}F\x1b[J")
+            self._drawn_lines = 0
+
+    def _draw(self) -> None:
+        lines = self.render()
+        self.stream.write("\n".join(lines) + "\n")
+        self.stream.flush()
+        self._drawn_lines = len(lines)
+
+    def _loop(self) -> None:
+        interval = self.refresh_interval if self.live else self.log_interval
+        while not self._stop.wait(interval):
+            if self.live:
+                with self._lock:
+                    self._erase()
+                    self._draw()
+            else:
+                logging.log(STANDARD_LEVEL, "Progress: %s", self.totals())
+
+    # --- lifecycle ---
+
+    def start(self) -> "ProgressDashboard":
+        global _active
+        _active = self
+        if self.live:
+            for handler in output_handlers():
+                if isinstance(handler, logging.StreamHandler) and getattr(handler, "stream", None) is self.stream:
+                    handler.setStream(_LiveStream(self, self.stream))
+                    self._handlers.append(handler)
+            with self._lock:
+                self._draw()
+        self._thread = threading.Thread(target=self._loop, name="progress-dashboard", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        global _active
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self.live:
+            with self._lock:
+                self._erase()
+                self.stream.write(f"Batch: {self.totals()}\n")
+                self.stream.flush()
+            for handler in self._handlers:
+                handler.setStream(self.stream)
+            self._handlers = []
+        if _active is self:
+            _active = None
+
+    def __enter__(self) -> "ProgressDashboard":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
@@ -0,0 +1,65 @@
+import logging
+import sys
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.env_utils import STANDARD_LEVEL
+
+
+class RunSummary:
+    """
+    Thread-safe collector for per-run metrics, logged once at the end of a batch.
+
+    Counters are accumulated with add(); single values are recorded with set().
+    Lines are logged in the order metrics were first recorded.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: Dict[str, Any] = {}
+        self._order: List[str] = []
+
+    def add(self, name: str, amount: float = 1) -> None:
+        """Increase a counter."""
+        with self._lock:
+            if name not in self._values:
+                self._order.append(name)
+                self._values[name] = 0
+            self._values[name] += amount
+
+    def set(self, name: str, value: Any) -> None:
+        """Record a single value, replacing any previous one."""
+        with self._lock:
+            if name not in self._values:
+                self._order.append(name)
+            self._values[name] = value
+
+    def get(self, name: str, default: Any = None) -> Any:
+        with self._lock:
+            return self._values.get(name, default)
+
+    def items(self) -> List[Tuple[str, Any]]:
+        with self._lock:
+            return [(name, self._values[name]) for name in self._order]
+
+    def log(self) -> None:
+        """Log every recorded metric under a 'Run summary' heading."""
+        items = self.items()
+        if not items:
+            return
+        logging.log(STANDARD_LEVEL, "Run summary:")
+        for name, value in items:
+            if isinstance(value, float):
+                value = f"{value:.2f}"
+            logging.log(STANDARD_LEVEL, "  %s: %s", name, value)
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB, or None where it is not available (Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
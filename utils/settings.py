@@ -0,0 +1,165 @@
+"""Validated, immutable runtime settings built once from config.yaml, the environment and the command line"""
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, Mapping, Optional, Tuple
+
+from conversion.structured_export import EXPORT_FORMATS
+from processing.candidate_scoring import CandidateOptions
+from processing.deduplication import DeduplicationOptions
+from processing.transcript_compaction import CompactionOptions
+from processing.validation_policy import ValidationOptions
+from utils.config_utils import load_config
+
+CONFIG_FILE = Path(__file__).resolve().parent.parent / "config.yaml"
+OUTPUT_FORMATS = ("md", "docx")
+DEFAULT_ALLOWED_GRADES = ("VALID", "VALID (A)", "VALID (B)")
+DEFAULT_VALIDATION_PASSES = 5
+DEFAULT_SUMMARY_FAN_IN = 8
+DEFAULT_LOG_FILE = "logs/processing.log"
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Everything the pipeline reads from configuration, resolved once at startup.
+
+    Command-line options override config.yaml, which overrides the defaults here.
+    The expanded config is kept (read-only) for components that parse their own
+    section, such as the token budget and request policy.
+    """
+    input_dir: str = "transcripts"
+    output_dir: str = "reports"
+    template_paths: Tuple[str, ...] = ("AnalysisTemplate.txt",)
+    deployment: Optional[str] = None
+    chunk_size: Optional[int] = None
+    max_concurrency: int = 1
+    recursive: bool = False
+    ingestion_window: Optional[int] = None
+    priorities: Mapping[str, int] = field(default_factory=lambda: MappingProxyType({}))
+    output_formats: FrozenSet[str] = frozenset(OUTPUT_FORMATS)
+    allowed_validation_grades: Tuple[str, ...] = DEFAULT_ALLOWED_GRADES
+    max_validation_passes: int = DEFAULT_VALIDATION_PASSES
+    validation: ValidationOptions = ValidationOptions()
+    candidates: CandidateOptions = CandidateOptions()
+    search_index: bool = True
+    token_index: bool = True
+    export_format: Optional[str] = None
+    summary_report: bool = False
+    summary_fan_in: int = DEFAULT_SUMMARY_FAN_IN
+    log_file: Optional[str] = None
+    compaction: Optional[CompactionOptions] = None
+    deduplication: Optional[DeduplicationOptions] = None
+    config: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}))
+
+    @property
+    def template_path(self) -> str:
+        """The first (or only) template."""
+        return self.template_paths[0]
+
+    @property
+    def docx(self) -> bool:
+        """Whether Word documents are exported (one Pandoc run per report)."""
+        return "docx" in self.output_formats
+
+    @classmethod
+    def from_sources(cls, config: Optional[Dict[str, Any]], args: Any = None,
+                     env: Optional[Mapping[str, str]] = None) -> "Settings":
+        """
+        Build and validate settings.
+
+        Args:
+            config (dict): The loaded config.yaml (see load_config); may be None or empty.
+            args: Parsed command-line arguments; options that were not given (None) fall back to config.
+            env (Mapping): Environment variables (default: os.environ).
+        Returns:
+            Settings: The validated settings.
+        Raises:
+            ValueError: If a setting is invalid (or the priorities file cannot be read).
+        """
+        config = config or {}
+        env = os.environ if env is None else env
+        processing = config.get("processing", {}) or {}
+
+        def option(name: str) -> Any:
+            return getattr(args, name, None) if args is not None else None
+
+        template_paths = option("template") or [processing.get("template_path", "AnalysisTemplate.txt")]
+        if isinstance(template_paths, str):
+            template_paths = [template_paths]
+        priorities = {str(pattern): int(priority) for pattern, priority in (processing.get("priorities") or {}).items()}
+        if option("priorities"):
+            from processing.scheduler import load_priorities  # The scheduler imports modules that take Settings
+            try:
+                priorities.update(load_priorities(Path(option("priorities"))))
+            except OSError as e:
+                raise ValueError(f"Could not read priorities file: {e}")
+        output_formats = processing.get("output_format", list(OUTPUT_FORMATS))
+        if isinstance(output_formats, str):
+            output_formats = [output_formats]
+        output_formats = frozenset(str(fmt).lower() for fmt in output_formats)
+        unknown = output_formats - set(OUTPUT_FORMATS)
+        if unknown:
+            raise ValueError(f"processing.output_format: unknown format(s) {sorted(unknown)}; use {list(OUTPUT_FORMATS)}.")
+        if "md" not in output_formats:
+            raise ValueError("processing.output_format must include 'md' (every other output is built from it).")
+        chunk_size = processing.get("chunk_size")
+        max_concurrency = int(option("concurrency") or processing.get("max_concurrency", 1))
+        max_validation_passes = int(processing.get("max_validation_passes", DEFAULT_VALIDATION_PASSES))
+        summary_fan_in = int(processing.get("summary_fan_in", DEFAULT_SUMMARY_FAN_IN))
+        export_format = option("export") or processing.get("export_format")
+        ingestion = processing.get("ingestion") or {}
+        window = ingestion.get("window")
+        grades = tuple(str(grade) for grade in processing.get("allowed_validation_grades") or DEFAULT_ALLOWED_GRADES)
+        if chunk_size is not None and int(chunk_size) < 1:
+            raise ValueError("processing.chunk_size must be a positive number of tokens.")
+        if max_concurrency < 1:
+            raise ValueError("processing.max_concurrency must be at least 1.")
+        if window is not None and int(window) < 1:
+            raise ValueError("processing.ingestion.window must be at least 1.")
+        if max_validation_passes < 1:
+            raise ValueError("processing.max_validation_passes must be at least 1.")
+        if summary_fan_in < 2:
+            raise ValueError("processing.summary_fan_in must be at least 2.")
+        if export_format is not None and export_format not in EXPORT_FORMATS:
+            raise ValueError(f"processing.export_format must be one of {list(EXPORT_FORMATS)}.")
+        log_file = processing.get("log_file_path", DEFAULT_LOG_FILE) if processing.get("log_to_file") else None
+        azure = config.get("azure", {}) or {}
+        return cls(
+            input_dir=str(option("input") or processing.get("input_dir", "transcripts")),
+            output_dir=str(option("output") or processing.get("output_dir", "reports")),
+            template_paths=tuple(str(path) for path in template_paths),
+            deployment=env.get("AZURE_OPENAI_DEPLOYMENT") or azure.get("deployment") or None,
+            chunk_size=int(chunk_size) if chunk_size is not None else None,
+            max_concurrency=max_concurrency,
+            recursive=bool(ingestion.get("recursive", False)),
+            ingestion_window=int(window) if window is not None else None,
+            priorities=MappingProxyType(priorities),
+            output_formats=output_formats,
+            allowed_validation_grades=grades,
+            max_validation_passes=max_validation_passes,
+            validation=ValidationOptions.from_config(config),
+            candidates=CandidateOptions.from_config(config),
+            search_index=bool(processing.get("search_index", True)),
+            token_index=bool(processing.get("token_index", True)),
+            export_format=export_format,
+            summary_report=bool(processing.get("summary_report", False)),
+            summary_fan_in=summary_fan_in,
+            log_file=log_file,
+            compaction=CompactionOptions.from_config(config),
+            deduplication=DeduplicationOptions.from_config(config),
+            config=MappingProxyType(config),
+        )
+
+
+def load_settings(config_path: Optional[Path] = None, args: Any = None) -> Settings:
+    """
+    Settings from config.yaml (the project's by default; defaults if it does not exist), the environment and args.
+
+    Raises:
+        ValueError: If a setting is invalid.
+    """
+    path = Path(config_path) if config_path else CONFIG_FILE
+    config = load_config(str(path)) if path.exists() else {}
+    return Settings.from_sources(config, args)